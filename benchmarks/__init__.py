@@ -0,0 +1,7 @@
+"""Benchmarks for the quakehub refresh pipeline (not part of the integration)."""
+import sys
+from pathlib import Path
+
+# Import the integration as a top-level package so the benchmarks do not
+# depend on how custom_components resolves in the current environment.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "custom_components"))
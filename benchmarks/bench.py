@@ -0,0 +1,177 @@
+"""Stage timings for the refresh pipeline on synthetic feeds.
+
+    python -m benchmarks.bench --sizes 1000,10000 --json results.json
+    python -m benchmarks.bench --compare results.json
+
+Each stage (decode, parse, merge, incremental update, filter, aggregate) is timed on
+its own so a regression can be pinned to the stage that caused it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from quakehub.aggregates import EventAggregator
+from quakehub.api_emsc import parse_emsc
+from quakehub.api_geofon import parse_geofon
+from quakehub.api_usgs import parse_usgs
+from quakehub.const import AGGREGATE_WINDOWS, MAGNITUDE_BANDS
+from quakehub.feed import json_loads
+from quakehub.geo import filter_within
+from quakehub.merger import EarthquakeEvent, MergedCatalog, merge_events
+
+from .feeds import generate_feeds
+
+PARSERS = {"usgs": parse_usgs, "emsc": parse_emsc, "geofon": parse_geofon}
+
+HOME = (48.2, 16.4)
+RADIUS_KM = 2000
+
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_size(size: int, overlap: float, repeat: int, seed: int) -> Dict[str, object]:
+    now = time.time()
+    feeds = generate_feeds(size, overlap, seed=seed, now=now)
+    bodies = {source: json.dumps(feed).encode() for source, feed in feeds.items()}
+
+    decoded = {source: json_loads(body) for source, body in bodies.items()}
+    events: List[EarthquakeEvent] = []
+    for source, data in decoded.items():
+        events.extend(PARSERS[source](data))
+    merged = merge_events(events)
+    kept, _ = filter_within(HOME[0], HOME[1], RADIUS_KM, merged)
+
+    # One percent of the events changed since the last refresh
+    updated = list(events)
+    for i in range(0, len(updated), 100):
+        e = updated[i]
+        updated[i] = EarthquakeEvent(
+            e.id,
+            e.source,
+            e.timestamp,
+            e.latitude,
+            e.longitude,
+            e.depth,
+            (e.magnitude or 0) + 0.1,
+            e.place,
+        )
+
+    def update():
+        catalog = MergedCatalog()
+        catalog.update(events)
+        start = time.perf_counter()
+        catalog.update(updated)
+        return time.perf_counter() - start
+
+    def aggregate():
+        EventAggregator(AGGREGATE_WINDOWS, MAGNITUDE_BANDS).update(kept, now)
+
+    timings = {
+        "decode": _best(
+            lambda: [json_loads(body) for body in bodies.values()], repeat
+        ),
+        "parse": _best(
+            lambda: [PARSERS[s](data) for s, data in decoded.items()], repeat
+        ),
+        "merge": _best(lambda: merge_events(events), repeat),
+        "update": min(update() for _ in range(repeat)),
+        "filter": _best(
+            lambda: filter_within(HOME[0], HOME[1], RADIUS_KM, merged), repeat
+        ),
+        "aggregate": _best(aggregate, repeat),
+    }
+    timings["total"] = sum(timings.values())
+
+    return {
+        "size": size,
+        "overlap": overlap,
+        "bytes": sum(len(body) for body in bodies.values()),
+        "raw_events": len(events),
+        "merged_events": len(merged),
+        "filtered_events": len(kept),
+        "seconds": {stage: round(value, 6) for stage, value in timings.items()},
+    }
+
+
+def _revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print(results: List[Dict[str, object]], baseline: Dict[int, dict]) -> None:
+    stages = list(results[0]["seconds"])
+    width = 18 if baseline else 12
+    print("size".rjust(8) + "".join(stage.rjust(width) for stage in stages))
+    for result in results:
+        row = str(result["size"]).rjust(8)
+        base = baseline.get(result["size"])
+        for stage in stages:
+            value = result["seconds"][stage] * 1000
+            cell = f"{value:.2f}ms"
+            if base and base["seconds"].get(stage):
+                cell += f" {value / (base['seconds'][stage] * 1000):.2f}x"
+            row += cell.rjust(width)
+        print(row)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--overlap", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--compare", type=Path, help="baseline results file")
+    args = parser.parse_args()
+
+    results = [
+        run_size(int(size), args.overlap, args.repeat, args.seed)
+        for size in args.sizes.split(",")
+    ]
+
+    baseline = {}
+    if args.compare:
+        baseline = {
+            result["size"]: result
+            for result in json.loads(args.compare.read_text())["results"]
+        }
+    _print(results, baseline)
+
+    if args.json:
+        args.json.write_text(
+            json.dumps(
+                {
+                    "revision": _revision(),
+                    "python": sys.version.split()[0],
+                    "machine": platform.machine(),
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
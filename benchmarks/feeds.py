@@ -0,0 +1,181 @@
+"""Synthetic USGS / EMSC / GEOFON feeds for benchmarks and replay.
+
+    python -m benchmarks.feeds --out feeds/ --size 5000 --overlap 0.6
+    python -m benchmarks.feeds --out feeds/ --record
+
+The first form writes synthetic feeds; --record saves the live provider
+feeds instead so they can be replayed offline later.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict
+
+FEED_FILES = {"usgs": "usgs.json", "emsc": "emsc.json", "geofon": "geofon.json"}
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def generate_feeds(
+    size: int,
+    overlap: float = 0.5,
+    window: float = 24 * 3600,
+    seed: int = 0,
+    now: float | None = None,
+) -> Dict[str, Any]:
+    """Return feeds with `size` distinct events spread over `window` seconds.
+
+    Every event is reported by one provider; with probability `overlap` it is
+    also reported by each other provider, jittered inside the merge window.
+    """
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+    usgs, emsc, geofon = [], [], []
+
+    for i in range(size):
+        ts = now - rng.uniform(0, window)
+        lat = rng.uniform(-60, 70)
+        lon = rng.uniform(-180, 180)
+        depth = rng.uniform(0, 300)
+        mag = round(rng.uniform(1.0, 7.5), 1)
+        first = rng.randrange(3)
+
+        for provider in range(3):
+            if provider != first and rng.random() >= overlap:
+                continue
+            if provider != first:
+                p_ts = ts + rng.uniform(-20, 20)
+                p_lat = lat + rng.uniform(-0.03, 0.03)
+                p_lon = lon + rng.uniform(-0.03, 0.03)
+                p_mag = round(mag + rng.uniform(-0.2, 0.2), 1)
+            else:
+                p_ts, p_lat, p_lon, p_mag = ts, lat, lon, mag
+
+            if provider == 0:
+                usgs.append(
+                    {
+                        "type": "Feature",
+                        "id": f"us{i:08d}",
+                        "properties": {
+                            "time": int(p_ts * 1000),
+                            "updated": int(p_ts * 1000),
+                            "mag": p_mag,
+                            "place": f"{rng.randrange(1, 90)} km N of Place {i}",
+                            "type": "earthquake",
+                        },
+                        "geometry": {
+                            "type": "Point",
+                            "coordinates": [p_lon, p_lat, depth],
+                        },
+                    }
+                )
+            elif provider == 1:
+                emsc.append(
+                    {
+                        "type": "Feature",
+                        "id": f"2024{i:010d}",
+                        "properties": {
+                            "time": _iso(p_ts),
+                            "lastupdate": _iso(p_ts),
+                            "mag": p_mag,
+                            "magtype": "ml",
+                            "flynn_region": f"REGION {i % 700}",
+                            "lat": p_lat,
+                            "lon": p_lon,
+                            "depth": depth,
+                        },
+                        "geometry": {
+                            "type": "Point",
+                            "coordinates": [p_lon, p_lat, -depth],
+                        },
+                    }
+                )
+            else:
+                geofon.append(
+                    {
+                        "type": "Feature",
+                        "id": f"gfz{i:08d}",
+                        "properties": {
+                            "eventid": f"gfz{i:08d}",
+                            "time": _iso(p_ts),
+                            "mag": p_mag,
+                            "region": f"Region {i % 700}",
+                        },
+                        "geometry": {
+                            "type": "Point",
+                            "coordinates": [p_lon, p_lat, depth],
+                        },
+                    }
+                )
+
+    def collection(features):
+        return {"type": "FeatureCollection", "features": features}
+
+    return {
+        "usgs": collection(usgs),
+        "emsc": collection(emsc),
+        "geofon": collection(geofon),
+    }
+
+
+def write_feeds(feeds: Dict[str, Any], out: Path) -> None:
+    out.mkdir(parents=True, exist_ok=True)
+    for source, name in FEED_FILES.items():
+        (out / name).write_text(json.dumps(feeds[source]))
+
+
+def load_feeds(directory: Path) -> Dict[str, bytes]:
+    return {
+        source: (directory / name).read_bytes()
+        for source, name in FEED_FILES.items()
+        if (directory / name).exists()
+    }
+
+
+async def record_feeds(out: Path) -> None:
+    import aiohttp
+
+    from quakehub.api_emsc import EMSC_URL
+    from quakehub.api_geofon import GEOFON_URL
+    from quakehub.api_usgs import USGS_URL
+
+    urls = {
+        "usgs": (USGS_URL, None),
+        "emsc": (EMSC_URL, {"format": "geojson", "limit": "2000"}),
+        "geofon": (GEOFON_URL, None),
+    }
+    out.mkdir(parents=True, exist_ok=True)
+    async with aiohttp.ClientSession() as session:
+        for source, (url, params) in urls.items():
+            async with session.get(url, params=params) as resp:
+                resp.raise_for_status()
+                (out / FEED_FILES[source]).write_bytes(await resp.read())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--overlap", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", action="store_true")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record_feeds(args.out))
+    else:
+        write_feeds(
+            generate_feeds(args.size, args.overlap, seed=args.seed), args.out
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""End-to-end hub refreshes against a local replay server.
+
+    python -m benchmarks.replay --size 5000 --refreshes 10
+    python -m benchmarks.replay --feeds feeds/ --profile refresh.prof
+
+Feeds (synthetic, or recorded with `benchmarks.feeds --record`) are served
+from a local aiohttp app and the provider URLs are pointed at it, so a real
+QuakeHub refresh can be timed and profiled without network noise.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import cProfile
+import hashlib
+import json
+import logging
+import tempfile
+import time
+import types
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict
+
+from aiohttp import web
+from homeassistant.core import HomeAssistant
+
+import quakehub.api_emsc as api_emsc
+import quakehub.api_geofon as api_geofon
+import quakehub.api_usgs as api_usgs
+from quakehub.coordinator import EarthquakeCoordinator
+from quakehub.hub import async_get_hub
+
+from .feeds import generate_feeds, load_feeds
+
+HOST = "127.0.0.1"
+
+
+class ReplayServer:
+    """Serve one static body per source, honouring If-None-Match."""
+
+    def __init__(self, bodies: Dict[str, bytes], conditional: bool = True) -> None:
+        self.bodies = bodies
+        self.conditional = conditional
+        self.hits = {source: 0 for source in bodies}
+        self._runner: web.AppRunner | None = None
+        self.port = 0
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/{source}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, HOST, 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def url(self, source: str) -> str:
+        return f"http://{HOST}:{self.port}/{source}"
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        source = request.match_info["source"]
+        body = self.bodies.get(source)
+        if body is None:
+            raise web.HTTPNotFound()
+        self.hits[source] += 1
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.conditional and request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        return web.Response(
+            body=body, content_type="application/json", headers={"ETag": etag}
+        )
+
+
+def _entry(index: int, lat: float, lon: float, radius: float, sources) -> object:
+    return types.SimpleNamespace(
+        entry_id=f"bench{index}",
+        data={
+            "latitude": lat,
+            "longitude": lon,
+            "radius": radius,
+            "sources": list(sources),
+            "push": False,
+            "update_interval": 300,
+        },
+        async_on_unload=lambda func: None,
+        async_create_background_task=lambda hass, target, name: (
+            hass.async_create_background_task(target, name)
+        ),
+    )
+
+
+async def run(args: argparse.Namespace) -> Dict[str, object]:
+    if args.feeds:
+        bodies = load_feeds(args.feeds)
+    else:
+        feeds = generate_feeds(args.size, args.overlap, seed=args.seed)
+        bodies = {source: json.dumps(feed).encode() for source, feed in feeds.items()}
+
+    server = ReplayServer(bodies, conditional=not args.no_cache)
+    await server.start()
+    api_usgs.USGS_URL = server.url("usgs")
+    api_emsc.EMSC_URL = server.url("emsc")
+    api_geofon.GEOFON_URL = server.url("geofon")
+
+    hass = HomeAssistant(tempfile.mkdtemp())
+    await hass.async_start()
+    hub = async_get_hub(hass)
+
+    coordinators = []
+    for index in range(args.entries):
+        entry = _entry(index, 48.2 + index, 16.4 + index, args.radius, bodies)
+        coordinator = EarthquakeCoordinator(hass, entry, hub, timedelta(seconds=300))
+        hub.async_register(coordinator)
+        hub.async_add_listener(coordinator.async_handle_hub_update)
+        coordinators.append(coordinator)
+
+    profiler = cProfile.Profile() if args.profile else None
+    timings = []
+    for _ in range(args.refreshes):
+        for source in hub.sources:
+            hub.scheduler[source].next_due = 0
+        if profiler:
+            profiler.enable()
+        start = time.perf_counter()
+        await hub.async_refresh()
+        timings.append(time.perf_counter() - start)
+        if profiler:
+            profiler.disable()
+
+    result = {
+        "entries": args.entries,
+        "bytes": sum(len(body) for body in bodies.values()),
+        "catalog_events": len(hub.data or []),
+        "entry_events": [len(coordinator.data or []) for coordinator in coordinators],
+        "server_hits": server.hits,
+        "cold_seconds": round(timings[0], 6),
+        "warm_seconds": (
+            round(min(timings[1:]), 6) if len(timings) > 1 else None
+        ),
+    }
+
+    await hub.async_shutdown()
+    await hass.async_stop(force=True)
+    await server.stop()
+
+    if profiler:
+        profiler.dump_stats(args.profile)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feeds", type=Path, help="directory of recorded feeds")
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--overlap", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--entries", type=int, default=2)
+    parser.add_argument("--radius", type=float, default=2000)
+    parser.add_argument("--refreshes", type=int, default=5)
+    parser.add_argument(
+        "--no-cache", action="store_true", help="never answer 304 Not Modified"
+    )
+    parser.add_argument("--profile", type=Path, help="write cProfile stats here")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
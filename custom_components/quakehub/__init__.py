@@ -1,39 +1,86 @@
-from __future__ import annotations
-
-import logging
-from datetime import timedelta
-
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.typing import ConfigType
-
-from .const import DOMAIN, PLATFORMS, CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
-from .coordinator import EarthquakeCoordinator
-
-_LOGGER = logging.getLogger(__name__)
-
-
-async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
-    return True
-
-
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    update_interval = timedelta(
-        seconds=entry.data.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
-    )
-
-    coordinator = EarthquakeCoordinator(hass, entry, update_interval)
-    await coordinator.async_config_entry_first_refresh()
-
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = coordinator
-
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    return True
-
-
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
-    return unload_ok
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.typing import ConfigType
+
+from .const import (
+    DATA_HUB,
+    DOMAIN,
+    PLATFORMS,
+    CONF_UPDATE_INTERVAL,
+    DEFAULT_UPDATE_INTERVAL,
+    EXPIRE_INTERVAL,
+)
+from .coordinator import EarthquakeCoordinator
+from .hub import async_get_hub
+from .query import async_setup_services
+from .session import async_close_session
+from .store import AlertStore, EventStore
+
+_LOGGER = logging.getLogger(__name__)
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async_setup_services(hass)
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    update_interval = timedelta(
+        seconds=entry.data.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
+    )
+
+    hub = async_get_hub(hass)
+    coordinator = EarthquakeCoordinator(hass, entry, hub, update_interval)
+    await coordinator.async_load_alerts()
+    hub.async_register(coordinator)
+
+    await hub.async_ensure_data(entry)
+    await coordinator.async_config_entry_first_refresh()
+    entry.async_on_unload(hub.async_add_listener(coordinator.async_handle_hub_update))
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, coordinator.async_expire, timedelta(seconds=EXPIRE_INTERVAL)
+        )
+    )
+
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    return True
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id, None)
+        hub = hass.data.get(DATA_HUB)
+        if hub is not None and coordinator is not None:
+            hub.async_unregister(coordinator)
+        if not hass.data[DOMAIN]:
+            if hub is not None:
+                await hub.async_shutdown()
+                hass.data.pop(DATA_HUB, None)
+            await async_close_session(hass)
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await AlertStore(hass, entry.entry_id).async_remove()
+    # The entry being removed is still listed while this runs
+    others = [
+        e
+        for e in hass.config_entries.async_entries(DOMAIN)
+        if e.entry_id != entry.entry_id
+    ]
+    if not others:
+        await EventStore(hass).async_remove()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .merger import EarthquakeEvent
+
+# (label, lower bound inclusive, upper bound exclusive)
+MagnitudeBand = Tuple[str, float | None, float | None]
+
+
+def _band_index(bands: Sequence[MagnitudeBand], magnitude: float | None) -> int:
+    mag = magnitude or 0
+    for i, (_, low, high) in enumerate(bands):
+        if (low is None or mag >= low) and (high is None or mag < high):
+            return i
+    return -1
+
+
+class RollingWindow:
+    """Count, strongest event and band counts over the last `seconds`.
+
+    Events are kept in a time-ordered list for expiry and in a max-heap on
+    magnitude with lazy deletion, so reads are O(1) amortized.
+    """
+
+    def __init__(self, seconds: float, bands: Sequence[MagnitudeBand]) -> None:
+        self.seconds = seconds
+        self._bands = bands
+        self._events: Dict[str, EarthquakeEvent] = {}
+        self._times: List[Tuple[float, str]] = []
+        self._heap: List[Tuple[float, float, str]] = []
+        self._band_counts = [0] * len(bands)
+
+    @property
+    def count(self) -> int:
+        return len(self._events)
+
+    @property
+    def band_counts(self) -> Dict[str, int]:
+        return {band[0]: n for band, n in zip(self._bands, self._band_counts)}
+
+    @property
+    def strongest(self) -> EarthquakeEvent | None:
+        heap = self._heap
+        while heap:
+            neg_mag, _, event_id = heap[0]
+            event = self._events.get(event_id)
+            if event is not None and -neg_mag == (event.magnitude or 0):
+                return event
+            heapq.heappop(heap)
+        return None
+
+    def add(self, event: EarthquakeEvent, now: float) -> None:
+        self.discard(event.id)
+        if event.timestamp < now - self.seconds:
+            return
+        self._events[event.id] = event
+        insort(self._times, (event.timestamp, event.id))
+        heapq.heappush(
+            self._heap, (-(event.magnitude or 0), -event.timestamp, event.id)
+        )
+        band = _band_index(self._bands, event.magnitude)
+        if band >= 0:
+            self._band_counts[band] += 1
+
+    def discard(self, event_id: str) -> None:
+        event = self._events.pop(event_id, None)
+        if event is None:
+            return
+        i = bisect_left(self._times, (event.timestamp, event_id))
+        if i < len(self._times) and self._times[i][1] == event_id:
+            del self._times[i]
+        band = _band_index(self._bands, event.magnitude)
+        if band >= 0:
+            self._band_counts[band] -= 1
+        # Stale heap entries are skipped on read
+
+    def expire(self, now: float) -> bool:
+        """Drop events that left the window; True if there were any."""
+        cutoff = now - self.seconds
+        i = bisect_left(self._times, (cutoff, ""))
+        for _, event_id in self._times[:i]:
+            event = self._events.pop(event_id)
+            band = _band_index(self._bands, event.magnitude)
+            if band >= 0:
+                self._band_counts[band] -= 1
+        del self._times[:i]
+        if len(self._heap) > 2 * len(self._events) + 64:
+            self._heap = [
+                (-(e.magnitude or 0), -e.timestamp, e.id) for e in self._events.values()
+            ]
+            heapq.heapify(self._heap)
+        return i > 0
+
+
+class EventAggregator:
+    """Keeps a set of rolling windows in step with a catalog snapshot."""
+
+    def __init__(
+        self, windows: Dict[str, float], bands: Sequence[MagnitudeBand]
+    ) -> None:
+        self.windows = {
+            label: RollingWindow(seconds, bands) for label, seconds in windows.items()
+        }
+        self._known: Dict[str, EarthquakeEvent] = {}
+
+    def update(self, events: Iterable[EarthquakeEvent], now: float) -> None:
+        current = {e.id: e for e in events}
+        removed = self._known.keys() - current.keys()
+        changed = [
+            e for eid, e in current.items() if self._known.get(eid) != e
+        ]
+        for window in self.windows.values():
+            for event_id in removed:
+                window.discard(event_id)
+            for event in changed:
+                window.add(event, now)
+            window.expire(now)
+        self._known = current
+
+    def expire(self, now: float) -> bool:
+        """Age events out of every window; True if any window changed."""
+        return any([window.expire(now) for window in self.windows.values()])
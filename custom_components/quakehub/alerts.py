@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import operator
+import re
+from dataclasses import dataclass
+from math import log10, sqrt
+from typing import Callable, Dict, Iterable, List, Mapping, Tuple
+
+from .merger import MERGE_MAX_KM, MERGE_MAX_SECONDS, EarthquakeEvent, haversine_km
+
+FIELD_MAGNITUDE = "magnitude"
+FIELD_DISTANCE = "distance"
+FIELD_DEPTH = "depth"
+FIELD_INTENSITY = "intensity"
+
+_FIELDS = {
+    "magnitude": FIELD_MAGNITUDE,
+    "mag": FIELD_MAGNITUDE,
+    "m": FIELD_MAGNITUDE,
+    "distance": FIELD_DISTANCE,
+    "dist": FIELD_DISTANCE,
+    "depth": FIELD_DEPTH,
+    "intensity": FIELD_INTENSITY,
+    "mmi": FIELD_INTENSITY,
+}
+
+_OPS: Dict[str, Callable[[float, float], bool]] = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+_CONDITION = re.compile(r"^([a-z]+)\s*(>=|<=|>|<)\s*(-?\d+(?:\.\d+)?)$", re.I)
+
+Condition = Tuple[str, str, float]
+# Event id -> (origin time, latitude, longitude) of events already alerted on
+Fired = Dict[str, Tuple[float, float, float]]
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    name: str
+    conditions: Tuple[Condition, ...]
+
+    def matches(self, values: Mapping[str, float | None]) -> bool:
+        for field, op, limit in self.conditions:
+            value = values[field]
+            if value is None or not _OPS[op](value, limit):
+                return False
+        return True
+
+
+def parse_alert_rules(value: str) -> List[AlertRule]:
+    """Parse '[name:] condition, condition ...' rules separated by ';' or newlines.
+
+    A condition compares magnitude, distance (km), depth (km) or intensity
+    (estimated MMI) with >=, <=, > or <; all conditions of a rule must hold.
+    An empty value means no rules. Raises ValueError on a malformed rule.
+    """
+    rules: List[AlertRule] = []
+    for item in re.split(r"[;\n]", value or ""):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, rest = item.partition(":")
+        if not sep:
+            name, rest = "", item
+        conditions = []
+        for part in re.split(r",|\band\b", rest, flags=re.I):
+            part = part.strip()
+            if not part:
+                continue
+            match = _CONDITION.match(part)
+            if match is None or match[1].lower() not in _FIELDS:
+                raise ValueError(f"invalid condition {part!r} in {item!r}")
+            conditions.append((_FIELDS[match[1].lower()], match[2], float(match[3])))
+        if not conditions:
+            raise ValueError(f"rule {item!r} has no conditions")
+        rules.append(AlertRule(name.strip() or rest.strip(), tuple(conditions)))
+    return rules
+
+
+def estimate_intensity(
+    magnitude: float | None, distance_km: float | None, depth_km: float | None
+) -> float | None:
+    """Modified Mercalli intensity expected at an epicentral distance.
+
+    Atkinson & Wald (2007) intensity prediction equation with its California
+    coefficients, on hypocentral distance. A rough guide, not a ShakeMap.
+    """
+    if magnitude is None or distance_km is None:
+        return None
+    distance = sqrt(distance_km**2 + max(depth_km or 0.0, 0.0) ** 2)
+    r = sqrt(distance**2 + 14.0**2)
+    log_r = log10(r)
+    b = max(0.0, log10(r / 50))
+    m = magnitude - 6
+    mmi = (
+        12.27
+        + 2.270 * m
+        + 0.1304 * m**2
+        - 1.30 * log_r
+        - 0.0007070 * r
+        + 1.95 * b
+        - 0.577 * magnitude * log_r
+    )
+    return min(max(mmi, 1.0), 12.0)
+
+
+class AlertPipeline:
+    """Matches new and changed events against alert rules, once per event.
+
+    Only events whose object changed since the last evaluation are checked.
+    An event already alerted on stays deduplicated when it is merged under
+    another source's id, since origin time and location still match.
+    """
+
+    def __init__(self, rules: Iterable[AlertRule], max_age: float) -> None:
+        self.rules = list(rules)
+        self.max_age = max_age
+        self.fired: Fired = {}
+        self._seen: Dict[str, EarthquakeEvent] = {}
+
+    def _already_fired(self, event: EarthquakeEvent) -> bool:
+        if event.id in self.fired:
+            return True
+        for timestamp, lat, lon in self.fired.values():
+            if (
+                abs(event.timestamp - timestamp) <= MERGE_MAX_SECONDS
+                and haversine_km(event.latitude, event.longitude, lat, lon)
+                <= MERGE_MAX_KM
+            ):
+                # Remember the new id too, so the scan runs once per id
+                self.fired[event.id] = (event.timestamp, lat, lon)
+                return True
+        return False
+
+    def prime(self, events: Iterable[EarthquakeEvent], now: float) -> None:
+        """Take newest-first events as already evaluated, without alerting.
+
+        Used for the catalog an entry starts with, which holds what was
+        already known before a restart.
+        """
+        cutoff = now - self.max_age
+        self._seen = {}
+        for e in events:
+            if e.timestamp < cutoff:
+                break
+            self._seen[e.id] = e
+
+    def evaluate(
+        self,
+        events: Iterable[EarthquakeEvent],
+        distances: Mapping[str, float],
+        now: float,
+    ) -> List[Tuple[EarthquakeEvent, AlertRule, float | None]]:
+        """Newly alerting (event, rule, intensity) for newest-first events."""
+        if not self.rules:
+            return []
+        cutoff = now - self.max_age
+        seen = self._seen
+        self._seen = {}
+        alerts = []
+        for e in events:
+            if e.timestamp < cutoff:
+                break
+            self._seen[e.id] = e
+            if seen.get(e.id) is e or self._already_fired(e):
+                continue
+            distance = distances.get(e.id)
+            intensity = estimate_intensity(e.magnitude, distance, e.depth)
+            values = {
+                FIELD_MAGNITUDE: e.magnitude,
+                FIELD_DISTANCE: distance,
+                FIELD_DEPTH: e.depth,
+                FIELD_INTENSITY: intensity,
+            }
+            for rule in self.rules:
+                if rule.matches(values):
+                    self.fired[e.id] = (e.timestamp, e.latitude, e.longitude)
+                    alerts.append((e, rule, intensity))
+                    break
+        self.prune(now)
+        return alerts
+
+    def prune(self, now: float) -> None:
+        cutoff = now - self.max_age - MERGE_MAX_SECONDS
+        self.fired = {k: v for k, v in self.fired.items() if v[0] >= cutoff}
@@ -1,42 +1,36 @@
 from __future__ import annotations
 
 import aiohttp
-import async_timeout
-from datetime import datetime, timezone
+from typing import List
 
-EMSC_URL = "https://www.seismicportal.eu/fdsnws/event/1/query?format=geojson&limit=200"
+from .api_fdsn import fetch_fdsn
+from .const import SOURCE_EMSC
+from .fdsn import FdsnQuery
+from .feed import FeedCache, FetchStats, parse_geojson
+from .merger import EarthquakeEvent
 
+EMSC_URL = "https://www.seismicportal.eu/fdsnws/event/1/query"
 
-async def fetch_emsc(session: aiohttp.ClientSession):
-    async with async_timeout.timeout(10):
-        async with session.get(EMSC_URL) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
 
-    events = []
-    for feature in data.get("features", []):
-        props = feature.get("properties", {})
-        geom = feature.get("geometry", {})
-        coords = geom.get("coordinates", [None, None, None])
+async def fetch_emsc(
+    session: aiohttp.ClientSession,
+    timeout: float = 10,
+    cache: FeedCache | None = None,
+    query: FdsnQuery | None = None,
+    keep_raw: bool = False,
+    stats: FetchStats | None = None,
+):
+    return await fetch_fdsn(
+        session,
+        timeout,
+        cache,
+        query,
+        keep_raw,
+        stats,
+        url=EMSC_URL,
+        source=SOURCE_EMSC,
+    )
 
-        time_val = props.get("time")
-        if isinstance(time_val, (int, float)):
-            dt = datetime.fromtimestamp(time_val / 1000, tz=timezone.utc)
-        else:
-            dt = datetime.now(timezone.utc)
 
-        events.append(
-            {
-                "id": f"emsc_{props.get('eventid') or feature.get('id')}",
-                "source": "emsc",
-                "time": dt,
-                "latitude": coords[1],
-                "longitude": coords[0],
-                "depth": coords[2],
-                "magnitude": props.get("mag"),
-                "place": props.get("flynn_region") or props.get("region"),
-                "felt_reports": props.get("felt"),
-                "raw": feature,
-            }
-        )
-    return events
+def parse_emsc(data, keep_raw: bool = False) -> List[EarthquakeEvent]:
+    return parse_geojson(data, SOURCE_EMSC, keep_raw)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+from functools import partial
+from typing import Iterable, List
+
+import aiohttp
+
+from .fdsn import FDSN_FORMAT_TEXT, FdsnQuery
+from .feed import FeedCache, FetchStats, async_fetch_feed, parse_geojson, text_lines
+from .merger import EarthquakeEvent, intern_text, parse_iso_timestamp
+
+# Columns of the FDSN event text format; nodes may append more after these
+TEXT_COLUMNS = (
+    "eventid",
+    "time",
+    "latitude",
+    "longitude",
+    "depth/km",
+    "author",
+    "catalog",
+    "contributor",
+    "contributorid",
+    "magtype",
+    "magnitude",
+    "magauthor",
+    "eventlocationname",
+)
+
+
+async def fetch_fdsn(
+    session: aiohttp.ClientSession,
+    timeout: float = 10,
+    cache: FeedCache | None = None,
+    query: FdsnQuery | None = None,
+    keep_raw: bool = False,
+    stats: FetchStats | None = None,
+    *,
+    url: str,
+    source: str,
+) -> List[EarthquakeEvent]:
+    """Query an FDSN event service, in its text or GeoJSON format."""
+    if query is None:
+        query = FdsnQuery()
+    if query.format == FDSN_FORMAT_TEXT:
+        parse = partial(parse_fdsn_text, source=source, keep_raw=keep_raw)
+        decode = text_lines
+    else:
+        parse = partial(parse_geojson, source=source, keep_raw=keep_raw)
+        decode = None
+
+    now = datetime.now(timezone.utc)
+    try:
+        events = await async_fetch_feed(
+            session, url, parse, timeout, cache, query.params(now), stats, decode
+        )
+    except BaseException:
+        query.reset()
+        raise
+    return query.update(events, now)
+
+
+def _float(value: str) -> float | None:
+    value = value.strip()
+    return float(value) if value else None
+
+
+def parse_fdsn_text(
+    lines: Iterable[str], source: str, keep_raw: bool = False
+) -> List[EarthquakeEvent]:
+    """Events of an FDSN `format=text` response, one '|'-separated line each.
+
+    Columns are located by the '#' header line when there is one. Lines that
+    do not parse are skipped.
+    """
+    columns = TEXT_COLUMNS
+    i_id, i_time, i_lat, i_lon, i_depth = 0, 1, 2, 3, 4
+    i_mag, i_place = 10, 12
+    events = []
+    now = time.time()
+    for line in lines:
+        if not line.strip():
+            continue
+        if line[0] == "#":
+            columns = tuple(c.strip().lower() for c in line[1:].split("|"))
+            index = {name: i for i, name in enumerate(columns)}
+            try:
+                i_id, i_time = index["eventid"], index["time"]
+                i_lat, i_lon = index["latitude"], index["longitude"]
+            except KeyError:
+                return events
+            i_depth = index.get("depth/km", -1)
+            i_mag = index.get("magnitude", -1)
+            i_place = index.get("eventlocationname", -1)
+            continue
+
+        fields = line.split("|")
+        try:
+            event_id = fields[i_id].strip()
+            latitude = float(fields[i_lat])
+            longitude = float(fields[i_lon])
+            depth = _float(fields[i_depth]) if 0 <= i_depth < len(fields) else None
+            mag = _float(fields[i_mag]) if 0 <= i_mag < len(fields) else None
+        except (IndexError, ValueError):
+            continue
+        if not event_id:
+            continue
+        place = fields[i_place].strip() if 0 <= i_place < len(fields) else ""
+        timestamp = parse_iso_timestamp(fields[i_time].strip())
+
+        events.append(
+            EarthquakeEvent(
+                id=f"{source}_{event_id}",
+                source=source,
+                timestamp=now if timestamp is None else timestamp,
+                latitude=latitude,
+                longitude=longitude,
+                depth=depth,
+                magnitude=mag,
+                place=intern_text(place or None),
+                raw=dict(zip(columns, fields)) if keep_raw else None,
+            )
+        )
+    return events
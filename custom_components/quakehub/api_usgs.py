@@ -1,35 +1,28 @@
 from __future__ import annotations
 
 import aiohttp
-import async_timeout
-from datetime import datetime, timezone
+from functools import partial
+from typing import List
+
+from .const import SOURCE_USGS
+from .feed import FeedCache, FetchStats, async_fetch_feed, parse_geojson
+from .merger import EarthquakeEvent
 
 USGS_URL = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_hour.geojson"
 
 
-async def fetch_usgs(session: aiohttp.ClientSession):
-    async with async_timeout.timeout(10):
-        async with session.get(USGS_URL) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
+async def fetch_usgs(
+    session: aiohttp.ClientSession,
+    timeout: float = 10,
+    cache: FeedCache | None = None,
+    keep_raw: bool = False,
+    stats: FetchStats | None = None,
+):
+    parse = partial(parse_usgs, keep_raw=keep_raw)
+    return await async_fetch_feed(
+        session, USGS_URL, parse, timeout, cache, stats=stats
+    )
 
-    events = []
-    for feature in data.get("features", []):
-        props = feature.get("properties", {})
-        geom = feature.get("geometry", {})
-        coords = geom.get("coordinates", [None, None, None])
 
-        events.append(
-            {
-                "id": f"usgs_{feature.get('id')}",
-                "source": "usgs",
-                "time": datetime.fromtimestamp(props.get("time", 0) / 1000, tz=timezone.utc),
-                "latitude": coords[1],
-                "longitude": coords[0],
-                "depth": coords[2],
-                "magnitude": props.get("mag"),
-                "place": props.get("place"),
-                "raw": feature,
-            }
-        )
-    return events
+def parse_usgs(data, keep_raw: bool = False) -> List[EarthquakeEvent]:
+    return parse_geojson(data, SOURCE_USGS, keep_raw)
@@ -11,17 +11,40 @@ from .const import (
     CONF_RADIUS,
     CONF_REGION_MODE,
     CONF_REGION,
+    CONF_WATCHLIST,
     CONF_SOURCES,
     CONF_UPDATE_INTERVAL,
+    CONF_KEEP_RAW,
+    CONF_PUSH,
+    CONF_BOOST_MAGNITUDE,
+    CONF_BOOST_DURATION,
+    CONF_RETENTION,
+    CONF_MAX_AGE,
+    CONF_MAX_EVENTS,
+    CONF_MEMORY_BUDGET,
+    CONF_KEEP_MAGNITUDE,
+    CONF_ALERT_RULES,
+    DEFAULT_PUSH,
+    DEFAULT_BOOST_MAGNITUDE,
+    DEFAULT_BOOST_DURATION,
     DEFAULT_RADIUS,
     DEFAULT_SOURCES,
     DEFAULT_UPDATE_INTERVAL,
+    DEFAULT_RETENTION,
+    DEFAULT_MAX_AGE,
+    DEFAULT_MAX_EVENTS,
+    DEFAULT_MEMORY_BUDGET,
+    DEFAULT_KEEP_MAGNITUDE,
+    RETENTION_OLDEST,
+    RETENTION_WEAKEST,
     REGION_MODE_RADIUS,
     REGION_MODE_REGION,
-    SOURCE_USGS,
-    SOURCE_EMSC,
-    SOURCE_GEOFON,
+    REGION_MODE_WATCHLIST,
 )
+from .alerts import parse_alert_rules
+from .region import parse_region
+from .sources import SOURCES
+from .watchlist import parse_watchlist
 
 
 def _get_default_location(hass):
@@ -32,11 +55,27 @@ class QuakeHubConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
     async def async_step_user(self, user_input=None) -> FlowResult:
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(
-                title=user_input.get(CONF_NAME, "QuakeHub"),
-                data=user_input,
-            )
+            if user_input.get(CONF_REGION_MODE) == REGION_MODE_REGION:
+                try:
+                    parse_region(user_input.get(CONF_REGION, ""))
+                except ValueError:
+                    errors[CONF_REGION] = "invalid_region"
+            if user_input.get(CONF_REGION_MODE) == REGION_MODE_WATCHLIST:
+                try:
+                    parse_watchlist(user_input.get(CONF_WATCHLIST, ""))
+                except ValueError:
+                    errors[CONF_WATCHLIST] = "invalid_watchlist"
+            try:
+                parse_alert_rules(user_input.get(CONF_ALERT_RULES, ""))
+            except ValueError:
+                errors[CONF_ALERT_RULES] = "invalid_alert_rules"
+            if not errors:
+                return self.async_create_entry(
+                    title=user_input.get(CONF_NAME, "QuakeHub"),
+                    data=user_input,
+                )
 
         lat, lon = _get_default_location(self.hass)
 
@@ -46,17 +85,42 @@ class QuakeHubConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required(CONF_LATITUDE, default=lat): float,
                 vol.Required(CONF_LONGITUDE, default=lon): float,
                 vol.Required(CONF_REGION_MODE, default=REGION_MODE_RADIUS): vol.In(
-                    [REGION_MODE_RADIUS, REGION_MODE_REGION]
+                    [REGION_MODE_RADIUS, REGION_MODE_REGION, REGION_MODE_WATCHLIST]
                 ),
                 vol.Optional(CONF_RADIUS, default=DEFAULT_RADIUS): int,
                 vol.Optional(CONF_REGION, default=""): str,
+                vol.Optional(CONF_WATCHLIST, default=""): str,
                 vol.Optional(CONF_SOURCES, default=DEFAULT_SOURCES): vol.All(
-                    [vol.In([SOURCE_USGS, SOURCE_EMSC, SOURCE_GEOFON])]
+                    [vol.In(list(SOURCES))]
                 ),
                 vol.Optional(
                     CONF_UPDATE_INTERVAL, default=DEFAULT_UPDATE_INTERVAL
                 ): int,
+                vol.Optional(
+                    CONF_BOOST_MAGNITUDE, default=DEFAULT_BOOST_MAGNITUDE
+                ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_BOOST_DURATION, default=DEFAULT_BOOST_DURATION
+                ): int,
+                vol.Optional(CONF_PUSH, default=DEFAULT_PUSH): bool,
+                vol.Optional(CONF_RETENTION, default=DEFAULT_RETENTION): vol.In(
+                    [RETENTION_OLDEST, RETENTION_WEAKEST]
+                ),
+                vol.Optional(CONF_MAX_AGE, default=DEFAULT_MAX_AGE): vol.All(
+                    int, vol.Range(min=1)
+                ),
+                vol.Optional(CONF_MAX_EVENTS, default=DEFAULT_MAX_EVENTS): vol.All(
+                    int, vol.Range(min=100)
+                ),
+                vol.Optional(
+                    CONF_MEMORY_BUDGET, default=DEFAULT_MEMORY_BUDGET
+                ): vol.All(int, vol.Range(min=1)),
+                vol.Optional(
+                    CONF_KEEP_MAGNITUDE, default=DEFAULT_KEEP_MAGNITUDE
+                ): vol.Coerce(float),
+                vol.Optional(CONF_ALERT_RULES, default=""): str,
+                vol.Optional(CONF_KEEP_RAW, default=False): bool,
             }
         )
 
-        return self.async_show_form(step_id="user", data_schema=schema)
+        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
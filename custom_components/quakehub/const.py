@@ -1,22 +1,139 @@
-DOMAIN = "quakehub"
-
-CONF_RADIUS = "radius"
-CONF_LATITUDE = "latitude"
-CONF_LONGITUDE = "longitude"
-CONF_REGION_MODE = "region_mode"
-CONF_REGION = "region"
-CONF_SOURCES = "sources"
-CONF_UPDATE_INTERVAL = "update_interval"
-
-SOURCE_USGS = "usgs"
-SOURCE_EMSC = "emsc"
-SOURCE_GEOFON = "geofon"
-
-DEFAULT_RADIUS = 300
-DEFAULT_UPDATE_INTERVAL = 300  # seconds
-DEFAULT_SOURCES = [SOURCE_USGS, SOURCE_EMSC, SOURCE_GEOFON]
-
-REGION_MODE_RADIUS = "radius"
-REGION_MODE_REGION = "region"
-
-PLATFORMS = ["geo_location", "sensor"]
+DOMAIN = "quakehub"
+DATA_SESSION = f"{DOMAIN}_session"
+DATA_SESSION_UNSUB = f"{DOMAIN}_session_unsub"
+DATA_HUB = f"{DOMAIN}_hub"
+
+CONF_RADIUS = "radius"
+CONF_LATITUDE = "latitude"
+CONF_LONGITUDE = "longitude"
+CONF_REGION_MODE = "region_mode"
+CONF_REGION = "region"
+CONF_WATCHLIST = "watchlist"
+CONF_SOURCES = "sources"
+CONF_UPDATE_INTERVAL = "update_interval"
+CONF_KEEP_RAW = "keep_raw"
+CONF_PUSH = "push"
+CONF_BOOST_MAGNITUDE = "boost_magnitude"
+CONF_BOOST_DURATION = "boost_duration"
+CONF_RETENTION = "retention"
+CONF_MAX_AGE = "max_age"
+CONF_MAX_EVENTS = "max_events"
+CONF_MEMORY_BUDGET = "memory_budget"
+CONF_KEEP_MAGNITUDE = "keep_magnitude"
+CONF_ALERT_RULES = "alert_rules"
+
+SOURCE_USGS = "usgs"
+SOURCE_EMSC = "emsc"
+SOURCE_GEOFON = "geofon"
+SOURCE_INGV = "ingv"
+SOURCE_IRIS = "iris"
+
+DEFAULT_RADIUS = 300
+DEFAULT_UPDATE_INTERVAL = 300  # seconds
+DEFAULT_SOURCES = [SOURCE_USGS, SOURCE_EMSC, SOURCE_GEOFON]
+
+# Per-source fetch budget and overall refresh deadline, in seconds. A source
+# that runs over its budget fails on its own; the deadline, which no budget
+# exceeds, bounds the refresh. USGS serves static feed files from a CDN, the
+# FDSN nodes run a query per request and IRIS is the slowest of them.
+SOURCE_TIMEOUTS = {
+    SOURCE_USGS: 5,
+    SOURCE_EMSC: 8,
+    SOURCE_GEOFON: 8,
+    SOURCE_INGV: 8,
+    SOURCE_IRIS: 10,
+}
+REFRESH_DEADLINE = 10
+
+# Adaptive per-source polling
+DEFAULT_BOOST_MAGNITUDE = 4.5
+DEFAULT_BOOST_DURATION = 3600  # seconds
+BOOST_INTERVAL = 60  # seconds
+MIN_POLL_INTERVAL = 15  # seconds
+UNCHANGED_BACKOFF = 1.5
+UNCHANGED_MAX_FACTOR = 4
+ERROR_MAX_INTERVAL = 3600  # seconds
+
+# Per-source circuit breaker
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_OPEN_BASE = 60  # seconds
+BREAKER_OPEN_MAX = 1800  # seconds
+
+# Rolling windows for the aggregate sensors, in seconds
+AGGREGATE_WINDOWS = {
+    "1h": 3600,
+    "24h": 24 * 3600,
+    "7d": 7 * 24 * 3600,
+    "30d": 30 * 24 * 3600,
+}
+
+# (label, lower bound inclusive, upper bound exclusive)
+MAGNITUDE_BANDS = [
+    ("M<3", None, 3.0),
+    ("M3-5", 3.0, 5.0),
+    ("M5-7", 5.0, 7.0),
+    ("M7+", 7.0, None),
+]
+# Events age out of the windows at least this often, even with no refresh
+EXPIRE_INTERVAL = 60  # seconds
+BAND_SENSOR_WINDOW = "24h"
+# Window for the sensors of each watchlist point
+POINT_SENSOR_WINDOW = "24h"
+
+# Events older than this are dropped from the catalog and the store
+HISTORY_WINDOW = max(AGGREGATE_WINDOWS.values())
+
+# Catalog retention, combined across entries by keeping the most any asks for
+RETENTION_OLDEST = "oldest"
+RETENTION_WEAKEST = "weakest"
+DEFAULT_RETENTION = RETENTION_OLDEST
+DEFAULT_MAX_AGE = HISTORY_WINDOW // 86400  # days
+DEFAULT_MAX_EVENTS = 50000
+DEFAULT_MEMORY_BUDGET = 64  # MiB
+DEFAULT_KEEP_MAGNITUDE = 6.0
+# Weakest-first eviction ranks an event this many magnitude units lower for
+# every tenfold increase of its distance outside the nearest entry area
+RETENTION_DISTANCE_WEIGHT = 1.5
+
+# Geo entities are only kept for recent events
+GEO_ENTITY_MAX_AGE = 24 * 3600  # seconds
+
+STORE_VERSION = 1
+STORE_SAVE_DELAY = 30  # seconds
+
+# Alert pipeline: one bus event per matching event and entry
+EVENT_ALERT = f"{DOMAIN}_alert"
+# Only events this recent can alert
+ALERT_MAX_AGE = 3 * 3600  # seconds
+# Short, so that a restart right after an alert does not repeat it
+ALERT_SAVE_DELAY = 1  # seconds
+
+# EMSC WebSocket push feed
+DEFAULT_PUSH = True
+STREAM_HEARTBEAT = 30  # seconds
+STREAM_BACKOFF_MIN = 1  # seconds
+STREAM_BACKOFF_MAX = 300  # seconds
+
+# Shared HTTP connection pool
+HTTP_LIMIT = 20
+HTTP_LIMIT_PER_HOST = 4
+HTTP_DNS_CACHE_TTL = 300  # seconds
+HTTP_KEEPALIVE_TIMEOUT = 60  # seconds
+
+# Feeds at least this large are decoded and parsed in the executor
+PARSE_EXECUTOR_BYTES = 32 * 1024
+
+# Refresh instrumentation, kept per measurement for diagnostics
+METRICS_SAMPLES = 100
+METRICS_PERCENTILES = (50, 90, 99)
+
+# quakehub.query service
+SERVICE_QUERY = "query"
+QUERY_DEFAULT_LIMIT = 50
+QUERY_MAX_LIMIT = 1000
+
+REGION_MODE_RADIUS = "radius"
+REGION_MODE_REGION = "region"
+REGION_MODE_WATCHLIST = "watchlist"
+
+PLATFORMS = ["geo_location", "sensor"]
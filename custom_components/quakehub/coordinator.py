@@ -1,85 +1,311 @@
-from __future__ import annotations
-
-import logging
-from datetime import timedelta
-
-import aiohttp
-from homeassistant.core import HomeAssistant
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-
-from .const import (
-    DOMAIN,
-    CONF_LATITUDE,
-    CONF_LONGITUDE,
-    CONF_RADIUS,
-    CONF_REGION_MODE,
-    REGION_MODE_RADIUS,
-    CONF_SOURCES,
-    SOURCE_USGS,
-    SOURCE_EMSC,
-    SOURCE_GEOFON,
-)
-from .api_usgs import fetch_usgs
-from .api_emsc import fetch_emsc
-from .api_geofon import fetch_geofon
-from .merger import normalize_events, merge_events, haversine_km
-
-_LOGGER = logging.getLogger(__name__)
-
-
-class EarthquakeCoordinator(DataUpdateCoordinator):
-    def __init__(
-        self,
-        hass: HomeAssistant,
-        entry: ConfigEntry,
-        update_interval: timedelta,
-    ) -> None:
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=f"{DOMAIN}_coordinator",
-            update_interval=update_interval,
-        )
-        self.entry = entry
-        self.lat = entry.data[CONF_LATITUDE]
-        self.lon = entry.data[CONF_LONGITUDE]
-        self.radius = entry.data.get(CONF_RADIUS)
-        self.region_mode = entry.data.get(CONF_REGION_MODE, REGION_MODE_RADIUS)
-        self.sources = entry.data.get(CONF_SOURCES, [])
-
-    async def _async_update_data(self):
-        async with aiohttp.ClientSession() as session:
-            raw_events = []
-
-            if SOURCE_USGS in self.sources:
-                try:
-                    raw_events.extend(await fetch_usgs(session))
-                except Exception as err:
-                    _LOGGER.warning("USGS fetch failed: %s", err)
-
-            if SOURCE_EMSC in self.sources:
-                try:
-                    raw_events.extend(await fetch_emsc(session))
-                except Exception as err:
-                    _LOGGER.warning("EMSC fetch failed: %s", err)
-
-            if SOURCE_GEOFON in self.sources:
-                try:
-                    raw_events.extend(await fetch_geofon(session))
-                except Exception as err:
-                    _LOGGER.warning("GEOFON fetch failed: %s", err)
-
-        events = normalize_events(raw_events)
-        events = merge_events(events)
-
-        if self.region_mode == REGION_MODE_RADIUS and self.radius:
-            events = [
-                e
-                for e in events
-                if haversine_km(self.lat, self.lon, e.latitude, e.longitude)
-                <= self.radius
-            ]
-
-        events.sort(key=lambda e: e.time, reverse=True)
-        return events
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import (
+    DOMAIN,
+    CONF_LATITUDE,
+    CONF_LONGITUDE,
+    CONF_RADIUS,
+    CONF_REGION_MODE,
+    CONF_REGION,
+    REGION_MODE_RADIUS,
+    REGION_MODE_REGION,
+    REGION_MODE_WATCHLIST,
+    CONF_WATCHLIST,
+    POINT_SENSOR_WINDOW,
+    CONF_SOURCES,
+    CONF_KEEP_RAW,
+    CONF_PUSH,
+    CONF_BOOST_MAGNITUDE,
+    CONF_BOOST_DURATION,
+    DEFAULT_PUSH,
+    DEFAULT_BOOST_MAGNITUDE,
+    DEFAULT_BOOST_DURATION,
+    CONF_RETENTION,
+    CONF_MAX_AGE,
+    CONF_MAX_EVENTS,
+    CONF_MEMORY_BUDGET,
+    CONF_KEEP_MAGNITUDE,
+    DEFAULT_RETENTION,
+    DEFAULT_MAX_AGE,
+    DEFAULT_MAX_EVENTS,
+    DEFAULT_MEMORY_BUDGET,
+    DEFAULT_KEEP_MAGNITUDE,
+    CONF_ALERT_RULES,
+    ALERT_MAX_AGE,
+    EVENT_ALERT,
+    GEO_ENTITY_MAX_AGE,
+    SOURCE_EMSC,
+    AGGREGATE_WINDOWS,
+    MAGNITUDE_BANDS,
+)
+from .aggregates import EventAggregator
+from .alerts import AlertPipeline, AlertRule, parse_alert_rules
+from .geo import covering_circle, distances_km, filter_within, within_points
+from .hub import QuakeHub
+from .merger import EarthquakeEvent
+from .metrics import RollingStat
+from .query import IndexCache
+from .retention import RetentionPolicy
+from .store import AlertStore
+from .region import NamedRegion, PolygonRegion, parse_region
+from .watchlist import WatchPoint, parse_watchlist
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EarthquakeCoordinator(DataUpdateCoordinator):
+    """Per-entry view of the hub catalog, filtered to the entry's area."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        hub: QuakeHub,
+        update_interval: timedelta,
+    ) -> None:
+        # The hub drives refreshes; this coordinator never polls on its own
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_coordinator",
+            update_interval=None,
+        )
+        self.entry = entry
+        self.hub = hub
+        self.requested_interval = update_interval
+        self.lat = entry.data[CONF_LATITUDE]
+        self.lon = entry.data[CONF_LONGITUDE]
+        self.radius = entry.data.get(CONF_RADIUS)
+        self.region_mode = entry.data.get(CONF_REGION_MODE, REGION_MODE_RADIUS)
+        self.region: PolygonRegion | NamedRegion | None = None
+        if self.region_mode == REGION_MODE_REGION:
+            try:
+                self.region = parse_region(entry.data.get(CONF_REGION, ""))
+            except ValueError as err:
+                _LOGGER.error("Ignoring invalid region, showing all events: %s", err)
+        self.points: list[WatchPoint] = []
+        if self.region_mode == REGION_MODE_WATCHLIST:
+            try:
+                self.points = parse_watchlist(entry.data.get(CONF_WATCHLIST, ""))
+            except ValueError as err:
+                _LOGGER.error("Ignoring invalid watchlist, showing all events: %s", err)
+        # Events, distances and aggregates per watchlist point name
+        self.point_events: dict[str, list[EarthquakeEvent]] = {}
+        self.point_distances: dict[str, dict[str, float]] = {}
+        self.point_aggregates = {
+            point.name: EventAggregator(
+                {POINT_SENSOR_WINDOW: AGGREGATE_WINDOWS[POINT_SENSOR_WINDOW]},
+                MAGNITUDE_BANDS,
+            )
+            for point in self.points
+        }
+        # When listeners last saw the data, for the map entity age cutoff
+        self._notified_at = time.time()
+        self.sources = set(entry.data.get(CONF_SOURCES, []))
+        # Provider payloads are only retained for debugging
+        self.keep_raw = entry.data.get(CONF_KEEP_RAW, False)
+        self.push = SOURCE_EMSC in self.sources and entry.data.get(
+            CONF_PUSH, DEFAULT_PUSH
+        )
+        # A significant new event in the area makes the hub poll faster
+        self.boost_magnitude = entry.data.get(
+            CONF_BOOST_MAGNITUDE, DEFAULT_BOOST_MAGNITUDE
+        )
+        self.boost_duration = entry.data.get(
+            CONF_BOOST_DURATION, DEFAULT_BOOST_DURATION
+        )
+        # What this entry needs the shared catalog to keep
+        budget = entry.data.get(CONF_MEMORY_BUDGET, DEFAULT_MEMORY_BUDGET)
+        self.retention = RetentionPolicy(
+            max_age=entry.data.get(CONF_MAX_AGE, DEFAULT_MAX_AGE) * 86400,
+            max_events=entry.data.get(CONF_MAX_EVENTS, DEFAULT_MAX_EVENTS),
+            max_bytes=budget * 1024 * 1024,
+            evict=entry.data.get(CONF_RETENTION, DEFAULT_RETENTION),
+            keep_magnitude=entry.data.get(
+                CONF_KEEP_MAGNITUDE, DEFAULT_KEEP_MAGNITUDE
+            ),
+        )
+        # Distance from the entry location per event id, for entities to read
+        self.distances: dict[str, float] = {}
+        self.aggregates = EventAggregator(AGGREGATE_WINDOWS, MAGNITUDE_BANDS)
+        # Events dropped by the radius filter per update
+        self.radius_filtered = RollingStat()
+        self.event_index = IndexCache()
+        # Entity state writes made and skipped as unchanged
+        self.state_writes = {"written": 0, "skipped": 0}
+        rules: list[AlertRule] = []
+        try:
+            rules = parse_alert_rules(entry.data.get(CONF_ALERT_RULES, ""))
+        except ValueError as err:
+            _LOGGER.error("Ignoring invalid alert rules: %s", err)
+        self.alerts = AlertPipeline(rules, ALERT_MAX_AGE)
+        self._alert_store = AlertStore(hass, entry.entry_id)
+        # From the hub applying a feed to the alert being fired
+        self.alert_latency = RollingStat()
+
+    @property
+    def area(self) -> tuple[float, float, float] | None:
+        if self.region is not None:
+            return self.region.bounding_circle
+        if self.points:
+            return covering_circle([point.circle for point in self.points])
+        if self.region_mode == REGION_MODE_RADIUS and self.radius:
+            return self.lat, self.lon, self.radius
+        return None
+
+    async def async_load_alerts(self) -> None:
+        """Restore which events were alerted on before a restart."""
+        self.alerts.fired = await self._alert_store.async_load()
+
+    @callback
+    def async_expire(self, now: datetime | None = None) -> None:
+        """Age events out of the rolling windows while the catalog is quiet.
+
+        The hub only notifies entries when the catalog changes, so this runs
+        on a timer of its own. Listeners are also notified once an event
+        passes the map entity age limit, so the map drops it in time.
+        """
+        ts = time.time()
+        expired = self.aggregates.expire(ts)
+        for aggregates in self.point_aggregates.values():
+            expired |= aggregates.expire(ts)
+        if not expired:
+            since = self._notified_at - GEO_ENTITY_MAX_AGE
+            cutoff = ts - GEO_ENTITY_MAX_AGE
+            expired = any(since <= e.timestamp < cutoff for e in self.data or [])
+        if expired:
+            self.async_update_listeners()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        self._notified_at = time.time()
+        super().async_update_listeners()
+
+    @callback
+    def async_handle_hub_update(self) -> None:
+        self.async_set_updated_data(self._filter(self.hub.data or []))
+
+    async def _async_update_data(self) -> list[EarthquakeEvent]:
+        return self._filter(self.hub.data or [])
+
+    def _filter(self, events: list[EarthquakeEvent]) -> list[EarthquakeEvent]:
+        # Other entries may enable sources this one did not ask for
+        events = [e for e in events if self._wants(e)]
+
+        if self.points:
+            total = len(events)
+            events, dists = self._filter_points(events)
+            self.radius_filtered.add(total - len(events))
+        elif self.region is not None:
+            events = self.region.filter(events, self.hub.member_places)
+            dists = distances_km(self.lat, self.lon, events)
+        elif self.area is not None:
+            total = len(events)
+            events, dists = filter_within(self.lat, self.lon, self.radius, events)
+            self.radius_filtered.add(total - len(events))
+        else:
+            dists = distances_km(self.lat, self.lon, events)
+        self.distances = {e.id: d for e, d in zip(events, dists)}
+        self.aggregates.update(events, time.time())
+        self._check_alerts(events)
+        self._check_boost(events)
+        return events
+
+    def _filter_points(
+        self, events: list[EarthquakeEvent]
+    ) -> tuple[list[EarthquakeEvent], list[float]]:
+        """Split events over the watchlist points in a single pass.
+
+        Returns the events within any point with their distance to the
+        nearest one.
+        """
+        rows = within_points([point.circle for point in self.points], events)
+        nearest: dict[int, float] = {}
+        now = time.time()
+        for point, (idx, dists) in zip(self.points, rows):
+            point_events = [events[i] for i in idx]
+            self.point_events[point.name] = point_events
+            self.point_distances[point.name] = {
+                e.id: d for e, d in zip(point_events, dists)
+            }
+            self.point_aggregates[point.name].update(point_events, now)
+            for i, d in zip(idx, dists):
+                if i not in nearest or d < nearest[i]:
+                    nearest[i] = d
+        order = sorted(nearest)
+        return [events[i] for i in order], [nearest[i] for i in order]
+
+    def _check_alerts(self, events: list[EarthquakeEvent]) -> None:
+        # The first catalog was known before this start; only what changes
+        # from here on can alert
+        if self.data is None:
+            self.alerts.prime(events, time.time())
+            return
+        alerts = self.alerts.evaluate(events, self.distances, time.time())
+        if not alerts:
+            return
+        for event, rule, intensity in alerts:
+            _LOGGER.debug(
+                "Alert %s for M%s %s", rule.name, event.magnitude, event.place
+            )
+            self.hass.bus.async_fire(
+                EVENT_ALERT, self._alert_data(event, rule, intensity)
+            )
+        self.alert_latency.add(time.monotonic() - self.hub.ingested_at)
+        self._alert_store.async_schedule_save(self.alerts.fired)
+
+    def _alert_data(
+        self, event: EarthquakeEvent, rule: AlertRule, intensity: float | None
+    ) -> dict[str, Any]:
+        distance = self.distances.get(event.id)
+        point = min(
+            (p.name for p in self.points if event.id in self.point_distances[p.name]),
+            key=lambda name: self.point_distances[name][event.id],
+            default=None,
+        )
+        return {
+            "entry_id": self.entry.entry_id,
+            "rule": rule.name,
+            "id": event.id,
+            "time": event.time.isoformat(),
+            "magnitude": event.magnitude,
+            "depth": event.depth,
+            "latitude": event.latitude,
+            "longitude": event.longitude,
+            "place": event.place,
+            "source": event.source,
+            "sources": event.sources or [],
+            "distance_km": None if distance is None else round(distance, 1),
+            "intensity": None if intensity is None else round(intensity, 1),
+            "point": point,
+        }
+
+    def _check_boost(self, events: list[EarthquakeEvent]) -> None:
+        if not self.boost_magnitude or not self.boost_duration:
+            return
+        # Everything is new on the first pass after a start
+        if self.data is None:
+            return
+        known = {e.id for e in self.data or []}
+        cutoff = time.time() - self.boost_duration
+        for e in events:
+            if e.timestamp < cutoff:
+                break
+            if e.id not in known and (e.magnitude or 0) >= self.boost_magnitude:
+                _LOGGER.debug("Boosting polling after M%s %s", e.magnitude, e.place)
+                self.hub.async_boost(self.boost_duration - (time.time() - e.timestamp))
+                return
+
+    def _wants(self, event: EarthquakeEvent) -> bool:
+        if event.source in self.sources:
+            return True
+        return any(s in self.sources for s in event.sources or ())
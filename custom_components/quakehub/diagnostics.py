@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_LATITUDE,
+    CONF_LONGITUDE,
+    CONF_REGION,
+    CONF_WATCHLIST,
+    DOMAIN,
+)
+from .coordinator import EarthquakeCoordinator
+
+# Everything that gives away where the user lives or watches
+TO_REDACT = {CONF_LATITUDE, CONF_LONGITUDE, CONF_WATCHLIST, CONF_REGION}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    coordinator: EarthquakeCoordinator = hass.data[DOMAIN][entry.entry_id]
+    hub = coordinator.hub
+    now = time.monotonic()
+
+    sources = {}
+    for source in sorted(hub.sources):
+        health = hub.health[source]
+        info: dict[str, Any] = {
+            "circuit": health.state(now),
+            "failures": health.failures,
+            "age_s": hub.source_age(source),
+        }
+        if source in hub.scheduler:
+            schedule = hub.scheduler[source]
+            info["interval_s"] = schedule.interval
+            info["due_in_s"] = max(schedule.next_due - now, 0.0)
+        sources[source] = info
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "options": async_redact_data(dict(entry.options), TO_REDACT),
+        "hub": {
+            "entries": hub.entry_count,
+            "catalog_events": len(hub.data or []),
+            "late_sources": hub.late_sources,
+            "stream": hub.stream is not None,
+            "sources": sources,
+            "metrics": hub.metrics.as_dict(),
+            "retention": hub.retention.as_dict(),
+        },
+        "coordinator": {
+            "events": len(coordinator.data or []),
+            "radius_filtered": coordinator.radius_filtered.as_dict(),
+            "state_writes": coordinator.state_writes,
+            "alert_rules": [rule.name for rule in coordinator.alerts.rules],
+            "alerts_remembered": len(coordinator.alerts.fired),
+            "alert_latency": coordinator.alert_latency.as_dict(),
+            "windows": {
+                name: window.count
+                for name, window in coordinator.aggregates.windows.items()
+            },
+        },
+    }
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List
+
+import aiohttp
+import async_timeout
+
+from .const import PARSE_EXECUTOR_BYTES
+from .merger import EarthquakeEvent, intern_text, parse_iso_timestamp
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    orjson = None
+
+Parser = Callable[[Any], List[EarthquakeEvent]]
+Decoder = Callable[[bytes], Any]
+
+
+@dataclass
+class FeedCache:
+    """Validators and parsed result of the last successful download."""
+
+    request: tuple | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    body_hash: str | None = None
+    events: List[EarthquakeEvent] | None = None
+
+
+@dataclass
+class FetchStats:
+    """What a single fetch of one source cost, filled in by the fetcher."""
+
+    status: int | None = None
+    latency: float | None = None
+    bytes: int = 0
+    decode: float = 0.0
+    parsed: int = 0
+
+
+async def async_fetch_feed(
+    session: aiohttp.ClientSession,
+    url: str,
+    parse: Parser,
+    timeout: float = 10,
+    cache: FeedCache | None = None,
+    params: Dict[str, str] | None = None,
+    stats: FetchStats | None = None,
+    decode: Decoder | None = None,
+) -> List[EarthquakeEvent]:
+    if stats is None:
+        stats = FetchStats()
+
+    # Validators only apply to the exact same request
+    request = (url, tuple(sorted(params.items())) if params else ())
+    if cache is not None and cache.request != request:
+        cache.request = request
+        cache.etag = cache.last_modified = cache.body_hash = None
+        cache.events = None
+
+    headers = {}
+    if cache is not None and cache.events is not None:
+        if cache.etag:
+            headers["If-None-Match"] = cache.etag
+        if cache.last_modified:
+            headers["If-Modified-Since"] = cache.last_modified
+
+    start = time.monotonic()
+    async with async_timeout.timeout(timeout):
+        async with session.get(url, headers=headers, params=params) as resp:
+            stats.status = resp.status
+            if resp.status == 304 and cache is not None and cache.events is not None:
+                stats.latency = time.monotonic() - start
+                return cache.events
+            if resp.status == 204:
+                # FDSN services answer "no matching events" with 204
+                stats.latency = time.monotonic() - start
+                return []
+            resp.raise_for_status()
+            body = await resp.read()
+            stats.latency = time.monotonic() - start
+            stats.bytes = len(body)
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+
+    if decode is None:
+        decode = json_loads
+    known_hash = None
+    if cache is not None and cache.events is not None:
+        known_hash = cache.body_hash
+    if len(body) < PARSE_EXECUTOR_BYTES:
+        body_hash, events = _decode(body, decode, parse, stats, known_hash)
+    else:
+        # Large feeds would block the event loop for tens of milliseconds
+        body_hash, events = await asyncio.get_running_loop().run_in_executor(
+            None, _decode, body, decode, parse, stats, known_hash
+        )
+
+    if cache is None:
+        return events
+    if events is not None:
+        cache.events = events
+        cache.body_hash = body_hash
+    cache.etag = etag
+    cache.last_modified = last_modified
+    return cache.events
+
+
+def json_loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def text_lines(data: bytes) -> List[str]:
+    return data.decode("utf-8", "replace").splitlines()
+
+
+def _decode(
+    body: bytes,
+    decode: Decoder,
+    parse: Parser,
+    stats: FetchStats,
+    known_hash: str | None,
+) -> tuple[str, List[EarthquakeEvent] | None]:
+    """Hash, decode and parse a body; events are None if the hash is known."""
+    body_hash = hashlib.sha1(body).hexdigest()
+    if body_hash == known_hash:
+        return body_hash, None
+    start = time.monotonic()
+    data = decode(body)
+    stats.decode = time.monotonic() - start
+    events = parse(data)
+    stats.parsed = len(events)
+    return body_hash, events
+
+
+def parse_geojson(
+    data: Any, source: str, keep_raw: bool = False
+) -> List[EarthquakeEvent]:
+    """Events of a GeoJSON feature collection, or a plain list of records.
+
+    Covers the variations between providers: origin times in epoch
+    milliseconds or ISO 8601, ids on the feature or in its properties and
+    coordinates in the geometry or as properties.
+    """
+    events = []
+    if isinstance(data, list):
+        items = data
+    else:
+        items = data.get("features", [])
+    now = time.time()
+    for item in items:
+        props = item.get("properties", item)
+        geometry = item.get("geometry")
+        if geometry:
+            coords = geometry.get("coordinates", [None, None, None])
+        else:
+            coords = [props.get("lon"), props.get("lat"), props.get("depth")]
+
+        time_val = props.get("time") or props.get("origintime")
+        if isinstance(time_val, (int, float)):
+            timestamp = time_val / 1000
+        elif isinstance(time_val, str):
+            timestamp = parse_iso_timestamp(time_val)
+        else:
+            timestamp = None
+
+        event_id = props.get("eventid") or item.get("id") or props.get("id")
+        events.append(
+            EarthquakeEvent(
+                id=f"{source}_{event_id}",
+                source=source,
+                timestamp=now if timestamp is None else timestamp,
+                latitude=coords[1],
+                longitude=coords[0],
+                depth=coords[2] if len(coords) > 2 else None,
+                magnitude=props.get("mag"),
+                place=intern_text(
+                    props.get("place")
+                    or props.get("flynn_region")
+                    or props.get("region")
+                ),
+                raw=item if keep_raw else None,
+            )
+        )
+    return events
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from math import cos, degrees, radians
+from typing import List, Sequence, Tuple
+
+from .merger import EARTH_RADIUS_KM, EarthquakeEvent, haversine_km
+
+# numpy is a manifest requirement. The pure-Python paths give the same
+# results and keep the integration working where it cannot be installed.
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def bounding_box(
+    lat: float, lon: float, radius_km: float
+) -> Tuple[float, float, float | None]:
+    """Return (min_lat, max_lat, max_abs_dlon) enclosing the circle.
+
+    max_abs_dlon is None when the circle reaches a pole, in which case every
+    longitude can be inside it.
+    """
+    dlat = degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None
+    min_cos = min(cos(radians(min_lat)), cos(radians(max_lat)))
+    dlon = degrees(radius_km / (EARTH_RADIUS_KM * min_cos))
+    return min_lat, max_lat, dlon if dlon < 180 else None
+
+
+def distances_km(
+    lat: float, lon: float, events: Sequence[EarthquakeEvent]
+) -> List[float]:
+    if np is None:
+        return [haversine_km(lat, lon, e.latitude, e.longitude) for e in events]
+    if not events:
+        return []
+    lats = np.radians(np.fromiter((e.latitude for e in events), float, len(events)))
+    lons = np.radians(np.fromiter((e.longitude for e in events), float, len(events)))
+    return _haversine_np(radians(lat), radians(lon), lats, lons).tolist()
+
+
+def _haversine_np(lat, lon, lats, lons):
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def covering_circle(
+    circles: Sequence[Tuple[float, float, float]]
+) -> Tuple[float, float, float]:
+    """Circle around the first circle's centre that covers all of them."""
+    lat, lon, _ = circles[0]
+    radius = max(
+        haversine_km(lat, lon, c_lat, c_lon) + c_radius
+        for c_lat, c_lon, c_radius in circles
+    )
+    return lat, lon, radius
+
+
+def within_points(
+    points: Sequence[Tuple[float, float, float]], events: Sequence[EarthquakeEvent]
+) -> List[Tuple[List[int], List[float]]]:
+    """Indices and distances of the events within each (lat, lon, radius) point.
+
+    Distances for every point come from one batched points x events matrix,
+    restricted to events inside the points' combined latitude band.
+    """
+    if not points:
+        return []
+    boxes = [bounding_box(*point) for point in points]
+    min_lat = min(box[0] for box in boxes)
+    max_lat = max(box[1] for box in boxes)
+
+    if np is None:
+        rows: List[Tuple[List[int], List[float]]] = [([], []) for _ in points]
+        for i, e in enumerate(events):
+            if not min_lat <= e.latitude <= max_lat:
+                continue
+            for (lat, lon, radius), box, (idx, dists) in zip(points, boxes, rows):
+                if not box[0] <= e.latitude <= box[1]:
+                    continue
+                dlon = abs((e.longitude - lon + 180) % 360 - 180)
+                if box[2] is not None and dlon > box[2]:
+                    continue
+                d = haversine_km(lat, lon, e.latitude, e.longitude)
+                if d <= radius:
+                    idx.append(i)
+                    dists.append(d)
+        return rows
+
+    if not events:
+        return [([], []) for _ in points]
+    lats = np.fromiter((e.latitude for e in events), float, len(events))
+    lons = np.fromiter((e.longitude for e in events), float, len(events))
+    cand = np.flatnonzero((lats >= min_lat) & (lats <= max_lat))
+    centres = np.radians(np.array([(lat, lon) for lat, lon, _ in points], float))
+    radii = np.array([radius for _, _, radius in points], float)
+    d = _haversine_np(
+        centres[:, :1],
+        centres[:, 1:],
+        np.radians(lats[cand])[None, :],
+        np.radians(lons[cand])[None, :],
+    )
+    inside = d <= radii[:, None]
+    return [
+        (cand[row].tolist(), d[i, row].tolist()) for i, row in enumerate(inside)
+    ]
+
+
+def filter_within(
+    lat: float, lon: float, radius_km: float, events: Sequence[EarthquakeEvent]
+) -> Tuple[List[EarthquakeEvent], List[float]]:
+    """Keep events within radius_km, returning them with their distances."""
+    min_lat, max_lat, max_dlon = bounding_box(lat, lon, radius_km)
+
+    if np is None:
+        kept, dists = [], []
+        for e in events:
+            if not min_lat <= e.latitude <= max_lat:
+                continue
+            dlon = abs((e.longitude - lon + 180) % 360 - 180)
+            if max_dlon is not None and dlon > max_dlon:
+                continue
+            d = haversine_km(lat, lon, e.latitude, e.longitude)
+            if d <= radius_km:
+                kept.append(e)
+                dists.append(d)
+        return kept, dists
+
+    if not events:
+        return [], []
+    lats = np.fromiter((e.latitude for e in events), float, len(events))
+    lons = np.fromiter((e.longitude for e in events), float, len(events))
+    mask = (lats >= min_lat) & (lats <= max_lat)
+    if max_dlon is not None:
+        mask &= np.abs((lons - lon + 180) % 360 - 180) <= max_dlon
+    idx = np.flatnonzero(mask)
+    d = _haversine_np(
+        radians(lat), radians(lon), np.radians(lats[idx]), np.radians(lons[idx])
+    )
+    inside = d <= radius_km
+    return [events[i] for i in idx[inside].tolist()], d[inside].tolist()
@@ -1,91 +1,201 @@
-from __future__ import annotations
-
-from typing import Any
-
-from homeassistant.components.geo_location import GeolocationEvent
-from homeassistant.core import HomeAssistant
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-
-from .const import DOMAIN
-from .coordinator import EarthquakeCoordinator
-from .merger import EarthquakeEvent, haversine_km
-
-
-async def async_setup_entry(
-    hass: HomeAssistant,
-    entry: ConfigEntry,
-    async_add_entities: AddEntitiesCallback,
-) -> None:
-    coordinator: EarthquakeCoordinator = hass.data[DOMAIN][entry.entry_id]
-    entities: list[EarthquakeGeoEntity] = []
-
-    for event in coordinator.data:
-        entities.append(EarthquakeGeoEntity(coordinator, event))
-
-    async_add_entities(entities)
-
-    def _update_entities():
-        existing_ids = {e.unique_id for e in entities}
-        new_entities: list[EarthquakeGeoEntity] = []
-        for event in coordinator.data:
-            uid = f"{DOMAIN}_{event.id}"
-            if uid not in existing_ids:
-                new_entities.append(EarthquakeGeoEntity(coordinator, event))
-        if new_entities:
-            async_add_entities(new_entities)
-
-    coordinator.async_add_listener(_update_entities)
-
-
-class EarthquakeGeoEntity(CoordinatorEntity, GeolocationEvent):
-    _attr_icon = "mdi:earthquake"
-
-    def __init__(self, coordinator: EarthquakeCoordinator, event: EarthquakeEvent):
-        super().__init__(coordinator)
-        self._event = event
-        self._attr_unique_id = f"{DOMAIN}_{event.id}"
-        self._attr_name = f"Quake {event.magnitude or '?'} {event.place or ''}".strip()
-
-    @property
-    def latitude(self) -> float:
-        return self._event.latitude
-
-    @property
-    def longitude(self) -> float:
-        return self._event.longitude
-
-    @property
-    def source(self) -> str:
-        return DOMAIN
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        coord: EarthquakeCoordinator = self.coordinator
-        distance = haversine_km(
-            coord.lat, coord.lon, self._event.latitude, self._event.longitude
-        )
-        return {
-            "magnitude": self._event.magnitude,
-            "depth": self._event.depth,
-            "time": self._event.time.isoformat(),
-            "place": self._event.place,
-            "source_primary": self._event.source,
-            "sources_combined": self._event.extra.get("sources"),
-            "distance_km": round(distance, 1),
-        }
-
-    @property
-    def state(self) -> float:
-        coord: EarthquakeCoordinator = self.coordinator
-        return round(
-            haversine_km(
-                coord.lat, coord.lon, self._event.latitude, self._event.longitude
-            ),
-            1,
-        )
-
-    @property
-    def should_poll(self) -> bool:
-        return False
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.components.geo_location import GeolocationEvent
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import slugify
+
+from .const import DOMAIN, GEO_ENTITY_MAX_AGE
+from .coordinator import EarthquakeCoordinator
+from .merger import EarthquakeEvent, haversine_km
+from .watchlist import WatchPoint
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    coordinator: EarthquakeCoordinator = hass.data[DOMAIN][entry.entry_id]
+    points = {point.name: point for point in coordinator.points}
+    # Live entities keyed by (watchlist point name or None, event id)
+    entities: dict[tuple[str | None, str], EarthquakeGeoEntity] = {}
+
+    @callback
+    def _async_update_entities() -> None:
+        cutoff = time.time() - GEO_ENTITY_MAX_AGE
+        if points:
+            current = {
+                (name, event.id): event
+                for name in points
+                for event in coordinator.point_events.get(name, [])
+                if event.timestamp >= cutoff
+            }
+        else:
+            current = {
+                (None, event.id): event
+                for event in coordinator.data or []
+                if event.timestamp >= cutoff
+            }
+
+        for key in entities.keys() - current.keys():
+            hass.async_create_task(entities.pop(key).async_remove_event())
+
+        for key in entities.keys() & current.keys():
+            entity = entities[key]
+            if entity.event is not current[key]:
+                entity.async_update_event(current[key])
+
+        new_entities = []
+        for key in current.keys() - entities.keys():
+            name, _ = key
+            entity = EarthquakeGeoEntity(coordinator, current[key], points.get(name))
+            entities[key] = entity
+            new_entities.append(entity)
+        if new_entities:
+            async_add_entities(new_entities)
+
+    _async_update_entities()
+    entry.async_on_unload(coordinator.async_add_listener(_async_update_entities))
+
+    # Map entities live only as long as their event, so any other registry
+    # entry of this config entry (older unique id formats too) is stale
+    current_ids = {entity.unique_id for entity in entities.values()}
+    registry = er.async_get(hass)
+    for registry_entry in er.async_entries_for_config_entry(registry, entry.entry_id):
+        if (
+            registry_entry.domain == Platform.GEO_LOCATION
+            and registry_entry.unique_id not in current_ids
+        ):
+            registry.async_remove(registry_entry.entity_id)
+
+
+class EarthquakeGeoEntity(GeolocationEvent):
+    """Map entity for one event; written only when its rendered state changes."""
+
+    _attr_icon = "mdi:earthquake"
+
+    def __init__(
+        self,
+        coordinator: EarthquakeCoordinator,
+        event: EarthquakeEvent,
+        point: WatchPoint | None = None,
+    ):
+        self.coordinator = coordinator
+        self._event = event
+        # Watchlist point the distance is measured from, or the entry location
+        self._point = point
+        # Several entries can show the same event
+        entry_id = coordinator.entry.entry_id
+        if point is None:
+            self._attr_unique_id = f"{DOMAIN}_{entry_id}_{event.id}"
+        else:
+            point_id = f"{entry_id}_{slugify(point.name)}"
+            self._attr_unique_id = f"{DOMAIN}_{point_id}_{event.id}"
+        self._attr_name = self._name(event)
+        self._written = self._fingerprint()
+
+    def _name(self, event: EarthquakeEvent) -> str:
+        name = f"Quake {event.magnitude or '?'} {event.place or ''}".strip()
+        if self._point is not None:
+            name = f"{name} ({self._point.name})"
+        return name
+
+    @property
+    def event(self) -> EarthquakeEvent:
+        return self._event
+
+    def _fingerprint(self) -> tuple:
+        """Everything the name, state and attributes are rendered from."""
+        e = self._event
+        return (
+            e.magnitude,
+            e.place,
+            e.latitude,
+            e.longitude,
+            e.depth,
+            e.timestamp,
+            e.source,
+            tuple(e.sources or ()),
+            round(self._distance_km(), 1),
+        )
+
+    @callback
+    def async_update_event(self, event: EarthquakeEvent) -> None:
+        self._event = event
+        fingerprint = self._fingerprint()
+        if fingerprint == self._written:
+            self.coordinator.state_writes["skipped"] += 1
+            return
+        self._written = fingerprint
+        self._attr_name = self._name(event)
+        if self.hass is not None:
+            self.coordinator.state_writes["written"] += 1
+            self.async_write_ha_state()
+
+    async def async_remove_event(self) -> None:
+        """Remove the entity and its registry entry once the event is gone."""
+        if self.hass is None:
+            return
+        await self.async_remove(force_remove=True)
+        registry = er.async_get(self.hass)
+        if self.entity_id and registry.async_get(self.entity_id):
+            registry.async_remove(self.entity_id)
+
+    @property
+    def latitude(self) -> float:
+        return self._event.latitude
+
+    @property
+    def longitude(self) -> float:
+        return self._event.longitude
+
+    @property
+    def source(self) -> str:
+        return DOMAIN
+
+    def _distance_km(self) -> float:
+        coord: EarthquakeCoordinator = self.coordinator
+        if self._point is None:
+            distance = coord.distances.get(self._event.id)
+            lat, lon = coord.lat, coord.lon
+        else:
+            distance = coord.point_distances.get(self._point.name, {}).get(
+                self._event.id
+            )
+            lat, lon = self._point.latitude, self._point.longitude
+        if distance is None:
+            distance = haversine_km(
+                lat, lon, self._event.latitude, self._event.longitude
+            )
+        return distance
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        distance = self._distance_km()
+        attrs = {
+            "magnitude": self._event.magnitude,
+            "depth": self._event.depth,
+            "time": self._event.time.isoformat(),
+            "place": self._event.place,
+            "source_primary": self._event.source,
+            "sources_combined": self._event.sources,
+            "distance_km": round(distance, 1),
+        }
+        if self._point is not None:
+            attrs["point"] = self._point.name
+        return attrs
+
+    @property
+    def state(self) -> float:
+        return round(self._distance_km(), 1)
+
+    @property
+    def should_poll(self) -> bool:
+        return False
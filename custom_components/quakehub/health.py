@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .const import BREAKER_FAILURE_THRESHOLD, BREAKER_OPEN_BASE, BREAKER_OPEN_MAX
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+@dataclass
+class SourceHealth:
+    """Circuit breaker for one source.
+
+    After BREAKER_FAILURE_THRESHOLD consecutive failures the source is
+    skipped for an open period that doubles on every failed trial, up to
+    BREAKER_OPEN_MAX. Times are monotonic seconds.
+    """
+
+    failures: int = 0
+    trips: int = 0
+    open_until: float = 0.0
+    last_success: float | None = None
+    last_latency: float | None = None
+
+    def state(self, now: float) -> str:
+        if self.failures < BREAKER_FAILURE_THRESHOLD:
+            return STATE_CLOSED
+        if now < self.open_until:
+            return STATE_OPEN
+        return STATE_HALF_OPEN
+
+    def allow(self, now: float) -> bool:
+        return self.state(now) != STATE_OPEN
+
+    def record_success(self, now: float, latency: float) -> None:
+        self.failures = 0
+        self.trips = 0
+        self.last_success = now
+        self.last_latency = latency
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        if self.failures >= BREAKER_FAILURE_THRESHOLD:
+            self.trips += 1
+            self.open_until = now + min(
+                BREAKER_OPEN_BASE * 2 ** (self.trips - 1), BREAKER_OPEN_MAX
+            )
@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from functools import partial
+from typing import TYPE_CHECKING
+
+import aiohttp
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import (
+    DATA_HUB,
+    DOMAIN,
+    SOURCE_TIMEOUTS,
+    REFRESH_DEADLINE,
+)
+from .fdsn import FdsnQuery
+from .feed import FeedCache, FetchStats, parse_retry_after
+from .geo import covering_circle
+from .merger import EarthquakeEvent, MergedCatalog
+from .session import async_get_session
+from .health import STATE_OPEN, SourceHealth
+from .metrics import RefreshMetrics
+from .query import IndexCache
+from .retention import Retention, combine_policies
+from .scheduler import SourceScheduler
+from .sources import SOURCES
+from .store import EventStore
+from .stream_emsc import EmscStream
+
+if TYPE_CHECKING:
+    from .coordinator import EarthquakeCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Beyond this a covering circle is no better than a worldwide query
+_MAX_QUERY_RADIUS_KM = 10000
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> QuakeHub:
+    hub: QuakeHub | None = hass.data.get(DATA_HUB)
+    if hub is None:
+        hub = hass.data[DATA_HUB] = QuakeHub(hass)
+    return hub
+
+
+def _covering_area(
+    entries: list[EarthquakeCoordinator],
+) -> tuple[float, float, float] | None:
+    """Circle around every entry's area, or None when any entry is unbounded."""
+    if not entries or any(e.area is None for e in entries):
+        return None
+    lat, lon, radius = covering_circle([e.area for e in entries])
+    if radius > _MAX_QUERY_RADIUS_KM:
+        return None
+    return lat, lon, radius
+
+
+def _fdsn_queries(
+    area: tuple[float, float, float] | None,
+) -> dict[str, FdsnQuery]:
+    lat, lon, radius = area or (None, None, None)
+    return {
+        key: source.query(lat, lon, radius)
+        for key, source in SOURCES.items()
+        if source.query is not None
+    }
+
+
+def _describe_error(err: BaseException) -> str:
+    """Short error for metrics and attributes.
+
+    Error messages may quote the request URL, whose query carries the area
+    of the entries, so only the HTTP status or the error type is kept.
+    """
+    if isinstance(err, aiohttp.ClientResponseError):
+        return f"HTTP {err.status}"
+    return type(err).__name__
+
+
+class QuakeHub(DataUpdateCoordinator):
+    """Fetches and merges every source once for all config entries.
+
+    Entry coordinators register here and only filter the shared catalog.
+    Each source has its own schedule based on the shortest interval any
+    registered entry asked for; the hub wakes up when the next one is due.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_hub",
+            update_interval=None,
+            # Entries only hear about catalog changes; anything that ages
+            # with time runs on their own expiry timer instead
+            always_update=False,
+        )
+        # Shared by all entries, so not tied to whichever one created it
+        self.config_entry = None
+        self.store = EventStore(hass)
+        self.sources: set[str] = set()
+        self.keep_raw = False
+        self.late_sources: list[str] = []
+        self._entries: dict[str, EarthquakeCoordinator] = {}
+        self._feed_caches = {source: FeedCache() for source in SOURCES}
+        self._fetchers = {key: source.fetch for key, source in SOURCES.items()}
+        self._area: tuple[float, float, float] | None = None
+        # Server-side queries of the FDSN sources, for the area of all entries
+        self._queries = _fdsn_queries(None)
+        self._setup_lock = asyncio.Lock()
+        self.stream: EmscStream | None = None
+        self.scheduler = SourceScheduler()
+        self.health = {source: SourceHealth() for source in SOURCES}
+        # Wall-clock time of each source's last good result
+        self.last_success_at: dict[str, float] = {}
+        # Merged events and their dedup state, kept across refreshes
+        self._catalog = MergedCatalog()
+        # Last good result per source, already applied to the catalog
+        self._last_good: dict[str, list[EarthquakeEvent]] = {}
+        self.metrics = RefreshMetrics(SOURCES)
+        self.event_index = IndexCache()
+        self.retention = Retention()
+        # When new or changed events last entered the catalog
+        self.ingested_at = time.monotonic()
+
+    @property
+    def entry_count(self) -> int:
+        return len(self._entries)
+
+    @callback
+    def async_register(self, coordinator: EarthquakeCoordinator) -> None:
+        self._entries[coordinator.entry.entry_id] = coordinator
+        self._async_reconfigure()
+
+    @callback
+    def async_unregister(self, coordinator: EarthquakeCoordinator) -> None:
+        self._entries.pop(coordinator.entry.entry_id, None)
+        self._async_reconfigure()
+
+    @callback
+    def _async_reconfigure(self) -> None:
+        entries = list(self._entries.values())
+        added = set().union(*(e.sources for e in entries)) - self.sources
+        self.sources = set().union(*(e.sources for e in entries))
+        self.keep_raw = any(e.keep_raw for e in entries)
+        self.retention.policy = combine_policies(e.retention for e in entries)
+        if entries:
+            base = min(e.requested_interval for e in entries)
+            self.scheduler.configure(self.sources, base.total_seconds())
+            if self.update_interval is None:
+                self.update_interval = base
+
+        area = _covering_area(entries)
+        if area != self._area:
+            self._area = area
+            self._queries = _fdsn_queries(area)
+        self._fetchers = {}
+        for key, source in SOURCES.items():
+            fetcher = partial(source.fetch, keep_raw=self.keep_raw)
+            if key in self._queries:
+                fetcher = partial(fetcher, query=self._queries[key])
+            self._fetchers[key] = fetcher
+
+        if added and self.data is not None:
+            self.hass.async_create_task(self.async_request_refresh())
+
+        want_stream = any(e.push for e in entries)
+        if want_stream and self.stream is None:
+            self.stream = EmscStream(
+                self.hass, self.async_ingest, keep_raw=self.keep_raw
+            )
+            self.stream.start()
+        elif self.stream is not None:
+            if want_stream:
+                self.stream.keep_raw = self.keep_raw
+            else:
+                stream, self.stream = self.stream, None
+                self.hass.async_create_task(stream.async_stop())
+
+    @callback
+    def async_boost(self, duration: float) -> None:
+        """Poll every source faster for a while, e.g. to catch aftershocks."""
+        self.scheduler.boost(duration)
+        # Re-evaluates the schedule and wakes up at the boosted interval
+        self.hass.async_create_task(self.async_request_refresh())
+
+    async def async_shutdown(self) -> None:
+        if self.stream is not None:
+            stream, self.stream = self.stream, None
+            await stream.async_stop()
+        await self.store.async_flush()
+        await super().async_shutdown()
+
+    @callback
+    def async_ingest(self, events: list[EarthquakeEvent]) -> None:
+        """Merge pushed events into the catalog and notify entries right away.
+
+        The poll schedule is left alone so polling keeps catching up on
+        anything the push feed missed.
+        """
+        if self.data is None:
+            return
+        if self._apply(events):
+            self.data = self._snapshot()
+            self.async_update_listeners()
+
+    async def async_ensure_data(self, entry: ConfigEntry) -> None:
+        """Make sure a catalog exists before the first entry filters it.
+
+        A stored catalog is used right away and the network refresh runs in
+        the background; without one the first refresh is awaited.
+        """
+        async with self._setup_lock:
+            if self.data is not None:
+                return
+            if await self._async_restore():
+                entry.async_create_background_task(
+                    self.hass, self.async_refresh(), f"{DOMAIN}_first_refresh"
+                )
+            else:
+                await self.async_refresh()
+
+    async def _async_restore(self) -> bool:
+        events = await self.store.async_load()
+        if not events:
+            return False
+        self._catalog.update(events)
+        self.async_set_updated_data(self._snapshot())
+        return True
+
+    async def _async_update_data(self) -> list[EarthquakeEvent]:
+        session = async_get_session(self.hass)
+        start = time.monotonic()
+        try:
+            results = await self._async_fetch_sources(session)
+        finally:
+            delay = self.scheduler.seconds_until_due(time.monotonic())
+            self.update_interval = timedelta(seconds=delay)
+
+        if results is None:
+            return self.data
+
+        changed = False
+        for source in SOURCES:
+            events = results.get(source)
+            # Feeds served from cache return the very list applied last time
+            if events is None or events is self._last_good.get(source):
+                continue
+            changed |= self._apply(events)
+            self._last_good[source] = events
+
+        data = self.data
+        if changed or self.retention.exceeded(self._oldest(), time.time()):
+            data = self._snapshot()
+
+        self.metrics.refresh.add(time.monotonic() - start)
+        self.metrics.async_update_listeners()
+        return data
+
+    def source_age(self, source: str) -> float | None:
+        """Seconds since the source last returned a good result."""
+        last = self.health[source].last_success
+        if last is None:
+            return None
+        return time.monotonic() - last
+
+    @property
+    def stale_sources(self) -> list[str]:
+        """Enabled sources currently served from their last good result."""
+        return [s for s in SOURCES if s in self.sources and self.health[s].failures]
+
+    def member_places(self, event_id: str) -> list[str | None]:
+        """Place names of every source's report of a merged event."""
+        return self._catalog.member_places(event_id)
+
+    def _apply(self, events: list[EarthquakeEvent]) -> bool:
+        """Merge new and changed events into the catalog.
+
+        Events that have left a provider's feed window stay in the catalog
+        until retention evicts them.
+        """
+        start = self.ingested_at = time.monotonic()
+        changed = self._catalog.update(self.retention.admit(events, time.time()))
+        self.metrics.record_merge(time.monotonic() - start, self._catalog.duplicates)
+        return changed
+
+    def _oldest(self) -> EarthquakeEvent | None:
+        ordered = self._catalog.oldest_first()
+        return ordered[0] if ordered else None
+
+    def _snapshot(self) -> list[EarthquakeEvent]:
+        """Catalog as a newest-first list, evicting what retention rejects.
+
+        The catalog is stored again only when this changed it.
+        """
+        catalog, retention = self._catalog, self.retention
+        changed = retention.track(catalog.drain())
+        now = time.time()
+        if retention.exceeded(self._oldest(), now):
+            evicted = retention.select(
+                catalog.oldest_first(),
+                now,
+                [e.area for e in self._entries.values()],
+            )
+            for event in evicted:
+                retention.remember(catalog.discard(event.id))
+            changed |= retention.track(catalog.drain())
+        events = catalog.newest_first()
+        if changed:
+            self.store.async_schedule_save(events)
+        return events
+
+    async def _async_fetch_sources(
+        self, session: aiohttp.ClientSession
+    ) -> dict[str, list[EarthquakeEvent]] | None:
+        """Fetch the sources that are due and whose circuit allows it.
+
+        Returns the events per source that succeeded, or None when nothing
+        was due.
+        """
+        now = time.monotonic()
+        due = [
+            s
+            for s in self.scheduler.due(now)
+            if s in self.sources and self.health[s].allow(now)
+        ]
+        stats = {source: FetchStats() for source in due}
+        tasks = {
+            source: asyncio.create_task(
+                fetcher(
+                    session,
+                    timeout=SOURCE_TIMEOUTS.get(source, REFRESH_DEADLINE),
+                    cache=self._feed_caches[source],
+                    stats=stats[source],
+                )
+            )
+            for source, fetcher in self._fetchers.items()
+            if source in due
+        }
+        if not tasks:
+            return None
+
+        try:
+            _, pending = await asyncio.wait(tasks.values(), timeout=REFRESH_DEADLINE)
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+        self.late_sources = [s for s, task in tasks.items() if task in pending]
+        if self.late_sources:
+            _LOGGER.warning(
+                "Refresh deadline of %ss passed, skipping late sources: %s",
+                REFRESH_DEADLINE,
+                ", ".join(self.late_sources),
+            )
+
+        done_at = time.monotonic()
+        results: dict[str, list[EarthquakeEvent]] = {}
+        for source, task in tasks.items():
+            schedule = self.scheduler[source]
+            health = self.health[source]
+            if stats[source].latency is None:
+                stats[source].latency = done_at - now
+            if task in pending:
+                self.metrics.record_fetch(source, stats[source], "deadline")
+                self._record_failure(source, done_at, None)
+                continue
+            err = task.exception()
+            if err is not None:
+                error = _describe_error(err)
+                _LOGGER.warning("%s fetch failed: %s", source.upper(), error)
+                _LOGGER.debug("%s fetch error details", source.upper(), exc_info=err)
+                self.metrics.record_fetch(source, stats[source], error)
+                retry_after = None
+                if isinstance(err, aiohttp.ClientResponseError) and err.headers:
+                    retry_after = parse_retry_after(err.headers.get("Retry-After"))
+                self._record_failure(source, done_at, retry_after)
+                continue
+            result = task.result()
+            self.metrics.record_fetch(source, stats[source])
+            health.record_success(done_at, stats[source].latency)
+            self.last_success_at[source] = time.time()
+            schedule.record_success(
+                done_at,
+                hash(tuple((e.id, e.timestamp, e.magnitude) for e in result)),
+            )
+            results[source] = result
+        return results
+
+    def _record_failure(
+        self, source: str, now: float, retry_after: float | None
+    ) -> None:
+        health = self.health[source]
+        schedule = self.scheduler[source]
+        health.record_failure(now)
+        schedule.record_error(now, retry_after)
+        if health.state(now) == STATE_OPEN:
+            schedule.next_due = max(schedule.next_due, health.open_until)
+            _LOGGER.warning(
+                "%s failed %s times in a row, skipping it for %.0fs",
+                source.upper(),
+                health.failures,
+                health.open_until - now,
+            )
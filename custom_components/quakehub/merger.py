@@ -1,100 +1,373 @@
-from __future__ import annotations
-
-from dataclasses import dataclass
-from datetime import datetime
-from math import radians, sin, cos, sqrt, atan2
-from typing import List, Dict, Any
-
-
-@dataclass
-class EarthquakeEvent:
-    id: str
-    source: str
-    time: datetime
-    latitude: float
-    longitude: float
-    depth: float | None
-    magnitude: float | None
-    place: str | None
-    extra: Dict[str, Any]
-
-
-def haversine_km(lat1, lon1, lat2, lon2) -> float:
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
-
-
-def normalize_events(raw_events: List[Dict[str, Any]]) -> List[EarthquakeEvent]:
-    events: List[EarthquakeEvent] = []
-    for e in raw_events:
-        events.append(
-            EarthquakeEvent(
-                id=e["id"],
-                source=e["source"],
-                time=e["time"],
-                latitude=e["latitude"],
-                longitude=e["longitude"],
-                depth=e.get("depth"),
-                magnitude=e.get("magnitude"),
-                place=e.get("place"),
-                extra={
-                    k: v
-                    for k, v in e.items()
-                    if k
-                    not in {
-                        "id",
-                        "source",
-                        "time",
-                        "latitude",
-                        "longitude",
-                        "depth",
-                        "magnitude",
-                        "place",
-                    }
-                },
-            )
-        )
-    return events
-
-
-def merge_events(events: List[EarthquakeEvent]) -> List[EarthquakeEvent]:
-    merged: List[EarthquakeEvent] = []
-
-    for event in events:
-        matched = None
-        for existing in merged:
-            if abs((event.time - existing.time).total_seconds()) > 60:
-                continue
-            if haversine_km(
-                event.latitude, event.longitude, existing.latitude, existing.longitude
-            ) > 10:
-                continue
-            if (
-                event.magnitude is not None
-                and existing.magnitude is not None
-                and abs(event.magnitude - existing.magnitude) > 0.3
-            ):
-                continue
-            matched = existing
-            break
-
-        if matched is None:
-            merged.append(event)
-        else:
-            priority = {"emsc": 3, "usgs": 2, "geofon": 1}
-            if priority.get(event.source, 0) > priority.get(matched.source, 0):
-                merged.remove(matched)
-                merged.append(event)
-            else:
-                matched.extra.setdefault("sources", set())
-                matched.extra["sources"].add(event.source)
-
-    for e in merged:
-        if "sources" in e.extra and isinstance(e.extra["sources"], set):
-            e.extra["sources"] = list(e.extra["sources"])
-
-    return merged
+from __future__ import annotations
+
+import sys
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from math import asin, atan2, cos, degrees, floor, radians, sin, sqrt
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+
+MERGE_MAX_SECONDS = 60
+MERGE_MAX_KM = 10
+MERGE_MAX_MAG_DIFF = 0.3
+
+SOURCE_PRIORITY = {"emsc": 3, "usgs": 2, "geofon": 1}
+
+# Index cells must be at least as large as the merge window so that any
+# duplicate lives in the same or an adjacent cell.
+_TIME_BUCKET_SECONDS = MERGE_MAX_SECONDS
+_CELL_DEG = 0.1
+_LON_CELLS = int(360 / _CELL_DEG)
+
+
+@dataclass(slots=True)
+class EarthquakeEvent:
+    id: str
+    source: str
+    timestamp: float
+    latitude: float
+    longitude: float
+    depth: float | None
+    magnitude: float | None
+    place: str | None
+    sources: List[str] | None = None
+    raw: Dict[str, Any] | None = None
+
+    @property
+    def time(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp, tz=timezone.utc)
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> float:
+    R = EARTH_RADIUS_KM
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return R * c
+
+
+def parse_iso_timestamp(value: str) -> float | None:
+    """POSIX timestamp of an ISO 8601 time, read as UTC when it has no offset."""
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def intern_text(value: Any) -> str | None:
+    """Place names repeat across events and sources; share one copy each."""
+    return sys.intern(value) if isinstance(value, str) else None
+
+
+def is_duplicate(event: EarthquakeEvent, existing: EarthquakeEvent) -> bool:
+    if abs(event.timestamp - existing.timestamp) > MERGE_MAX_SECONDS:
+        return False
+    if haversine_km(
+        event.latitude, event.longitude, existing.latitude, existing.longitude
+    ) > MERGE_MAX_KM:
+        return False
+    if (
+        event.magnitude is not None
+        and existing.magnitude is not None
+        and abs(event.magnitude - existing.magnitude) > MERGE_MAX_MAG_DIFF
+    ):
+        return False
+    return True
+
+
+def _lon_reach(lat: float) -> int:
+    """Number of longitude cells on either side that can hold a match."""
+    # Widen slightly so float rounding in haversine_km never hides a match.
+    max_km = MERGE_MAX_KM * 1.01
+    lat_max = min(abs(lat) + degrees(max_km / EARTH_RADIUS_KM), 90.0)
+    min_cos = cos(radians(lat_max))
+    ratio = sin(max_km / (2 * EARTH_RADIUS_KM)) / min_cos if min_cos > 0 else 1.0
+    if ratio >= 1.0:
+        return _LON_CELLS
+    return int(degrees(2 * asin(ratio)) / _CELL_DEG) + 1
+
+
+class MergeIndex:
+    """Time-bucketed lat/lon grid over merged events.
+
+    Candidates are returned in insertion order so that the first duplicate
+    found matches what a linear scan over the merged list would find.
+
+    Events are also kept ordered by origin time, earlier insertions first
+    on ties, and every addition and removal is logged until drained.
+    """
+
+    def __init__(self) -> None:
+        self._events: Dict[int, EarthquakeEvent] = {}
+        self._keys: Dict[int, tuple[int, int, int]] = {}
+        # (time bucket, lat cell) -> lon cell -> sequence numbers
+        self._rows: Dict[tuple[int, int], Dict[int, List[int]]] = {}
+        self._seq = 0
+        # Ascending (timestamp, -seq) keys and their events, side by side
+        self._order: List[tuple[float, int]] = []
+        self._ordered: List[EarthquakeEvent] = []
+        # (event, True if added / False if removed) since the last drain
+        self._changes: List[Tuple[EarthquakeEvent, bool]] = []
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[EarthquakeEvent]:
+        return iter(self._events.values())
+
+    @staticmethod
+    def _key(event: EarthquakeEvent) -> tuple[int, int, int]:
+        return (
+            floor(event.timestamp / _TIME_BUCKET_SECONDS),
+            floor(event.latitude / _CELL_DEG),
+            floor((event.longitude % 360) / _CELL_DEG),
+        )
+
+    def _place(self, seq: int, event: EarthquakeEvent) -> None:
+        key = (event.timestamp, -seq)
+        i = bisect_left(self._order, key)
+        self._order.insert(i, key)
+        self._ordered.insert(i, event)
+        self._changes.append((event, True))
+
+    def _unplace(self, seq: int, event: EarthquakeEvent) -> None:
+        i = bisect_left(self._order, (event.timestamp, -seq))
+        del self._order[i]
+        del self._ordered[i]
+        self._changes.append((event, False))
+
+    def add(self, event: EarthquakeEvent) -> int:
+        seq = self._seq
+        self._seq += 1
+        t, la, lo = key = self._key(event)
+        self._events[seq] = event
+        self._keys[seq] = key
+        self._rows.setdefault((t, la), {}).setdefault(lo, []).append(seq)
+        self._place(seq, event)
+        return seq
+
+    def get(self, seq: int) -> EarthquakeEvent:
+        return self._events[seq]
+
+    def replace(self, seq: int, event: EarthquakeEvent) -> None:
+        """Store a copy of the event under seq; the cell is unchanged."""
+        self._unplace(seq, self._events[seq])
+        self._events[seq] = event
+        self._place(seq, event)
+
+    def remove(self, seq: int) -> None:
+        self._unplace(seq, self._events.pop(seq))
+        t, la, lo = self._keys.pop(seq)
+        row = self._rows[(t, la)]
+        row[lo].remove(seq)
+        if not row[lo]:
+            del row[lo]
+            if not row:
+                del self._rows[(t, la)]
+
+    def newest_first(self) -> List[EarthquakeEvent]:
+        return self._ordered[::-1]
+
+    def oldest_first(self) -> List[EarthquakeEvent]:
+        """The ordered events themselves; copy before changing the index."""
+        return self._ordered
+
+    def drain(self) -> List[Tuple[EarthquakeEvent, bool]]:
+        changes, self._changes = self._changes, []
+        return changes
+
+    def find_duplicate(
+        self, event: EarthquakeEvent
+    ) -> tuple[int, EarthquakeEvent] | None:
+        t, la, lo = self._key(event)
+        reach = min(_lon_reach(event.latitude), _LON_CELLS // 2)
+        span = 2 * reach + 1
+
+        candidates: List[int] = []
+        for dt in (-1, 0, 1):
+            for dla in (-1, 0, 1):
+                row = self._rows.get((t + dt, la + dla))
+                if not row:
+                    continue
+                if len(row) < span:
+                    for lon_cell, seqs in row.items():
+                        d = abs(lon_cell - lo) % _LON_CELLS
+                        if min(d, _LON_CELLS - d) <= reach:
+                            candidates.extend(seqs)
+                else:
+                    for d in range(-reach, reach + 1):
+                        seqs = row.get((lo + d) % _LON_CELLS)
+                        if seqs:
+                            candidates.extend(seqs)
+
+        for seq in sorted(candidates):
+            existing = self._events[seq]
+            if is_duplicate(event, existing):
+                return seq, existing
+        return None
+
+
+def _with_sources(
+    event: EarthquakeEvent, sources: List[str] | None
+) -> EarthquakeEvent:
+    # dataclasses.replace looks up the fields on every call
+    return EarthquakeEvent(
+        event.id,
+        event.source,
+        event.timestamp,
+        event.latitude,
+        event.longitude,
+        event.depth,
+        event.magnitude,
+        event.place,
+        sources,
+        event.raw,
+    )
+
+
+def _representative(members: Dict[str, EarthquakeEvent]) -> EarthquakeEvent:
+    """Highest-priority member, listing every other source that reported it."""
+    primary = None
+    for member in members.values():
+        if primary is None or SOURCE_PRIORITY.get(
+            member.source, 0
+        ) > SOURCE_PRIORITY.get(primary.source, 0):
+            primary = member
+
+    sources: List[str] = []
+    for member in members.values():
+        for source in (member.source, *(member.sources or ())):
+            if source != primary.source and source not in sources:
+                sources.append(source)
+    if sources == (primary.sources or []):
+        return primary
+    return _with_sources(primary, sources or None)
+
+
+class MergedCatalog:
+    """Merged events kept between refreshes, updated one event at a time.
+
+    Events reported by several sources form a cluster whose highest-priority
+    member represents it in the index. Unchanged events are recognised by id
+    and skipped, so the cost of an update follows the number of new or
+    changed events rather than the catalog size. Input events are never
+    modified, as parsed events are reused while a feed is unchanged.
+    """
+
+    def __init__(self) -> None:
+        self._index = MergeIndex()
+        # index sequence number -> member events by id, in arrival order
+        self._clusters: Dict[int, Dict[str, EarthquakeEvent]] = {}
+        self._owner: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def __iter__(self) -> Iterator[EarthquakeEvent]:
+        return iter(self._index)
+
+    @property
+    def duplicates(self) -> int:
+        """Events folded into another source's report of the same quake."""
+        return len(self._owner) - len(self._clusters)
+
+    def newest_first(self) -> List[EarthquakeEvent]:
+        """Merged events by origin time, without sorting the catalog."""
+        return self._index.newest_first()
+
+    def oldest_first(self) -> List[EarthquakeEvent]:
+        """Merged events by origin time; not to be kept across updates."""
+        return self._index.oldest_first()
+
+    def drain(self) -> List[Tuple[EarthquakeEvent, bool]]:
+        """Merged events added (True) or removed (False) since the last call.
+
+        A changed event is logged as its old version removed and its new
+        one added.
+        """
+        return self._index.drain()
+
+    def update(self, events: Iterable[EarthquakeEvent]) -> bool:
+        """Insert new events and re-merge changed ones; True if any were."""
+        changed = False
+        for event in events:
+            seq = self._owner.get(event.id)
+            if seq is not None:
+                known = self._clusters[seq][event.id]
+                if known is event or known == event:
+                    continue
+                self._retract(event.id)
+            self._insert(event)
+            changed = True
+        return changed
+
+    def member_places(self, event_id: str) -> List[str | None]:
+        """Place names of every report merged into the event with event_id."""
+        seq = self._owner.get(event_id)
+        if seq is None:
+            return []
+        return [member.place for member in self._clusters[seq].values()]
+
+    def discard(self, event_id: str) -> List[EarthquakeEvent]:
+        """Drop the merged event containing event_id, with all its members.
+
+        Returns the dropped members.
+        """
+        seq = self._owner.get(event_id)
+        if seq is None:
+            return []
+        members = self._clusters.pop(seq)
+        for member_id in members:
+            del self._owner[member_id]
+        self._index.remove(seq)
+        return list(members.values())
+
+    def _insert(self, event: EarthquakeEvent) -> None:
+        found = self._index.find_duplicate(event)
+        if found is None:
+            seq = self._index.add(event)
+            self._clusters[seq] = {event.id: event}
+            self._owner[event.id] = seq
+            return
+        seq, _ = found
+        members = self._clusters[seq]
+        members[event.id] = event
+        self._owner[event.id] = seq
+        self._represent(seq, members)
+
+    def _retract(self, event_id: str) -> None:
+        seq = self._owner.pop(event_id)
+        members = self._clusters[seq]
+        del members[event_id]
+        if members:
+            self._represent(seq, members)
+        else:
+            del self._clusters[seq]
+            self._index.remove(seq)
+
+    def _represent(self, seq: int, members: Dict[str, EarthquakeEvent]) -> None:
+        current = self._index.get(seq)
+        event = _representative(members)
+        if event.id == current.id:
+            self._index.replace(seq, event)
+            return
+        # A new primary may sit in another cell, so it is re-indexed
+        self._index.remove(seq)
+        del self._clusters[seq]
+        seq = self._index.add(event)
+        self._clusters[seq] = members
+        for member_id in members:
+            self._owner[member_id] = seq
+
+
+def merge_events(events: Iterable[EarthquakeEvent]) -> List[EarthquakeEvent]:
+    """Collapse events reported by several sources into one."""
+    catalog = MergedCatalog()
+    catalog.update(events)
+    return list(catalog)
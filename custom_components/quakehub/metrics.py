@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from collections import deque
+from math import ceil
+from typing import Any, Callable
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .const import METRICS_PERCENTILES, METRICS_SAMPLES
+from .feed import FetchStats
+
+
+class RollingStat:
+    """The last METRICS_SAMPLES values of one measurement."""
+
+    def __init__(self, size: int = METRICS_SAMPLES) -> None:
+        self._values: deque[float] = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        self._values.append(value)
+
+    @property
+    def last(self) -> float | None:
+        return self._values[-1] if self._values else None
+
+    def percentile(self, pct: float) -> float | None:
+        """Nearest-rank percentile of the retained samples."""
+        if not self._values:
+            return None
+        ordered = sorted(self._values)
+        return ordered[max(ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+    def as_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {"last": self.last, "samples": len(self._values)}
+        for pct in METRICS_PERCENTILES:
+            data[f"p{pct}"] = self.percentile(pct)
+        return data
+
+
+class SourceMetrics:
+    def __init__(self) -> None:
+        self.status: int | None = None
+        self.error: str | None = None
+        self.latency = RollingStat()
+        self.bytes = RollingStat()
+        self.decode = RollingStat()
+        self.parsed = RollingStat()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "latency_s": self.latency.as_dict(),
+            "bytes": self.bytes.as_dict(),
+            "decode_s": self.decode.as_dict(),
+            "parsed": self.parsed.as_dict(),
+        }
+
+
+class RefreshMetrics:
+    """Per-stage timings of hub refreshes, kept for diagnostics."""
+
+    def __init__(self, sources) -> None:
+        self.sources = {source: SourceMetrics() for source in sources}
+        self.refresh = RollingStat()
+        self.merge = RollingStat()
+        self.duplicates = RollingStat()
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def record_fetch(
+        self, source: str, stats: FetchStats, error: str | None = None
+    ) -> None:
+        metrics = self.sources[source]
+        metrics.status = stats.status
+        metrics.error = error
+        if stats.latency is not None:
+            metrics.latency.add(stats.latency)
+        if error is None:
+            metrics.bytes.add(stats.bytes)
+            metrics.decode.add(stats.decode)
+            metrics.parsed.add(stats.parsed)
+
+    def record_merge(self, seconds: float, duplicates: int) -> None:
+        self.merge.add(seconds)
+        self.duplicates.add(duplicates)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "refresh_s": self.refresh.as_dict(),
+            "merge_s": self.merge.as_dict(),
+            "duplicates": self.duplicates.as_dict(),
+            "sources": {s: m.as_dict() for s, m in self.sources.items()},
+        }
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DATA_HUB,
+    DOMAIN,
+    QUERY_DEFAULT_LIMIT,
+    QUERY_MAX_LIMIT,
+    SERVICE_QUERY,
+)
+from .geo import bounding_box
+from .merger import EarthquakeEvent, haversine_km
+
+ORDER_TIME = "time"
+ORDER_MAGNITUDE = "magnitude"
+ORDER_DISTANCE = "distance"
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_MAX_AGE = "max_age"
+ATTR_MIN_MAGNITUDE = "min_magnitude"
+ATTR_MAX_MAGNITUDE = "max_magnitude"
+ATTR_MIN_DEPTH = "min_depth"
+ATTR_MAX_DEPTH = "max_depth"
+ATTR_LATITUDE = "latitude"
+ATTR_LONGITUDE = "longitude"
+ATTR_MAX_DISTANCE = "max_distance"
+ATTR_MIN_LATITUDE = "min_latitude"
+ATTR_MAX_LATITUDE = "max_latitude"
+ATTR_MIN_LONGITUDE = "min_longitude"
+ATTR_MAX_LONGITUDE = "max_longitude"
+ATTR_SOURCES = "sources"
+ATTR_ORDER_BY = "order_by"
+ATTR_LIMIT = "limit"
+
+_FLOAT = vol.Coerce(float)
+
+QUERY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_MAX_AGE): cv.positive_time_period,
+        vol.Optional(ATTR_MIN_MAGNITUDE): _FLOAT,
+        vol.Optional(ATTR_MAX_MAGNITUDE): _FLOAT,
+        vol.Optional(ATTR_MIN_DEPTH): _FLOAT,
+        vol.Optional(ATTR_MAX_DEPTH): _FLOAT,
+        vol.Inclusive(ATTR_LATITUDE, "point"): cv.latitude,
+        vol.Inclusive(ATTR_LONGITUDE, "point"): cv.longitude,
+        vol.Optional(ATTR_MAX_DISTANCE): vol.All(_FLOAT, vol.Range(min=0)),
+        vol.Optional(ATTR_MIN_LATITUDE): cv.latitude,
+        vol.Optional(ATTR_MAX_LATITUDE): cv.latitude,
+        vol.Optional(ATTR_MIN_LONGITUDE): cv.longitude,
+        vol.Optional(ATTR_MAX_LONGITUDE): cv.longitude,
+        vol.Optional(ATTR_SOURCES): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_ORDER_BY, default=ORDER_TIME): vol.In(
+            [ORDER_TIME, ORDER_MAGNITUDE, ORDER_DISTANCE]
+        ),
+        vol.Optional(ATTR_LIMIT, default=QUERY_DEFAULT_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=QUERY_MAX_LIMIT)
+        ),
+    }
+)
+
+
+@dataclass
+class EventQuery:
+    start: float | None = None
+    end: float | None = None
+    min_magnitude: float | None = None
+    max_magnitude: float | None = None
+    min_depth: float | None = None
+    max_depth: float | None = None
+    latitude: float | None = None
+    longitude: float | None = None
+    max_distance: float | None = None
+    min_latitude: float | None = None
+    max_latitude: float | None = None
+    min_longitude: float | None = None
+    max_longitude: float | None = None
+    sources: frozenset[str] | None = None
+    order_by: str = ORDER_TIME
+    limit: int = QUERY_DEFAULT_LIMIT
+
+
+Match = Tuple[EarthquakeEvent, "float | None"]
+
+
+class EventIndex:
+    """Sorted time and magnitude indexes over one catalog snapshot.
+
+    A query walks whichever index narrows its time or magnitude range the
+    most. When that index is also the requested order it stops after
+    `limit` matches; otherwise the matches are ranked with a heap.
+    """
+
+    def __init__(self, events: Iterable[EarthquakeEvent]) -> None:
+        events = list(events)
+        self._by_time = sorted(events, key=lambda e: e.timestamp)
+        self._times = [e.timestamp for e in self._by_time]
+        self._by_mag = sorted(
+            (e for e in events if e.magnitude is not None),
+            key=lambda e: e.magnitude,
+        )
+        self._mags = [e.magnitude for e in self._by_mag]
+        self._no_mag = [e for e in events if e.magnitude is None]
+
+    def __len__(self) -> int:
+        return len(self._by_time)
+
+    def query(self, q: EventQuery) -> List[Match]:
+        t0 = 0 if q.start is None else bisect_left(self._times, q.start)
+        t1 = len(self._times) if q.end is None else bisect_right(self._times, q.end)
+        has_mag = q.min_magnitude is not None or q.max_magnitude is not None
+        m0 = 0 if q.min_magnitude is None else bisect_left(self._mags, q.min_magnitude)
+        m1 = (
+            len(self._mags)
+            if q.max_magnitude is None
+            else bisect_right(self._mags, q.max_magnitude)
+        )
+        time_size = max(t1 - t0, 0)
+        mag_size = max(m1 - m0, 0) + (0 if has_mag else len(self._no_mag))
+
+        if mag_size < time_size or (
+            mag_size == time_size and q.order_by == ORDER_MAGNITUDE
+        ):
+            # Strongest first, events of unknown magnitude last
+            candidates: Iterator[EarthquakeEvent] = (
+                self._by_mag[i] for i in range(m1 - 1, m0 - 1, -1)
+            )
+            if not has_mag:
+                candidates = chain(candidates, self._no_mag)
+            streaming = q.order_by == ORDER_MAGNITUDE
+        else:
+            # Newest first
+            candidates = (self._by_time[i] for i in range(t1 - 1, t0 - 1, -1))
+            streaming = q.order_by == ORDER_TIME
+
+        matches = _matches(candidates, q)
+        if streaming:
+            return list(islice(matches, q.limit))
+        if q.order_by == ORDER_DISTANCE and q.latitude is not None:
+            return heapq.nsmallest(q.limit, matches, key=lambda m: m[1])
+        if q.order_by == ORDER_MAGNITUDE:
+            key: Callable[[Match], float] = lambda m: (
+                m[0].magnitude if m[0].magnitude is not None else float("-inf")
+            )
+        else:
+            key = lambda m: m[0].timestamp
+        return heapq.nlargest(q.limit, matches, key=key)
+
+
+def _matches(candidates: Iterable[EarthquakeEvent], q: EventQuery) -> Iterator[Match]:
+    lat_band = None
+    if q.latitude is not None and q.max_distance is not None:
+        lat_band = bounding_box(q.latitude, q.longitude, q.max_distance)[:2]
+    lon_wraps = (
+        q.min_longitude is not None
+        and q.max_longitude is not None
+        and q.min_longitude > q.max_longitude
+    )
+
+    for e in candidates:
+        if q.start is not None and e.timestamp < q.start:
+            continue
+        if q.end is not None and e.timestamp > q.end:
+            continue
+        if q.min_magnitude is not None and (
+            e.magnitude is None or e.magnitude < q.min_magnitude
+        ):
+            continue
+        if q.max_magnitude is not None and (
+            e.magnitude is None or e.magnitude > q.max_magnitude
+        ):
+            continue
+        if q.min_depth is not None and (e.depth is None or e.depth < q.min_depth):
+            continue
+        if q.max_depth is not None and (e.depth is None or e.depth > q.max_depth):
+            continue
+        if q.min_latitude is not None and e.latitude < q.min_latitude:
+            continue
+        if q.max_latitude is not None and e.latitude > q.max_latitude:
+            continue
+        if lon_wraps:
+            # Box crossing the antimeridian
+            if q.max_longitude < e.longitude < q.min_longitude:
+                continue
+        else:
+            if q.min_longitude is not None and e.longitude < q.min_longitude:
+                continue
+            if q.max_longitude is not None and e.longitude > q.max_longitude:
+                continue
+        if q.sources is not None and not (
+            e.source in q.sources or any(s in q.sources for s in e.sources or ())
+        ):
+            continue
+
+        distance = None
+        if q.latitude is not None:
+            if lat_band is not None and not lat_band[0] <= e.latitude <= lat_band[1]:
+                continue
+            distance = haversine_km(q.latitude, q.longitude, e.latitude, e.longitude)
+            if q.max_distance is not None and distance > q.max_distance:
+                continue
+        yield e, distance
+
+
+class IndexCache:
+    """EventIndex of the latest catalog list, rebuilt when the list changes."""
+
+    def __init__(self) -> None:
+        self._events: Sequence[EarthquakeEvent] | None = None
+        self._index: EventIndex | None = None
+
+    def get(self, events: Sequence[EarthquakeEvent]) -> EventIndex:
+        if self._index is None or events is not self._events:
+            self._index = EventIndex(events)
+            self._events = events
+        return self._index
+
+
+def _timestamp(value: datetime) -> float:
+    return dt_util.as_utc(value).timestamp()
+
+
+def _as_dict(event: EarthquakeEvent, distance: float | None) -> dict[str, Any]:
+    return {
+        "id": event.id,
+        "time": event.time.isoformat(),
+        "magnitude": event.magnitude,
+        "depth": event.depth,
+        "latitude": event.latitude,
+        "longitude": event.longitude,
+        "place": event.place,
+        "source": event.source,
+        "sources": event.sources or [],
+        "distance_km": None if distance is None else round(distance, 1),
+    }
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    async def _async_query(call: ServiceCall) -> ServiceResponse:
+        data = call.data
+        entry_id = data.get(ATTR_ENTRY_ID)
+        if entry_id is not None:
+            coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+            if coordinator is None:
+                raise ServiceValidationError(f"Unknown QuakeHub entry {entry_id}")
+            events = coordinator.data or []
+            cache = coordinator.event_index
+            latitude, longitude = coordinator.lat, coordinator.lon
+        else:
+            hub = hass.data.get(DATA_HUB)
+            if hub is None:
+                raise ServiceValidationError("QuakeHub is not set up")
+            events = hub.data or []
+            cache = hub.event_index
+            latitude, longitude = hass.config.latitude, hass.config.longitude
+
+        start = _timestamp(data[ATTR_START]) if ATTR_START in data else None
+        if ATTR_MAX_AGE in data:
+            since = dt_util.utcnow().timestamp() - data[ATTR_MAX_AGE].total_seconds()
+            start = since if start is None else max(start, since)
+
+        query = EventQuery(
+            start=start,
+            end=_timestamp(data[ATTR_END]) if ATTR_END in data else None,
+            min_magnitude=data.get(ATTR_MIN_MAGNITUDE),
+            max_magnitude=data.get(ATTR_MAX_MAGNITUDE),
+            min_depth=data.get(ATTR_MIN_DEPTH),
+            max_depth=data.get(ATTR_MAX_DEPTH),
+            latitude=data.get(ATTR_LATITUDE, latitude),
+            longitude=data.get(ATTR_LONGITUDE, longitude),
+            max_distance=data.get(ATTR_MAX_DISTANCE),
+            min_latitude=data.get(ATTR_MIN_LATITUDE),
+            max_latitude=data.get(ATTR_MAX_LATITUDE),
+            min_longitude=data.get(ATTR_MIN_LONGITUDE),
+            max_longitude=data.get(ATTR_MAX_LONGITUDE),
+            sources=frozenset(data[ATTR_SOURCES]) if ATTR_SOURCES in data else None,
+            order_by=data[ATTR_ORDER_BY],
+            limit=data[ATTR_LIMIT],
+        )
+        matches = cache.get(events).query(query)
+        return {
+            "count": len(matches),
+            "events": [_as_dict(event, distance) for event, distance in matches],
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY,
+        _async_query,
+        schema=QUERY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Callable, Iterable, List, Sequence, Tuple
+
+from .merger import EarthquakeEvent, haversine_km
+
+# Cells per side of the grid laid over each polygon's bounding box
+_GRID = 64
+
+_OUTSIDE = 0
+_INSIDE = 1
+_BOUNDARY = 2
+
+Ring = Sequence[Sequence[float]]
+Edge = Tuple[float, float, float, float]
+# Event id -> place names of every report merged into that event
+MemberPlaces = Callable[[str], Iterable[str | None]]
+
+
+def _unwrap(ring: Ring) -> List[Tuple[float, float]]:
+    """Ring vertices with longitudes shifted so no edge spans over 180°.
+
+    A ring crossing the antimeridian then continues past ±180 instead of
+    jumping across the whole map.
+    """
+    points: List[Tuple[float, float]] = []
+    for p in ring:
+        x, y = float(p[0]), float(p[1])
+        if points:
+            x += 360 * round((points[-1][0] - x) / 360)
+        points.append((x, y))
+    return points
+
+
+def _crossings(x: float, y: float, edges: Iterable[Edge]) -> bool:
+    """Even-odd test of a ray cast from (x, y) towards +x."""
+    inside = False
+    for x1, y1, x2, y2 in edges:
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+class PreparedPolygon:
+    """One polygon (exterior ring plus holes) prepared for repeated lookups.
+
+    A grid over the bounding box marks every cell as inside, outside or on
+    the boundary. Points in inside or outside cells are answered from the
+    grid; boundary points run the crossing test against only the edges in
+    their latitude band.
+
+    Longitudes are unwrapped, so a polygon may cross the antimeridian
+    whether it is written with -170 or 190. Polygons around a pole are not
+    supported.
+    """
+
+    def __init__(self, rings: Sequence[Ring]) -> None:
+        edges: List[Edge] = []
+        points: List[Tuple[float, float]] = []
+        centre = None
+        for ring in rings:
+            ring_points = _unwrap(ring)
+            if len(ring_points) < 3:
+                continue
+            # Holes are moved next to the exterior ring they belong to
+            xs = [x for x, _ in ring_points]
+            mid = (min(xs) + max(xs)) / 2
+            if centre is None:
+                centre = mid
+            elif shift := 360 * round((centre - mid) / 360):
+                ring_points = [(x + shift, y) for x, y in ring_points]
+            points.extend(ring_points)
+            closed = ring_points[1:] + ring_points[:1]
+            for (x1, y1), (x2, y2) in zip(ring_points, closed):
+                edges.append((x1, y1, x2, y2))
+        if all(y1 == y2 for _, y1, _, y2 in edges):
+            raise ValueError("polygon has no area")
+
+        self.points = points
+        self.min_x = min(x for x, _ in points)
+        self.max_x = max(x for x, _ in points)
+        self.min_y = min(y for _, y in points)
+        self.max_y = max(y for _, y in points)
+        self._dx = (self.max_x - self.min_x) / _GRID or 1.0
+        self._dy = (self.max_y - self.min_y) / _GRID or 1.0
+
+        self._bands: List[List[Edge]] = [[] for _ in range(_GRID)]
+        cells = bytearray(_GRID * _GRID)
+        for edge in edges:
+            x1, y1, x2, y2 = edge
+            r0, r1 = sorted((self._row(y1), self._row(y2)))
+            c0, c1 = sorted((self._col(x1), self._col(x2)))
+            for row in range(r0, r1 + 1):
+                # Horizontal edges never cross the ray, but still split cells
+                if y1 != y2:
+                    self._bands[row].append(edge)
+                for col in range(c0, c1 + 1):
+                    cells[row * _GRID + col] = _BOUNDARY
+
+        for row in range(_GRID):
+            y = self.min_y + (row + 0.5) * self._dy
+            for col in range(_GRID):
+                i = row * _GRID + col
+                if cells[i] != _BOUNDARY:
+                    x = self.min_x + (col + 0.5) * self._dx
+                    if _crossings(x, y, self._bands[row]):
+                        cells[i] = _INSIDE
+        self._cells = cells
+
+    def _row(self, y: float) -> int:
+        return min(int((y - self.min_y) / self._dy), _GRID - 1)
+
+    def _col(self, x: float) -> int:
+        return min(int((x - self.min_x) / self._dx), _GRID - 1)
+
+    def contains(self, x: float, y: float) -> bool:
+        if x < self.min_x:
+            x += 360
+        elif x > self.max_x:
+            x -= 360
+        if not (self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y):
+            return False
+        row = self._row(y)
+        state = self._cells[row * _GRID + self._col(x)]
+        if state == _BOUNDARY:
+            return _crossings(x, y, self._bands[row])
+        return state == _INSIDE
+
+
+class PolygonRegion:
+    """Union of GeoJSON polygons."""
+
+    def __init__(self, polygons: Sequence[PreparedPolygon]) -> None:
+        self.polygons = list(polygons)
+        self.min_x = min(p.min_x for p in self.polygons)
+        self.max_x = max(p.max_x for p in self.polygons)
+        self.min_y = min(p.min_y for p in self.polygons)
+        self.max_y = max(p.max_y for p in self.polygons)
+        self.bounding_circle = self._bounding_circle()
+
+    def contains(self, event: EarthquakeEvent) -> bool:
+        # Longitudes are left to each polygon, which may be unwrapped
+        x, y = event.longitude, event.latitude
+        if not self.min_y <= y <= self.max_y:
+            return False
+        return any(p.contains(x, y) for p in self.polygons)
+
+    def filter(
+        self,
+        events: Iterable[EarthquakeEvent],
+        member_places: MemberPlaces | None = None,
+    ) -> List[EarthquakeEvent]:
+        return [e for e in events if self.contains(e)]
+
+    def _bounding_circle(self) -> tuple[float, float, float]:
+        """Circle around every vertex, for server-side pre-filtering."""
+        lat = (self.min_y + self.max_y) / 2
+        lon = (self.min_x + self.max_x) / 2
+        lon = (lon + 180) % 360 - 180
+        radius = max(
+            haversine_km(lat, lon, y, x) for p in self.polygons for x, y in p.points
+        )
+        # Edges bulge slightly beyond their vertices on the sphere
+        return lat, lon, radius * 1.01 + 1
+
+
+class NamedRegion:
+    """Flinn-Engdahl regions, matched on the region name providers report.
+
+    EMSC and GEOFON label events with their Flinn-Engdahl region; events
+    from other providers only match once merged with one of those, so the
+    place of every merged report is checked, not just the primary one.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self.names = {name.strip().upper() for name in names if name.strip()}
+        if not self.names:
+            raise ValueError("no region name given")
+        self.bounding_circle = None
+
+    def contains(
+        self, event: EarthquakeEvent, member_places: MemberPlaces | None = None
+    ) -> bool:
+        places = [event.place]
+        if member_places is not None:
+            places.extend(member_places(event.id))
+        return any(place and place.upper() in self.names for place in places)
+
+    def filter(
+        self,
+        events: Iterable[EarthquakeEvent],
+        member_places: MemberPlaces | None = None,
+    ) -> List[EarthquakeEvent]:
+        return [e for e in events if self.contains(e, member_places)]
+
+
+def _geometries(obj: Any) -> Iterable[dict[str, Any]]:
+    if not isinstance(obj, dict):
+        raise ValueError("GeoJSON geometry must be an object")
+    kind = obj.get("type")
+    if kind == "FeatureCollection":
+        for feature in _members(obj, "features"):
+            yield from _geometries(feature)
+    elif kind == "Feature":
+        if obj.get("geometry") is not None:
+            yield from _geometries(obj["geometry"])
+    elif kind == "GeometryCollection":
+        for geometry in _members(obj, "geometries"):
+            yield from _geometries(geometry)
+    else:
+        yield obj
+
+
+def _members(obj: dict[str, Any], key: str) -> list:
+    value = obj.get(key, [])
+    if not isinstance(value, list):
+        raise ValueError(f"GeoJSON {key} must be an array")
+    return value
+
+
+def _rings(coords: Any) -> List[List[Tuple[float, float]]]:
+    """Polygon coordinates checked for shape, as lists of (lon, lat)."""
+    if not isinstance(coords, list):
+        raise ValueError("polygon coordinates must be an array of rings")
+    rings = []
+    for ring in coords:
+        if not isinstance(ring, list):
+            raise ValueError("polygon ring must be an array of positions")
+        points = []
+        for p in ring:
+            if (
+                not isinstance(p, list)
+                or len(p) < 2
+                or not all(
+                    isinstance(v, (int, float)) and not isinstance(v, bool)
+                    for v in p[:2]
+                )
+                or not all(math.isfinite(v) for v in p[:2])
+            ):
+                raise ValueError(f"invalid position {p!r}")
+            points.append((float(p[0]), float(p[1])))
+        rings.append(points)
+    return rings
+
+
+def parse_region(value: str) -> PolygonRegion | NamedRegion:
+    """Build a region from GeoJSON text or ';'-separated region names.
+
+    Raises ValueError if the value describes no usable region.
+    """
+    value = (value or "").strip()
+    if not value.startswith(("{", "[")):
+        return NamedRegion(value.split(";"))
+
+    try:
+        obj = json.loads(value)
+    except ValueError as err:
+        raise ValueError(f"invalid GeoJSON: {err}") from err
+    if not isinstance(obj, dict):
+        raise ValueError("GeoJSON must be an object")
+
+    polygons: List[PreparedPolygon] = []
+    for geometry in _geometries(obj):
+        kind = geometry.get("type")
+        coords = geometry.get("coordinates")
+        if kind == "Polygon":
+            polygons.append(PreparedPolygon(_rings(coords)))
+        elif kind == "MultiPolygon":
+            if not isinstance(coords, list):
+                raise ValueError("MultiPolygon coordinates must be an array")
+            polygons.extend(PreparedPolygon(_rings(rings)) for rings in coords)
+    if not polygons:
+        raise ValueError("GeoJSON contains no Polygon or MultiPolygon")
+    return PolygonRegion(polygons)
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from itertools import chain
+from math import log10
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from .const import (
+    DEFAULT_KEEP_MAGNITUDE,
+    DEFAULT_MAX_AGE,
+    DEFAULT_MAX_EVENTS,
+    DEFAULT_MEMORY_BUDGET,
+    RETENTION_DISTANCE_WEIGHT,
+    RETENTION_OLDEST,
+    RETENTION_WEAKEST,
+)
+from .geo import distances_km
+from .merger import EarthquakeEvent
+
+REASON_AGE = "age"
+REASON_COUNT = "count"
+REASON_BYTES = "bytes"
+
+# Merge index, cluster and lookup entries per merged event, measured with
+# tracemalloc on synthetic catalogs
+_CATALOG_OVERHEAD = 1300
+
+Area = Tuple[float, float, float]
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    max_age: float = DEFAULT_MAX_AGE * 86400  # seconds
+    max_events: int = DEFAULT_MAX_EVENTS
+    max_bytes: int = DEFAULT_MEMORY_BUDGET * 1024 * 1024
+    evict: str = RETENTION_OLDEST
+    # Events at least this strong are never evicted for count or memory
+    keep_magnitude: float = DEFAULT_KEEP_MAGNITUDE
+
+
+def combine_policies(policies: Iterable[RetentionPolicy]) -> RetentionPolicy:
+    """The shared catalog keeps whatever any entry asked to keep."""
+    policies = list(policies)
+    if not policies:
+        return RetentionPolicy()
+    weakest = all(p.evict == RETENTION_WEAKEST for p in policies)
+    return RetentionPolicy(
+        max_age=max(p.max_age for p in policies),
+        max_events=max(p.max_events for p in policies),
+        max_bytes=max(p.max_bytes for p in policies),
+        evict=RETENTION_WEAKEST if weakest else RETENTION_OLDEST,
+        keep_magnitude=min(p.keep_magnitude for p in policies),
+    )
+
+
+def _deep_size(obj: Any) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_size(v) for v in obj)
+    return size
+
+
+def event_size(event: EarthquakeEvent) -> int:
+    """Approximate bytes one merged event holds; shared strings not counted."""
+    size = _CATALOG_OVERHEAD + sys.getsizeof(event) + sys.getsizeof(event.id)
+    if event.sources:
+        size += sys.getsizeof(event.sources)
+    if event.raw is not None:
+        size += _deep_size(event.raw)
+    return size
+
+
+class Retention:
+    """Keeps the merged catalog within an age, event count and memory budget.
+
+    Evicted events are remembered until they age out, so events still
+    listed in a provider's feed are not merged back in on the next refresh.
+    Events of at least `keep_magnitude` only ever leave by age, and are let
+    back in when a provider revises an evicted event up to that magnitude.
+
+    Totals follow the catalog's change log, so checking the limits does not
+    walk the catalog.
+    """
+
+    def __init__(self, policy: RetentionPolicy | None = None) -> None:
+        self.size = 0
+        self.bytes = 0
+        self.evicted = {REASON_AGE: 0, REASON_COUNT: 0, REASON_BYTES: 0}
+        # Tracked event id -> (approximate bytes, magnitude)
+        self._tracked: Dict[str, Tuple[int, float | None]] = {}
+        # Evicted id -> (origin time, magnitude)
+        self._tombstones: Dict[str, Tuple[float, float | None]] = {}
+        # Age cutoff of the last selection; older events need no tombstone
+        self._cutoff = 0.0
+        # Events that cannot be evicted may hold the catalog above its limits
+        self._protected_count = 0
+        self._protected_bytes = 0
+        self.policy = policy or RetentionPolicy()
+
+    @property
+    def policy(self) -> RetentionPolicy:
+        return self._policy
+
+    @policy.setter
+    def policy(self, policy: RetentionPolicy) -> None:
+        self._policy = policy
+        protected = [
+            size
+            for size, magnitude in self._tracked.values()
+            if magnitude is not None and magnitude >= policy.keep_magnitude
+        ]
+        self._protected_count = len(protected)
+        self._protected_bytes = sum(protected)
+
+    def _protected(self, event: EarthquakeEvent) -> bool:
+        return (
+            event.magnitude is not None
+            and event.magnitude >= self.policy.keep_magnitude
+        )
+
+    def admit(
+        self, events: Iterable[EarthquakeEvent], now: float
+    ) -> List[EarthquakeEvent]:
+        """Events allowed into the catalog: recent enough, not evicted before."""
+        cutoff = now - self.policy.max_age
+        tombstones = self._tombstones
+        admitted = []
+        for e in events:
+            if e.timestamp < cutoff:
+                continue
+            tombstone = tombstones.get(e.id)
+            if tombstone is not None:
+                if e.magnitude == tombstone[1] or not self._protected(e):
+                    continue
+                del tombstones[e.id]
+            admitted.append(e)
+        return admitted
+
+    def track(self, changes: Iterable[Tuple[EarthquakeEvent, bool]]) -> bool:
+        """Count events added to (True) or removed from (False) the catalog.
+
+        Returns whether there were any changes.
+        """
+        tracked = self._tracked
+        changed = False
+        for event, added in changes:
+            changed = True
+            if added:
+                size = event_size(event)
+                tracked[event.id] = (size, event.magnitude)
+                sign = 1
+            else:
+                size, _ = tracked.pop(event.id)
+                sign = -1
+            self.size += sign
+            self.bytes += sign * size
+            if self._protected(event):
+                self._protected_count += sign
+                self._protected_bytes += sign * size
+        return changed
+
+    def exceeded(self, oldest: EarthquakeEvent | None, now: float) -> bool:
+        """Whether the tracked catalog, oldest event given, breaks any limit."""
+        if oldest is None:
+            return False
+        policy = self.policy
+        return (
+            oldest.timestamp < now - policy.max_age
+            or self.size > max(policy.max_events, self._protected_count)
+            or self.bytes > max(policy.max_bytes, self._protected_bytes)
+        )
+
+    def select(
+        self,
+        events: Iterable[EarthquakeEvent],
+        now: float,
+        areas: Sequence[Area | None] = (),
+    ) -> List[EarthquakeEvent]:
+        """Events to evict from the tracked catalog, given oldest first.
+
+        Oldest-first eviction stops reading `events` once the catalog is
+        back within its limits. Distances for weakest-first eviction are
+        measured from the nearest of `areas`, zero inside one.
+        """
+        policy = self.policy
+        cutoff = now - policy.max_age
+        events = iter(events)
+        evicted: List[EarthquakeEvent] = []
+        rest: List[EarthquakeEvent] = []
+        for e in events:
+            if e.timestamp >= cutoff:
+                rest.append(e)
+                break
+            evicted.append(e)
+        self.evicted[REASON_AGE] += len(evicted)
+
+        sizes = self._tracked
+        over_count = self.size - len(evicted) - policy.max_events
+        over_bytes = self.bytes - policy.max_bytes
+        over_bytes -= sum(sizes[e.id][0] for e in evicted)
+        if over_count > 0 or over_bytes > 0:
+            candidates: Iterable[EarthquakeEvent] = (
+                e for e in chain(rest, events) if not self._protected(e)
+            )
+            if policy.evict == RETENTION_WEAKEST:
+                candidates = self._weakest_first(list(candidates), areas)
+            for e in candidates:
+                if over_count <= 0 and over_bytes <= 0:
+                    break
+                reason = REASON_COUNT if over_count > 0 else REASON_BYTES
+                self.evicted[reason] += 1
+                evicted.append(e)
+                over_count -= 1
+                over_bytes -= sizes[e.id][0]
+
+        self._cutoff = cutoff
+        self._tombstones = {
+            eid: tombstone
+            for eid, tombstone in self._tombstones.items()
+            if tombstone[0] >= cutoff
+        }
+        return evicted
+
+    def remember(self, events: Iterable[EarthquakeEvent]) -> None:
+        """Keep evicted events out of the catalog until they age out."""
+        for e in events:
+            if e.timestamp >= self._cutoff:
+                self._tombstones[e.id] = (e.timestamp, e.magnitude)
+
+    def _weakest_first(
+        self, events: List[EarthquakeEvent], areas: Sequence[Area | None]
+    ) -> List[EarthquakeEvent]:
+        outside = [0.0] * len(events)
+        if areas and all(area is not None for area in areas):
+            outside = [float("inf")] * len(events)
+            for lat, lon, radius in areas:
+                for i, d in enumerate(distances_km(lat, lon, events)):
+                    if d - radius < outside[i]:
+                        outside[i] = max(d - radius, 0.0)
+
+        def score(i: int) -> float:
+            mag = events[i].magnitude
+            if mag is None:
+                return float("-inf")
+            return mag - RETENTION_DISTANCE_WEIGHT * log10(1 + outside[i] / 100)
+
+        return [events[i] for i in sorted(range(len(events)), key=score)]
+
+    def as_dict(self) -> dict[str, Any]:
+        policy = self.policy
+        return {
+            "events": self.size,
+            "bytes": self.bytes,
+            "evicted": dict(self.evicted),
+            "tombstones": len(self._tombstones),
+            "max_age_s": policy.max_age,
+            "max_events": policy.max_events,
+            "max_bytes": policy.max_bytes,
+            "evict": policy.evict,
+            "keep_magnitude": policy.keep_magnitude,
+        }
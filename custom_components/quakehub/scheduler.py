@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from .const import (
+    BOOST_INTERVAL,
+    ERROR_MAX_INTERVAL,
+    MIN_POLL_INTERVAL,
+    UNCHANGED_BACKOFF,
+    UNCHANGED_MAX_FACTOR,
+)
+
+
+@dataclass
+class SourceSchedule:
+    base: float
+    interval: float
+    next_due: float = 0.0
+    boost_until: float = 0.0
+    signature: int | None = None
+    errors: int = 0
+
+    def record_success(
+        self, now: float, signature: int, retry_after: float | None = None
+    ) -> None:
+        changed = signature != self.signature
+        self.signature = signature
+        self.errors = 0
+        if now < self.boost_until:
+            self.interval = min(self.base, BOOST_INTERVAL)
+        elif changed:
+            self.interval = self.base
+        else:
+            self.interval = min(
+                self.interval * UNCHANGED_BACKOFF, self.base * UNCHANGED_MAX_FACTOR
+            )
+        self.next_due = now + max(self.interval, retry_after or 0)
+
+    def record_error(self, now: float, retry_after: float | None = None) -> None:
+        self.errors += 1
+        self.interval = min(max(self.interval, self.base) * 2, ERROR_MAX_INTERVAL)
+        self.next_due = now + max(self.interval, retry_after or 0)
+
+    def boost(self, now: float, until: float) -> None:
+        self.boost_until = max(self.boost_until, until)
+        if not self.errors:
+            self.interval = min(self.base, BOOST_INTERVAL)
+            self.next_due = min(self.next_due, now + self.interval)
+
+
+class SourceScheduler:
+    """Independent poll schedule per source.
+
+    A source backs off while its feed is unchanged or failing, honours
+    Retry-After, and polls at BOOST_INTERVAL while a boost is active.
+    """
+
+    def __init__(self) -> None:
+        self._schedules: Dict[str, SourceSchedule] = {}
+
+    def configure(self, sources: Iterable[str], base_interval: float) -> None:
+        sources = set(sources)
+        for source in list(self._schedules):
+            if source not in sources:
+                del self._schedules[source]
+        for source in sources:
+            schedule = self._schedules.get(source)
+            if schedule is None:
+                self._schedules[source] = SourceSchedule(base_interval, base_interval)
+            elif schedule.base != base_interval:
+                schedule.base = schedule.interval = base_interval
+                schedule.next_due = min(schedule.next_due, time.monotonic())
+
+    def __getitem__(self, source: str) -> SourceSchedule:
+        return self._schedules[source]
+
+    def __contains__(self, source: str) -> bool:
+        return source in self._schedules
+
+    def due(self, now: float) -> List[str]:
+        return [s for s, sched in self._schedules.items() if sched.next_due <= now]
+
+    def boost(self, duration: float) -> None:
+        now = time.monotonic()
+        for schedule in self._schedules.values():
+            schedule.boost(now, now + duration)
+
+    def seconds_until_due(self, now: float) -> float:
+        if not self._schedules:
+            return MIN_POLL_INTERVAL
+        soonest = min(s.next_due for s in self._schedules.values())
+        return max(soonest - now, MIN_POLL_INTERVAL)
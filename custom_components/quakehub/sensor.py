@@ -1,131 +1,434 @@
-from __future__ import annotations
-
-from datetime import datetime, timedelta
-from typing import Any
-
-from homeassistant.components.sensor import SensorEntity
-from homeassistant.core import HomeAssistant
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-
-from .const import DOMAIN
-from .coordinator import EarthquakeCoordinator
-from .merger import EarthquakeEvent
-
-
-async def async_setup_entry(
-    hass: HomeAssistant,
-    entry: ConfigEntry,
-    async_add_entities: AddEntitiesCallback,
-) -> None:
-    coordinator: EarthquakeCoordinator = hass.data[DOMAIN][entry.entry_id]
-
-    entities: list[SensorEntity] = [
-        LatestEarthquakeSensor(coordinator, entry),
-        StrongestEarthquake24hSensor(coordinator, entry),
-        CountEarthquakes24hSensor(coordinator, entry),
-    ]
-
-    async_add_entities(entities)
-
-
-class BaseQuakeSensor(CoordinatorEntity, SensorEntity):
-    def __init__(self, coordinator: EarthquakeCoordinator, entry: ConfigEntry):
-        super().__init__(coordinator)
-        self._entry = entry
-
-    @property
-    def should_poll(self) -> bool:
-        return False
-
-
-class LatestEarthquakeSensor(BaseQuakeSensor):
-    _attr_icon = "mdi:earthquake"
-
-    @property
-    def unique_id(self) -> str:
-        return f"{DOMAIN}_{self._entry.entry_id}_latest"
-
-    @property
-    def name(self) -> str:
-        return "QuakeHub Latest Earthquake"
-
-    @property
-    def native_value(self) -> float | None:
-        events: list[EarthquakeEvent] = self.coordinator.data or []
-        if not events:
-            return None
-        return events[0].magnitude
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        events: list[EarthquakeEvent] = self.coordinator.data or []
-        if not events:
-            return {}
-        e = events[0]
-        return {
-            "time": e.time.isoformat(),
-            "place": e.place,
-            "source": e.source,
-            "latitude": e.latitude,
-            "longitude": e.longitude,
-            "depth": e.depth,
-        }
-
-
-class StrongestEarthquake24hSensor(BaseQuakeSensor):
-    _attr_icon = "mdi:earthquake"
-
-    @property
-    def unique_id(self) -> str:
-        return f"{DOMAIN}_{self._entry.entry_id}_strongest_24h"
-
-    @property
-    def name(self) -> str:
-        return "QuakeHub Strongest (24h)"
-
-    @property
-    def native_value(self) -> float | None:
-        events: list[EarthquakeEvent] = self.coordinator.data or []
-        cutoff = datetime.utcnow() - timedelta(hours=24)
-        recent = [e for e in events if e.time.replace(tzinfo=None) >= cutoff]
-        if not recent:
-            return None
-        return max((e.magnitude or 0 for e in recent), default=None)
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        events: list[EarthquakeEvent] = self.coordinator.data or []
-        cutoff = datetime.utcnow() - timedelta(hours=24)
-        recent = [e for e in events if e.time.replace(tzinfo=None) >= cutoff]
-        if not recent:
-            return {}
-        strongest = max(recent, key=lambda e: e.magnitude or 0)
-        return {
-            "time": strongest.time.isoformat(),
-            "place": strongest.place,
-            "source": strongest.source,
-            "latitude": strongest.latitude,
-            "longitude": strongest.longitude,
-            "depth": strongest.depth,
-        }
-
-
-class CountEarthquakes24hSensor(BaseQuakeSensor):
-    _attr_icon = "mdi:counter"
-
-    @property
-    def unique_id(self) -> str:
-        return f"{DOMAIN}_{self._entry.entry_id}_count_24h"
-
-    @property
-    def name(self) -> str:
-        return "QuakeHub Count (24h)"
-
-    @property
-    def native_value(self) -> int:
-        events: list[EarthquakeEvent] = self.coordinator.data or []
-        cutoff = datetime.utcnow() - timedelta(hours=24)
-        recent = [e for e in events if e.time.replace(tzinfo=None) >= cutoff]
-        return len(recent)
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import slugify
+
+from .const import (
+    AGGREGATE_WINDOWS,
+    BAND_SENSOR_WINDOW,
+    DOMAIN,
+    MAGNITUDE_BANDS,
+    POINT_SENSOR_WINDOW,
+)
+from .aggregates import EventAggregator
+from .coordinator import EarthquakeCoordinator
+from .merger import EarthquakeEvent
+from .metrics import RollingStat
+from .retention import REASON_AGE, REASON_BYTES, REASON_COUNT
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    coordinator: EarthquakeCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    entities: list[SensorEntity] = [LatestEarthquakeSensor(coordinator, entry)]
+    for window in AGGREGATE_WINDOWS:
+        entities.append(StrongestEarthquakeSensor(coordinator, entry, window))
+        entities.append(CountEarthquakesSensor(coordinator, entry, window))
+    for band, _, _ in MAGNITUDE_BANDS:
+        entities.append(
+            CountEarthquakesBandSensor(coordinator, entry, BAND_SENSOR_WINDOW, band)
+        )
+    for point in coordinator.points:
+        entities.append(LatestEarthquakeSensor(coordinator, entry, point.name))
+        entities.append(
+            StrongestEarthquakeSensor(
+                coordinator, entry, POINT_SENSOR_WINDOW, point.name
+            )
+        )
+        entities.append(
+            CountEarthquakesSensor(coordinator, entry, POINT_SENSOR_WINDOW, point.name)
+        )
+    for source in sorted(coordinator.sources):
+        entities.append(SourceLatencySensor(coordinator, entry, source))
+    entities.append(MergeTimeSensor(coordinator, entry))
+    entities.append(CatalogSizeSensor(coordinator, entry))
+    entities.append(RadiusFilteredSensor(coordinator, entry))
+
+    async_add_entities(entities)
+
+
+class BaseQuakeSensor(CoordinatorEntity, SensorEntity):
+    def __init__(
+        self,
+        coordinator: EarthquakeCoordinator,
+        entry: ConfigEntry,
+        point: str | None = None,
+    ):
+        super().__init__(coordinator)
+        self._entry = entry
+        # Watchlist point this sensor covers, or None for the whole entry
+        self._point = point
+        # Fingerprint of the state last written
+        self._written: Any = None
+
+    @property
+    def _suffix(self) -> str:
+        return f"_{slugify(self._point)}" if self._point else ""
+
+    @property
+    def _prefix(self) -> str:
+        return f"QuakeHub {self._point}" if self._point else "QuakeHub"
+
+    @property
+    def _events(self) -> list[EarthquakeEvent]:
+        if self._point is None:
+            return self.coordinator.data or []
+        return self.coordinator.point_events.get(self._point, [])
+
+    @property
+    def _aggregates(self) -> EventAggregator:
+        if self._point is None:
+            return self.coordinator.aggregates
+        return self.coordinator.point_aggregates[self._point]
+
+    @property
+    def should_poll(self) -> bool:
+        return False
+
+    def _fingerprint(self) -> Any:
+        """Compares equal whenever the rendered state and attributes would.
+
+        Subclasses replace it with something cheaper than rendering. Nothing
+        in it may change with the clock alone, or every update is written.
+        """
+        return self.native_value, self.extra_state_attributes
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._written = (self.available, self._fingerprint())
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        fingerprint = (self.available, self._fingerprint())
+        if fingerprint == self._written:
+            self.coordinator.state_writes["skipped"] += 1
+            return
+        self._written = fingerprint
+        self.coordinator.state_writes["written"] += 1
+        self.async_write_ha_state()
+
+
+class LatestEarthquakeSensor(BaseQuakeSensor):
+    _attr_icon = "mdi:earthquake"
+
+    @property
+    def unique_id(self) -> str:
+        return f"{DOMAIN}_{self._entry.entry_id}_latest{self._suffix}"
+
+    @property
+    def name(self) -> str:
+        return f"{self._prefix} Latest Earthquake"
+
+    @property
+    def native_value(self) -> float | None:
+        events = self._events
+        if not events:
+            return None
+        return events[0].magnitude
+
+    def _fingerprint(self) -> Any:
+        events = self._events
+        if not events:
+            return None
+        distance = None
+        if self._point is not None:
+            distance = self.coordinator.point_distances[self._point].get(events[0].id)
+        return events[0], distance, self._source_updated(), self._stale_sources()
+
+    def _source_updated(self) -> dict[str, str]:
+        last = self.coordinator.hub.last_success_at
+        return {
+            s: datetime.fromtimestamp(last[s], tz=timezone.utc).isoformat()
+            for s in sorted(self.coordinator.sources)
+            if s in last
+        }
+
+    def _stale_sources(self) -> list[str]:
+        sources = self.coordinator.sources
+        return [s for s in self.coordinator.hub.stale_sources if s in sources]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        events = self._events
+        if not events:
+            return {}
+        e = events[0]
+        attrs = {
+            "time": e.time.isoformat(),
+            "place": e.place,
+            "source": e.source,
+            "latitude": e.latitude,
+            "longitude": e.longitude,
+            "depth": e.depth,
+            "source_updated": self._source_updated(),
+            "stale_sources": self._stale_sources(),
+        }
+        if self._point is not None:
+            distance = self.coordinator.point_distances[self._point].get(e.id)
+            attrs["distance_km"] = None if distance is None else round(distance, 1)
+        return attrs
+
+
+class StrongestEarthquakeSensor(BaseQuakeSensor):
+    _attr_icon = "mdi:earthquake"
+
+    def __init__(
+        self,
+        coordinator: EarthquakeCoordinator,
+        entry: ConfigEntry,
+        window: str,
+        point: str | None = None,
+    ):
+        super().__init__(coordinator, entry, point)
+        self._window = window
+
+    @property
+    def unique_id(self) -> str:
+        return (
+            f"{DOMAIN}_{self._entry.entry_id}_strongest_{self._window}{self._suffix}"
+        )
+
+    @property
+    def name(self) -> str:
+        return f"{self._prefix} Strongest ({self._window})"
+
+    def _fingerprint(self) -> Any:
+        return self._aggregates.windows[self._window].strongest
+
+    @property
+    def native_value(self) -> float | None:
+        strongest = self._aggregates.windows[self._window].strongest
+        if strongest is None:
+            return None
+        return strongest.magnitude or 0
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        strongest = self._aggregates.windows[self._window].strongest
+        if strongest is None:
+            return {}
+        return {
+            "time": strongest.time.isoformat(),
+            "place": strongest.place,
+            "source": strongest.source,
+            "latitude": strongest.latitude,
+            "longitude": strongest.longitude,
+            "depth": strongest.depth,
+        }
+
+
+class CountEarthquakesSensor(BaseQuakeSensor):
+    _attr_icon = "mdi:counter"
+
+    def __init__(
+        self,
+        coordinator: EarthquakeCoordinator,
+        entry: ConfigEntry,
+        window: str,
+        point: str | None = None,
+    ):
+        super().__init__(coordinator, entry, point)
+        self._window = window
+
+    @property
+    def unique_id(self) -> str:
+        return f"{DOMAIN}_{self._entry.entry_id}_count_{self._window}{self._suffix}"
+
+    @property
+    def name(self) -> str:
+        return f"{self._prefix} Count ({self._window})"
+
+    def _fingerprint(self) -> Any:
+        window = self._aggregates.windows[self._window]
+        return window.count, window.band_counts
+
+    @property
+    def native_value(self) -> int:
+        return self._aggregates.windows[self._window].count
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return self._aggregates.windows[self._window].band_counts
+
+
+class CountEarthquakesBandSensor(BaseQuakeSensor):
+    _attr_icon = "mdi:counter"
+
+    def __init__(
+        self,
+        coordinator: EarthquakeCoordinator,
+        entry: ConfigEntry,
+        window: str,
+        band: str,
+    ):
+        super().__init__(coordinator, entry)
+        self._window = window
+        self._band = band
+
+    @property
+    def unique_id(self) -> str:
+        return f"{DOMAIN}_{self._entry.entry_id}_count_{self._window}_{self._band}"
+
+    @property
+    def name(self) -> str:
+        return f"QuakeHub Count {self._band} ({self._window})"
+
+    def _fingerprint(self) -> Any:
+        return self.native_value
+
+    @property
+    def native_value(self) -> int:
+        return self.coordinator.aggregates.windows[self._window].band_counts[
+            self._band
+        ]
+
+
+def _ms(value: float | None) -> float | None:
+    return None if value is None else round(value * 1000, 1)
+
+
+def _percentiles_ms(stat: RollingStat) -> dict[str, float | None]:
+    return {k: _ms(v) for k, v in stat.as_dict().items() if k.startswith("p")}
+
+
+class BaseDiagnosticSensor(SensorEntity):
+    """Refresh instrumentation of the shared hub, updated after every fetch.
+
+    The hub only notifies entries when the catalog changes, so these listen
+    to the hub metrics directly.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator: EarthquakeCoordinator, entry: ConfigEntry):
+        self.coordinator = coordinator
+        self._entry = entry
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.hub.metrics.async_add_listener(self.async_write_ha_state)
+        )
+
+
+class SourceLatencySensor(BaseDiagnosticSensor):
+    _attr_icon = "mdi:timer-outline"
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    def __init__(
+        self, coordinator: EarthquakeCoordinator, entry: ConfigEntry, source: str
+    ):
+        super().__init__(coordinator, entry)
+        self._source = source
+
+    @property
+    def unique_id(self) -> str:
+        return f"{DOMAIN}_{self._entry.entry_id}_latency_{self._source}"
+
+    @property
+    def name(self) -> str:
+        return f"QuakeHub {self._source.upper()} Latency"
+
+    @property
+    def native_value(self) -> float | None:
+        return _ms(self.coordinator.hub.metrics.sources[self._source].latency.last)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        metrics = self.coordinator.hub.metrics.sources[self._source]
+        return {
+            "status": metrics.status,
+            "error": metrics.error,
+            "bytes": metrics.bytes.last,
+            "decode_ms": _ms(metrics.decode.last),
+            "events_parsed": metrics.parsed.last,
+            **_percentiles_ms(metrics.latency),
+        }
+
+
+class MergeTimeSensor(BaseDiagnosticSensor):
+    _attr_icon = "mdi:call-merge"
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    @property
+    def unique_id(self) -> str:
+        return f"{DOMAIN}_{self._entry.entry_id}_merge_time"
+
+    @property
+    def name(self) -> str:
+        return "QuakeHub Merge Time"
+
+    @property
+    def native_value(self) -> float | None:
+        return _ms(self.coordinator.hub.metrics.merge.last)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        metrics = self.coordinator.hub.metrics
+        return {
+            "duplicates_collapsed": metrics.duplicates.last,
+            "refresh_ms": _ms(metrics.refresh.last),
+            **_percentiles_ms(metrics.merge),
+        }
+
+
+class CatalogSizeSensor(BaseDiagnosticSensor):
+    _attr_icon = "mdi:database-outline"
+    _attr_native_unit_of_measurement = "events"
+
+    @property
+    def unique_id(self) -> str:
+        return f"{DOMAIN}_{self._entry.entry_id}_catalog_size"
+
+    @property
+    def name(self) -> str:
+        return "QuakeHub Catalog Size"
+
+    @property
+    def native_value(self) -> int:
+        return self.coordinator.hub.retention.size
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        retention = self.coordinator.hub.retention
+        return {
+            "memory_kib": round(retention.bytes / 1024),
+            "evicted_age": retention.evicted[REASON_AGE],
+            "evicted_count": retention.evicted[REASON_COUNT],
+            "evicted_memory": retention.evicted[REASON_BYTES],
+            "max_events": retention.policy.max_events,
+            "memory_budget_kib": retention.policy.max_bytes // 1024,
+        }
+
+
+class RadiusFilteredSensor(BaseQuakeSensor):
+    _attr_icon = "mdi:filter-outline"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def unique_id(self) -> str:
+        return f"{DOMAIN}_{self._entry.entry_id}_radius_filtered"
+
+    @property
+    def name(self) -> str:
+        return "QuakeHub Radius Filtered"
+
+    @property
+    def native_value(self) -> int | None:
+        value = self.coordinator.radius_filtered.last
+        return None if value is None else int(value)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import aiohttp
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import (
+    DATA_SESSION,
+    DATA_SESSION_UNSUB,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_LIMIT,
+    HTTP_LIMIT_PER_HOST,
+)
+
+
+@callback
+def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the pooled session shared by all QuakeHub entries."""
+    session: aiohttp.ClientSession | None = hass.data.get(DATA_SESSION)
+    if session is not None and not session.closed:
+        return session
+    _async_unlisten(hass)
+
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_LIMIT,
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        headers={"Accept-Encoding": "gzip, deflate"},
+        auto_decompress=True,
+    )
+    hass.data[DATA_SESSION] = session
+
+    @callback
+    def _async_close(event: Event) -> None:
+        hass.data.pop(DATA_SESSION_UNSUB, None)
+        if not session.closed:
+            hass.async_create_task(session.close())
+
+    # One listener per session, removed when the session is closed earlier
+    hass.data[DATA_SESSION_UNSUB] = hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_CLOSE, _async_close
+    )
+    return session
+
+
+@callback
+def _async_unlisten(hass: HomeAssistant) -> None:
+    unsub = hass.data.pop(DATA_SESSION_UNSUB, None)
+    if unsub is not None:
+        unsub()
+
+
+async def async_close_session(hass: HomeAssistant) -> None:
+    _async_unlisten(hass)
+    session: aiohttp.ClientSession | None = hass.data.pop(DATA_SESSION, None)
+    if session is not None and not session.closed:
+        await session.close()
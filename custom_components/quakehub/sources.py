@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import partial
+from typing import Awaitable, Callable, Dict, List
+
+from .api_emsc import fetch_emsc
+from .api_fdsn import fetch_fdsn
+from .api_geofon import fetch_geofon
+from .api_usgs import fetch_usgs
+from .const import (
+    SOURCE_EMSC,
+    SOURCE_GEOFON,
+    SOURCE_INGV,
+    SOURCE_IRIS,
+    SOURCE_USGS,
+)
+from .fdsn import FDSN_FORMAT_GEOJSON, FDSN_FORMAT_TEXT, FdsnQuery
+from .merger import EarthquakeEvent
+
+Fetcher = Callable[..., Awaitable[List[EarthquakeEvent]]]
+QueryFactory = Callable[[float | None, float | None, float | None], FdsnQuery]
+
+INGV_URL = "https://webservices.ingv.it/fdsnws/event/1/query"
+IRIS_URL = "https://service.iris.edu/fdsnws/event/1/query"
+
+
+@dataclass(frozen=True)
+class Source:
+    """A provider the hub can poll.
+
+    The hub calls `fetch(session, timeout=, cache=, keep_raw=, stats=)`.
+    Sources with a `query` factory also get `query=`, an FdsnQuery built
+    from the latitude, longitude and radius covering every entry.
+    """
+
+    key: str
+    name: str
+    fetch: Fetcher
+    query: QueryFactory | None = None
+
+
+SOURCES: Dict[str, Source] = {}
+
+
+def register_source(source: Source) -> None:
+    SOURCES[source.key] = source
+
+
+def register_fdsn_node(
+    key: str,
+    name: str,
+    url: str,
+    format: str = FDSN_FORMAT_TEXT,
+    incremental: bool = False,
+) -> None:
+    """Register an FDSN event service as a source.
+
+    The compact text format is the default. Only set `incremental` for
+    nodes known to honour `updatedafter`.
+    """
+    register_source(
+        Source(
+            key,
+            name,
+            partial(fetch_fdsn, url=url, source=key),
+            partial(FdsnQuery, format=format, incremental=incremental),
+        )
+    )
+
+
+register_source(Source(SOURCE_USGS, "USGS", fetch_usgs))
+register_source(
+    Source(
+        SOURCE_EMSC,
+        "EMSC",
+        fetch_emsc,
+        partial(FdsnQuery, format=FDSN_FORMAT_GEOJSON, incremental=True),
+    )
+)
+register_source(Source(SOURCE_GEOFON, "GEOFON", fetch_geofon))
+register_fdsn_node(SOURCE_INGV, "INGV", INGV_URL)
+register_fdsn_node(SOURCE_IRIS, "IRIS", IRIS_URL)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, List
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import ALERT_SAVE_DELAY, DOMAIN, STORE_SAVE_DELAY, STORE_VERSION
+from .alerts import Fired
+from .merger import EarthquakeEvent
+
+
+def _encode(e: EarthquakeEvent) -> list:
+    return [
+        e.id,
+        e.source,
+        e.timestamp,
+        e.latitude,
+        e.longitude,
+        e.depth,
+        e.magnitude,
+        e.place,
+        e.sources,
+    ]
+
+
+def _decode(row: list) -> EarthquakeEvent:
+    eid, source, ts, lat, lon, depth, mag, place, sources = row
+    return EarthquakeEvent(eid, source, ts, lat, lon, depth, mag, place, sources)
+
+
+class EventStore:
+    """Merged events persisted under .storage for warm starts."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORE_VERSION, f"{DOMAIN}.events"
+        )
+        self._events: List[EarthquakeEvent] = []
+        self._pending = False
+
+    async def async_load(self) -> List[EarthquakeEvent]:
+        data = await self._store.async_load()
+        if not data:
+            return []
+        return [_decode(row) for row in data.get("events", [])]
+
+    def async_schedule_save(self, events: Iterable[EarthquakeEvent]) -> None:
+        self._events = list(events)
+        self._pending = True
+        self._store.async_delay_save(self._data_to_save, STORE_SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write a scheduled save now, so none is left pending."""
+        if self._pending:
+            await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict[str, Any]:
+        self._pending = False
+        return {"events": [_encode(e) for e in self._events]}
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+
+class AlertStore:
+    """Events an entry already alerted on, so alerts survive restarts."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORE_VERSION, f"{DOMAIN}.alerts.{entry_id}"
+        )
+        self._fired: Fired = {}
+
+    async def async_load(self) -> Fired:
+        data = await self._store.async_load()
+        if not data:
+            return {}
+        return {eid: (ts, lat, lon) for eid, ts, lat, lon in data.get("fired", [])}
+
+    def async_schedule_save(self, fired: Fired) -> None:
+        self._fired = fired
+        self._store.async_delay_save(self._data_to_save, ALERT_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"fired": [[eid, *record] for eid, record in self._fired.items()]}
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, List
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from .api_emsc import parse_emsc
+from .const import STREAM_BACKOFF_MAX, STREAM_BACKOFF_MIN, STREAM_HEARTBEAT
+from .feed import json_loads
+from .merger import EarthquakeEvent
+from .session import async_get_session
+
+_LOGGER = logging.getLogger(__name__)
+
+EMSC_WS_URL = "wss://www.seismicportal.eu/standing_order/websocket"
+
+
+def parse_emsc_message(text: str, keep_raw: bool = False) -> List[EarthquakeEvent]:
+    """Turn one standing-order message into events."""
+    message = json_loads(text)
+    feature = message.get("data")
+    if not isinstance(feature, dict):
+        return []
+    return parse_emsc({"features": [feature]}, keep_raw=keep_raw)
+
+
+class EmscStream:
+    """Persistent EMSC WebSocket client feeding events as they are published.
+
+    Reconnects with exponential backoff; polling stays the catch-up path for
+    anything missed while disconnected.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        on_events: Callable[[List[EarthquakeEvent]], None],
+        url: str = EMSC_WS_URL,
+        keep_raw: bool = False,
+    ) -> None:
+        self._hass = hass
+        self._on_events = on_events
+        self._url = url
+        self.keep_raw = keep_raw
+        self.connected = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = self._hass.async_create_background_task(
+                self._async_run(), "quakehub_emsc_stream"
+            )
+
+    async def async_stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _async_run(self) -> None:
+        backoff = STREAM_BACKOFF_MIN
+        while True:
+            try:
+                await self._async_listen()
+                backoff = STREAM_BACKOFF_MIN
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                _LOGGER.warning(
+                    "EMSC stream error, reconnecting in %ss: %s", backoff, err
+                )
+            else:
+                _LOGGER.debug("EMSC stream closed, reconnecting in %ss", backoff)
+            finally:
+                self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, STREAM_BACKOFF_MAX)
+
+    async def _async_listen(self) -> None:
+        session = async_get_session(self._hass)
+        async with session.ws_connect(self._url, heartbeat=STREAM_HEARTBEAT) as ws:
+            self.connected = True
+            _LOGGER.debug("EMSC stream connected to %s", self._url)
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    try:
+                        events = parse_emsc_message(msg.data, self.keep_raw)
+                    except (ValueError, TypeError, KeyError, IndexError) as err:
+                        _LOGGER.debug("Ignoring malformed EMSC message: %s", err)
+                        continue
+                    if events:
+                        self._on_events(events)
+                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
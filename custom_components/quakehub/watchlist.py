@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List
+
+from .const import DEFAULT_RADIUS
+
+
+@dataclass(frozen=True)
+class WatchPoint:
+    name: str
+    latitude: float
+    longitude: float
+    radius: float
+
+    @property
+    def circle(self) -> tuple[float, float, float]:
+        return self.latitude, self.longitude, self.radius
+
+
+def parse_watchlist(value: str) -> List[WatchPoint]:
+    """Parse 'name: lat, lon[, radius_km]' points separated by ';' or newlines.
+
+    Raises ValueError if a point is malformed or no point is given.
+    """
+    points: List[WatchPoint] = []
+    names = set()
+    for item in re.split(r"[;\n]", value or ""):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, rest = item.partition(":")
+        name = name.strip()
+        parts = [p.strip() for p in rest.split(",")]
+        if not sep or not name or len(parts) not in (2, 3):
+            raise ValueError(f"expected 'name: lat, lon[, radius]', got {item!r}")
+        try:
+            lat, lon = float(parts[0]), float(parts[1])
+            radius = float(parts[2]) if len(parts) == 3 else float(DEFAULT_RADIUS)
+        except ValueError as err:
+            raise ValueError(f"invalid number in {item!r}") from err
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180 and radius > 0):
+            raise ValueError(f"coordinates or radius out of range in {item!r}")
+        if name in names:
+            raise ValueError(f"duplicate point name {name!r}")
+        names.add(name)
+        points.append(WatchPoint(name, lat, lon, radius))
+    if not points:
+        raise ValueError("no watchlist points given")
+    return points
@@ -0,0 +1,85 @@
+"""Helpers shared by the QuakeHub tests."""
+from __future__ import annotations
+
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any, AsyncIterator
+
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from custom_components.quakehub.const import DOMAIN
+from custom_components.quakehub.coordinator import EarthquakeCoordinator
+from custom_components.quakehub.hub import async_get_hub
+from custom_components.quakehub.merger import EarthquakeEvent
+
+HOME = (45.0, 10.0)
+
+
+def make_event(
+    event_id: str,
+    *,
+    source: str = "usgs",
+    timestamp: float | None = None,
+    age: float = 60.0,
+    latitude: float = HOME[0],
+    longitude: float = HOME[1],
+    depth: float | None = 10.0,
+    magnitude: float | None = 4.0,
+    place: str | None = None,
+    sources: list[str] | None = None,
+) -> EarthquakeEvent:
+    if timestamp is None:
+        timestamp = time.time() - age
+    return EarthquakeEvent(
+        event_id,
+        source,
+        timestamp,
+        latitude,
+        longitude,
+        depth,
+        magnitude,
+        place,
+        sources,
+    )
+
+
+def make_entry(entry_id: str = "entry", **data: Any) -> ConfigEntry:
+    data = {
+        "latitude": HOME[0],
+        "longitude": HOME[1],
+        "radius": 500,
+        "sources": ["usgs", "emsc", "geofon"],
+        "push": False,
+        **data,
+    }
+    return ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="QuakeHub",
+        data=data,
+        source="user",
+        entry_id=entry_id,
+    )
+
+
+@asynccontextmanager
+async def async_test_hass(config_dir) -> AsyncIterator[HomeAssistant]:
+    hass = HomeAssistant(str(config_dir))
+    hass.config.latitude, hass.config.longitude = HOME
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.async_start()
+    try:
+        yield hass
+    finally:
+        await hass.async_stop(force=True)
+
+
+def make_coordinator(hass: HomeAssistant, entry: ConfigEntry) -> EarthquakeCoordinator:
+    """Entry coordinator registered with the hub, without any network refresh."""
+    hub = async_get_hub(hass)
+    coordinator = EarthquakeCoordinator(hass, entry, hub, timedelta(seconds=300))
+    hub.async_register(coordinator)
+    return coordinator
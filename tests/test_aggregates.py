@@ -0,0 +1,74 @@
+"""Rolling-window aggregates."""
+import time
+from types import SimpleNamespace
+
+from custom_components.quakehub import coordinator as coordinator_module
+from custom_components.quakehub.aggregates import EventAggregator
+from custom_components.quakehub.const import AGGREGATE_WINDOWS, MAGNITUDE_BANDS
+from custom_components.quakehub.sensor import (
+    CountEarthquakesSensor,
+    StrongestEarthquakeSensor,
+)
+
+from .common import async_test_hass, make_coordinator, make_entry, make_event
+
+HOUR = 3600
+
+
+def test_windows_follow_catalog_changes():
+    aggregator = EventAggregator(AGGREGATE_WINDOWS, MAGNITUDE_BANDS)
+    now = time.time()
+    small = make_event("usgs_a", age=600, magnitude=2.5)
+    big = make_event("usgs_b", age=2 * HOUR, latitude=40, magnitude=5.5)
+    aggregator.update([small, big], now)
+
+    hour, day = aggregator.windows["1h"], aggregator.windows["24h"]
+    assert (hour.count, hour.strongest) == (1, small)
+    assert (day.count, day.strongest) == (2, big)
+    assert day.band_counts == {"M<3": 1, "M3-5": 0, "M5-7": 1, "M7+": 0}
+
+    revised = make_event("usgs_b", timestamp=big.timestamp, latitude=40, magnitude=7.1)
+    aggregator.update([small, revised], now)
+    assert day.strongest == revised
+    assert day.band_counts["M7+"] == 1
+
+    aggregator.update([small], now)
+    assert (day.count, day.strongest) == (1, small)
+
+
+def test_expire_without_new_events():
+    aggregator = EventAggregator(AGGREGATE_WINDOWS, MAGNITUDE_BANDS)
+    now = time.time()
+    aggregator.update([make_event("usgs_a", age=1800, magnitude=4.0)], now)
+
+    assert not aggregator.expire(now + 60)
+    assert aggregator.expire(now + HOUR)
+    assert aggregator.windows["1h"].count == 0
+    assert aggregator.windows["1h"].strongest is None
+    assert aggregator.windows["24h"].count == 1
+
+
+async def test_sensors_age_out_while_catalog_is_quiet(tmp_path, monkeypatch):
+    async with async_test_hass(tmp_path) as hass:
+        coordinator = make_coordinator(hass, make_entry())
+        coordinator.hub.data = [make_event("usgs_a", age=1800, magnitude=4.0)]
+        coordinator.async_handle_hub_update()
+        count = CountEarthquakesSensor(coordinator, coordinator.entry, "1h")
+        strongest = StrongestEarthquakeSensor(coordinator, coordinator.entry, "1h")
+        assert (count.native_value, strongest.native_value) == (1, 4.0)
+        updates = []
+        coordinator.async_add_listener(lambda: updates.append(True))
+
+        # No hub refresh arrives, only the clock moves on
+        later = time.time() + HOUR
+        monkeypatch.setattr(
+            coordinator_module,
+            "time",
+            SimpleNamespace(time=lambda: later, monotonic=time.monotonic),
+        )
+        coordinator.async_expire()
+
+        assert (count.native_value, strongest.native_value) == (0, None)
+        assert updates == [True]
+        coordinator.async_expire()
+        assert updates == [True]
@@ -0,0 +1,143 @@
+"""Alert rule parsing and the once-per-event alert pipeline."""
+import time
+
+import pytest
+
+from custom_components.quakehub.alerts import (
+    FIELD_DISTANCE,
+    FIELD_INTENSITY,
+    FIELD_MAGNITUDE,
+    AlertPipeline,
+    estimate_intensity,
+    parse_alert_rules,
+)
+from custom_components.quakehub.const import EVENT_ALERT
+
+from .common import async_test_hass, make_coordinator, make_entry, make_event
+
+HOUR = 3600
+
+
+def test_parse_rules():
+    rules = parse_alert_rules(
+        "Nearby: magnitude >= 4.5, distance <= 300\nmmi > 4 and m < 9; "
+    )
+    assert [rule.name for rule in rules] == ["Nearby", "mmi > 4 and m < 9"]
+    assert rules[0].conditions == (
+        (FIELD_MAGNITUDE, ">=", 4.5),
+        (FIELD_DISTANCE, "<=", 300.0),
+    )
+    assert rules[1].conditions == (
+        (FIELD_INTENSITY, ">", 4.0),
+        (FIELD_MAGNITUDE, "<", 9.0),
+    )
+    assert parse_alert_rules("") == []
+
+
+@pytest.mark.parametrize(
+    "value", ["magnitude", "Loud:", "speed > 3", "magnitude => 4", "depth < x"]
+)
+def test_parse_rejects_malformed_rules(value):
+    with pytest.raises(ValueError):
+        parse_alert_rules(value)
+
+
+def test_intensity_falls_with_distance_and_rises_with_magnitude():
+    near = estimate_intensity(6.0, 10, 10)
+    far = estimate_intensity(6.0, 300, 10)
+    assert far < near
+    assert estimate_intensity(7.0, 300, 10) > far
+    assert estimate_intensity(9.5, 0, 0) == 12.0
+    assert estimate_intensity(2.0, 2000, 10) == 1.0
+    assert estimate_intensity(None, 10, 10) is None
+
+
+def _pipeline(rules="magnitude >= 4"):
+    return AlertPipeline(parse_alert_rules(rules), 3 * HOUR)
+
+
+def test_alerts_once_per_event():
+    pipeline = _pipeline()
+    now = time.time()
+    strong = make_event("usgs_a", magnitude=4.5)
+    weak = make_event("usgs_b", magnitude=3.0, latitude=40)
+
+    alerts = pipeline.evaluate([strong, weak], {}, now)
+    assert [(e.id, rule.name) for e, rule, _ in alerts] == [
+        ("usgs_a", "magnitude >= 4")
+    ]
+    assert pipeline.evaluate([strong, weak], {}, now) == []
+    # A revision of the same event does not alert again
+    revised = make_event("usgs_a", timestamp=strong.timestamp, magnitude=4.8)
+    assert pipeline.evaluate([revised, weak], {}, now) == []
+
+
+def test_same_quake_under_another_id_does_not_alert_again():
+    pipeline = _pipeline()
+    now = time.time()
+    usgs = make_event("usgs_a", magnitude=4.5)
+    assert pipeline.evaluate([usgs], {}, now)
+    emsc = make_event(
+        "emsc_a", source="emsc", timestamp=usgs.timestamp + 5, magnitude=4.6
+    )
+    assert pipeline.evaluate([emsc], {}, now) == []
+    assert "emsc_a" in pipeline.fired
+
+
+def test_conditions_see_distance_and_intensity():
+    pipeline = _pipeline("distance <= 100, intensity >= 3")
+    now = time.time()
+    near = make_event("usgs_near", magnitude=4.0)
+    far = make_event("usgs_far", magnitude=4.0, latitude=30)
+    alerts = pipeline.evaluate([near, far], {"usgs_near": 20, "usgs_far": 1700}, now)
+    assert [e.id for e, _, _ in alerts] == ["usgs_near"]
+    assert alerts[0][2] == pytest.approx(estimate_intensity(4.0, 20, 10))
+
+
+def test_old_events_never_alert_and_are_forgotten():
+    pipeline = _pipeline()
+    now = time.time()
+    assert pipeline.evaluate([make_event("usgs_old", age=4 * HOUR)], {}, now) == []
+
+    recent = make_event("usgs_a", age=60, magnitude=5)
+    assert pipeline.evaluate([recent], {}, now)
+    pipeline.prune(now + 4 * HOUR)
+    assert pipeline.fired == {}
+
+
+def test_primed_events_do_not_alert():
+    pipeline = _pipeline()
+    now = time.time()
+    known = [make_event("usgs_a", magnitude=5.0)]
+    pipeline.prime(known, now)
+
+    assert pipeline.evaluate(known, {}, now) == []
+    new = make_event("usgs_b", latitude=30.0, magnitude=5.0)
+    assert [e.id for e, _, _ in pipeline.evaluate([new, *known], {}, now)] == [
+        "usgs_b"
+    ]
+
+
+async def test_restart_with_stored_catalog_stays_quiet(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        entry = make_entry(alert_rules="magnitude >= 4")
+        coordinator = make_coordinator(hass, entry)
+        hub = coordinator.hub
+        await coordinator.async_load_alerts()
+        assert coordinator.alerts.fired == {}
+        fired = []
+        hass.bus.async_listen(EVENT_ALERT, fired.append)
+        hub.async_add_listener(coordinator.async_handle_hub_update)
+
+        # Catalog saved before the restart
+        hub.store.async_schedule_save([make_event("usgs_a", magnitude=5.0)])
+        await hub.store.async_flush()
+        assert await hub._async_restore()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert [e.id for e in coordinator.data] == ["usgs_a"]
+        assert fired == []
+
+        hub.async_ingest([make_event("usgs_b", latitude=46.0, magnitude=4.5)])
+        await hass.async_block_till_done()
+        assert [event.data["id"] for event in fired] == ["usgs_b"]
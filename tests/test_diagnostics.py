@@ -0,0 +1,39 @@
+"""Config entry diagnostics."""
+import json
+
+from homeassistant.config_entries import ConfigEntry
+
+from custom_components.quakehub.const import DOMAIN
+from custom_components.quakehub.diagnostics import async_get_config_entry_diagnostics
+
+from .common import async_test_hass, make_coordinator, make_entry
+
+
+async def test_location_settings_are_redacted(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        base = make_entry(
+            region_mode="watchlist", watchlist="Cabin: 46.123, 11.456, 50"
+        )
+        entry = ConfigEntry(
+            version=1,
+            minor_version=1,
+            domain=DOMAIN,
+            title="QuakeHub",
+            data=base.data,
+            options={
+                "latitude": 44.987,
+                "region": '{"type": "Polygon", "coordinates": '
+                "[[[12.5, 41.9], [12.6, 41.9], [12.6, 42.0], [12.5, 41.9]]]}",
+            },
+            source="user",
+            entry_id="entry",
+        )
+        coordinator = make_coordinator(hass, entry)
+        hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+
+        diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+        text = json.dumps(diagnostics, default=str)
+        for secret in ("Cabin", "46.123", "44.987", "41.9", str(base.data["latitude"])):
+            assert secret not in text
+        assert diagnostics["entry"]["radius"] == 500
@@ -0,0 +1,114 @@
+"""FDSN text parsing and incremental queries."""
+from datetime import datetime, timedelta, timezone
+
+from custom_components.quakehub.api_fdsn import parse_fdsn_text
+from custom_components.quakehub.fdsn import (
+    FDSN_FORMAT_TEXT,
+    FDSN_MAX_GAP,
+    FDSN_OVERLAP,
+    FDSN_START_STEP,
+    KM_PER_DEGREE,
+    FdsnQuery,
+)
+
+from .common import make_event
+
+HEADER = (
+    "#EventID|Time|Latitude|Longitude|Depth/km|Author|Catalog|Contributor"
+    "|ContributorID|MagType|Magnitude|MagAuthor|EventLocationName"
+)
+TEXT = HEADER + """
+42|2024-05-01T10:00:00.120|42.5|13.2|10.1|SURVEY-INGV||||ML|3.2|--|Central Italy
+43|2024-05-01T11:00:00|38.1|15.6||SURVEY-INGV||||ML||--|
+broken line
+44|2024-05-01T12:00:00|north|15.6|5|SURVEY-INGV||||ML|2.0|--|Sicily
+"""
+
+
+def test_parse_text_format():
+    events = parse_fdsn_text(TEXT.splitlines(), "ingv")
+
+    assert [e.id for e in events] == ["ingv_42", "ingv_43"]
+    first, second = events
+    assert first.source == "ingv"
+    assert first.timestamp == datetime(
+        2024, 5, 1, 10, 0, 0, 120000, tzinfo=timezone.utc
+    ).timestamp()
+    assert (first.latitude, first.longitude, first.depth) == (42.5, 13.2, 10.1)
+    assert (first.magnitude, first.place) == (3.2, "Central Italy")
+    assert (second.depth, second.magnitude, second.place) == (None, None, None)
+    assert first.raw is None
+
+
+def test_parse_text_follows_header_columns():
+    lines = [
+        "# Magnitude | EventID | Longitude | Latitude | Time",
+        "4.1|abc|-120.5|35.25|2024-05-01T10:00:00Z",
+    ]
+    (event,) = parse_fdsn_text(lines, "iris", keep_raw=True)
+    assert (event.id, event.magnitude) == ("iris_abc", 4.1)
+    assert (event.latitude, event.longitude, event.depth) == (35.25, -120.5, None)
+    assert event.raw["eventid"] == "abc"
+
+
+def test_parse_text_without_header_uses_standard_columns():
+    lines = TEXT.splitlines()[1:2]
+    (event,) = parse_fdsn_text(lines, "ingv")
+    assert (event.id, event.magnitude) == ("ingv_42", 3.2)
+
+
+def test_parse_text_stops_at_unusable_header():
+    assert parse_fdsn_text(["#Foo|Bar", "1|2"], "ingv") == []
+
+
+def test_query_params_filter_area_and_go_incremental():
+    now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    query = FdsnQuery(45.0, 10.0, 500.0, format=FDSN_FORMAT_TEXT)
+
+    params = query.params(now)
+    assert params["format"] == "text"
+    assert params["starttime"] == "2024-04-30T12:00:00"
+    assert params["maxradius"] == f"{500 / KM_PER_DEGREE:.4f}"
+    assert "updatedafter" not in params
+
+    query.update([], now)
+    later = now + timedelta(minutes=5)
+    params = query.params(later)
+    assert params["updatedafter"] == (now - FDSN_OVERLAP).strftime("%Y-%m-%dT%H:%M:%S")
+    assert "starttime" not in params
+
+    assert "starttime" in query.params(now + FDSN_MAX_GAP + timedelta(seconds=1))
+    query.reset()
+    assert "starttime" in query.params(later)
+
+
+def test_query_without_updatedafter_support_always_fetches_window():
+    now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    query = FdsnQuery(incremental=False)
+    query.update([], now)
+    assert "starttime" in query.params(now + timedelta(minutes=1))
+
+
+def test_full_window_query_repeats_within_the_start_step():
+    now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    query = FdsnQuery(45.0, 10.0, 500.0, incremental=False)
+    params = query.params(now + timedelta(minutes=7, seconds=13))
+
+    assert params["starttime"] == "2024-04-30T12:00:00"
+    assert query.params(now + FDSN_START_STEP - timedelta(seconds=1)) == params
+    assert query.params(now + FDSN_START_STEP) != params
+
+
+def test_incremental_updates_fold_into_known_events():
+    now = datetime.now(timezone.utc)
+    query = FdsnQuery()
+    a = make_event("emsc_a", source="emsc", age=600)
+    b = make_event("emsc_b", source="emsc", age=300, latitude=40)
+    assert query.update([a, b], now) == [a, b]
+
+    revised = make_event("emsc_a", source="emsc", age=600, magnitude=5.0)
+    later = now + timedelta(minutes=1)
+    assert query.update([revised], later) == [revised, b]
+
+    # Events that left the window are dropped
+    assert query.update([], now + query.window + timedelta(minutes=6)) == []
@@ -0,0 +1,211 @@
+"""Conditional feed downloads and GeoJSON parsing."""
+import json
+import threading
+import time
+
+import aiohttp
+import pytest
+
+from custom_components.quakehub import feed as feed_module
+from custom_components.quakehub.feed import (
+    FeedCache,
+    FetchStats,
+    async_fetch_feed,
+    parse_geojson,
+)
+
+from .common import make_event
+
+URL = "https://example.invalid/feed"
+
+
+class FakeResponse:
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(None, (), status=self.status)
+
+
+class FakeSession:
+    """Answers each get() with the next queued response."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, params=None):
+        self.requests.append((url, dict(headers or {}), params))
+        return self.responses.pop(0)
+
+
+def _parser():
+    calls = []
+
+    def parse(data):
+        calls.append(data)
+        return [make_event(f"usgs_{i}") for i in data]
+
+    return parse, calls
+
+
+def _ok(ids, **headers):
+    return FakeResponse(200, json.dumps(ids).encode(), headers)
+
+
+async def test_validators_are_sent_and_not_modified_reuses_events():
+    parse, calls = _parser()
+    cache = FeedCache()
+    session = FakeSession(
+        _ok(["a"], ETag='"v1"', **{"Last-Modified": "Wed, 01 May 2024 10:00:00 GMT"}),
+        FakeResponse(304),
+    )
+
+    first = await async_fetch_feed(session, URL, parse, cache=cache)
+    stats = FetchStats()
+    second = await async_fetch_feed(session, URL, parse, cache=cache, stats=stats)
+
+    assert session.requests[0][1] == {}
+    assert session.requests[1][1] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Wed, 01 May 2024 10:00:00 GMT",
+    }
+    assert second is first
+    assert stats.status == 304
+    assert len(calls) == 1
+
+
+async def test_identical_body_skips_decode_and_parse():
+    parse, calls = _parser()
+    cache = FeedCache()
+    session = FakeSession(_ok(["a", "b"], ETag='"v1"'), _ok(["a", "b"], ETag='"v2"'))
+
+    first = await async_fetch_feed(session, URL, parse, cache=cache)
+    stats = FetchStats()
+    second = await async_fetch_feed(session, URL, parse, cache=cache, stats=stats)
+
+    assert second is first
+    assert len(calls) == 1
+    assert (stats.decode, stats.parsed) == (0.0, 0)
+    assert cache.etag == '"v2"'
+
+
+async def test_error_keeps_the_last_good_result():
+    parse, _ = _parser()
+    cache = FeedCache()
+    session = FakeSession(_ok(["a"], ETag='"v1"'), FakeResponse(503), FakeResponse(304))
+
+    first = await async_fetch_feed(session, URL, parse, cache=cache)
+    with pytest.raises(aiohttp.ClientResponseError):
+        await async_fetch_feed(session, URL, parse, cache=cache)
+
+    assert (cache.etag, cache.events) == ('"v1"', first)
+    assert await async_fetch_feed(session, URL, parse, cache=cache) is first
+    assert session.requests[2][1] == {"If-None-Match": '"v1"'}
+
+
+async def test_changed_request_resets_the_cache():
+    parse, calls = _parser()
+    cache = FeedCache()
+    session = FakeSession(_ok(["a"], ETag='"v1"'), _ok(["a"], ETag='"v1"'))
+
+    first = await async_fetch_feed(session, URL, parse, cache=cache, params={"p": "1"})
+    second = await async_fetch_feed(session, URL, parse, cache=cache, params={"p": "2"})
+
+    assert session.requests[1][1] == {}
+    assert second is not first
+    assert len(calls) == 2
+
+
+def _feature(**props):
+    return {
+        "id": "a",
+        "geometry": {"type": "Point", "coordinates": [13.2, 42.5, 10.1]},
+        "properties": {"mag": 3.2, "time": 1714557600120, "place": "Norcia", **props},
+    }
+
+
+def test_parse_valid_feature():
+    (event,) = parse_geojson({"features": [_feature()]}, "usgs")
+
+    assert (event.id, event.source) == ("usgs_a", "usgs")
+    assert event.timestamp == 1714557600.12
+    assert (event.latitude, event.longitude, event.depth) == (42.5, 13.2, 10.1)
+    assert (event.magnitude, event.place) == (3.2, "Norcia")
+    assert event.raw is None
+
+
+def test_parse_keeps_raw_only_on_request():
+    feature = _feature()
+    (event,) = parse_geojson({"features": [feature]}, "usgs", keep_raw=True)
+    assert event.raw is feature
+
+
+@pytest.mark.parametrize("geometry", ["missing", None])
+def test_parse_without_geometry_reads_coordinate_properties(geometry):
+    feature = _feature(lat=38.1, lon=15.6, depth=5)
+    if geometry == "missing":
+        del feature["geometry"]
+    else:
+        feature["geometry"] = geometry
+
+    (event,) = parse_geojson({"features": [feature]}, "emsc")
+    assert (event.latitude, event.longitude, event.depth) == (38.1, 15.6, 5)
+
+    del feature["properties"]["depth"]
+    (event,) = parse_geojson({"features": [feature]}, "emsc")
+    assert (event.latitude, event.longitude, event.depth) == (38.1, 15.6, None)
+
+
+def test_parse_without_depth_in_geometry():
+    feature = _feature()
+    feature["geometry"]["coordinates"] = [13.2, 42.5]
+    (event,) = parse_geojson({"features": [feature]}, "usgs")
+    assert (event.latitude, event.longitude, event.depth) == (42.5, 13.2, None)
+
+
+@pytest.mark.parametrize("value", ["missing", None])
+def test_parse_without_magnitude_or_time(value):
+    feature = _feature(mag=value, time=value)
+    if value == "missing":
+        del feature["properties"]["mag"], feature["properties"]["time"]
+
+    before = time.time()
+    (event,) = parse_geojson({"features": [feature]}, "usgs")
+    assert event.magnitude is None
+    assert before <= event.timestamp <= time.time()
+
+
+async def test_large_body_is_decoded_and_parsed_off_the_loop(monkeypatch):
+    threads = []
+
+    def parse(data):
+        threads.append(threading.get_ident())
+        return parse_geojson(data, "usgs")
+
+    body = json.dumps({"features": [_feature()]}).encode()
+    monkeypatch.setattr(feed_module, "PARSE_EXECUTOR_BYTES", len(body))
+    stats = FetchStats()
+    (event,) = await async_fetch_feed(
+        FakeSession(FakeResponse(200, body)), URL, parse, stats=stats
+    )
+
+    assert event.id == "usgs_a"
+    assert threads != [threading.get_ident()]
+    assert (stats.bytes, stats.parsed) == (len(body), 1)
+
+    monkeypatch.setattr(feed_module, "PARSE_EXECUTOR_BYTES", len(body) + 1)
+    await async_fetch_feed(FakeSession(FakeResponse(200, body)), URL, parse)
+    assert threads[1] == threading.get_ident()
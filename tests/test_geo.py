@@ -0,0 +1,90 @@
+"""Distance filters, with and without numpy."""
+import random
+
+import pytest
+
+from custom_components.quakehub import geo
+from custom_components.quakehub.merger import haversine_km
+
+from .common import make_event
+
+pytest.importorskip("numpy")
+
+
+def _events(rng, count):
+    events = [
+        make_event(
+            f"usgs_{i}",
+            latitude=rng.uniform(-90, 90),
+            longitude=rng.uniform(-180, 180),
+        )
+        for i in range(count)
+    ]
+    # Near the poles and across the antimeridian
+    events += [
+        make_event("usgs_np", latitude=89.9, longitude=-30),
+        make_event("usgs_sp", latitude=-89.5, longitude=120),
+        make_event("usgs_e", latitude=-17, longitude=179.9),
+        make_event("usgs_w", latitude=-17, longitude=-179.9),
+    ]
+    return events
+
+
+def _points(rng):
+    points = [
+        (rng.uniform(-85, 85), rng.uniform(-180, 180), rng.uniform(50, 5000))
+        for _ in range(5)
+    ]
+    return points + [(88.0, 0.0, 500.0), (-17.0, 179.0, 300.0), (0.0, 0.0, 20000.0)]
+
+
+def _both(monkeypatch, func, *args):
+    vectorized = func(*args)
+    with monkeypatch.context() as patch:
+        patch.setattr(geo, "np", None)
+        fallback = func(*args)
+    return vectorized, fallback
+
+
+def test_distances_match_fallback(monkeypatch):
+    rng = random.Random(3)
+    events = _events(rng, 500)
+    for lat, lon, _ in _points(rng):
+        vectorized, fallback = _both(monkeypatch, geo.distances_km, lat, lon, events)
+        assert vectorized == pytest.approx(fallback, abs=1e-6)
+    assert _both(monkeypatch, geo.distances_km, 0.0, 0.0, []) == ([], [])
+
+
+def test_filter_within_matches_fallback(monkeypatch):
+    rng = random.Random(4)
+    for _ in range(10):
+        events = _events(rng, 500)
+        for lat, lon, radius in _points(rng):
+            (kept, dists), (kept_fb, dists_fb) = _both(
+                monkeypatch, geo.filter_within, lat, lon, radius, events
+            )
+            assert [e.id for e in kept] == [e.id for e in kept_fb]
+            assert dists == pytest.approx(dists_fb, abs=1e-6)
+            assert all(
+                haversine_km(lat, lon, e.latitude, e.longitude) <= radius + 1e-6
+                for e in kept
+            )
+
+
+def test_within_points_matches_fallback(monkeypatch):
+    rng = random.Random(5)
+    for _ in range(10):
+        events = _events(rng, 500)
+        points = _points(rng)
+        vectorized, fallback = _both(monkeypatch, geo.within_points, points, events)
+        for (idx, dists), (idx_fb, dists_fb) in zip(vectorized, fallback):
+            assert idx == idx_fb
+            assert dists == pytest.approx(dists_fb, abs=1e-6)
+    assert _both(monkeypatch, geo.within_points, [], []) == ([], [])
+
+
+def test_bounding_box_reaching_a_pole_spans_all_longitudes():
+    assert geo.bounding_box(89.0, 0.0, 500.0)[2] is None
+    min_lat, max_lat, dlon = geo.bounding_box(0.0, 0.0, 111.195)
+    assert (min_lat, max_lat) == pytest.approx((-1.0, 1.0), abs=1e-3)
+    assert dlon == pytest.approx(1.0, abs=1e-3)
@@ -0,0 +1,101 @@
+"""Map entities per event."""
+import time
+from types import SimpleNamespace
+
+from homeassistant.const import Platform
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.quakehub import coordinator as coordinator_module
+from custom_components.quakehub import geo_location
+from custom_components.quakehub.const import DOMAIN
+
+from .common import async_test_hass, make_coordinator, make_entry, make_event
+
+
+async def _setup(hass, coordinator):
+    hass.data.setdefault(DOMAIN, {})[coordinator.entry.entry_id] = coordinator
+    added = []
+    await geo_location.async_setup_entry(hass, coordinator.entry, added.extend)
+    return added
+
+
+async def test_entries_showing_the_same_event_get_distinct_ids(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        await er.async_load(hass)
+        first = make_coordinator(hass, make_entry("one"))
+        watchlist = make_entry(
+            "two", region_mode="watchlist", watchlist="Home: 45, 10, 100"
+        )
+        second = make_coordinator(hass, watchlist)
+        first.hub.data = [make_event("usgs_a")]
+        for coordinator in (first, second):
+            coordinator.async_handle_hub_update()
+
+        ids = [e.unique_id for c in (first, second) for e in await _setup(hass, c)]
+
+        assert ids == ["quakehub_one_usgs_a", "quakehub_two_home_usgs_a"]
+
+
+async def test_setup_removes_stale_registry_entries(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        await er.async_load(hass)
+        registry = er.async_get(hass)
+        entry = make_entry("one")
+        coordinator = make_coordinator(hass, entry)
+        coordinator.hub.data = [make_event("usgs_a")]
+        coordinator.async_handle_hub_update()
+
+        def register(domain, unique_id, config_entry=entry):
+            return registry.async_get_or_create(
+                domain, DOMAIN, unique_id, config_entry=config_entry
+            ).entity_id
+
+        legacy = register(Platform.GEO_LOCATION, "quakehub_usgs_a")
+        gone = register(Platform.GEO_LOCATION, "quakehub_one_usgs_gone")
+        current = register(Platform.GEO_LOCATION, "quakehub_one_usgs_a")
+        sensor = register(Platform.SENSOR, "quakehub_one_latest")
+        other = register(
+            Platform.GEO_LOCATION, "quakehub_two_usgs_b", make_entry("two")
+        )
+
+        await _setup(hass, coordinator)
+
+        assert registry.async_get(legacy) is None
+        assert registry.async_get(gone) is None
+        for entity_id in (current, sensor, other):
+            assert registry.async_get(entity_id) is not None
+
+
+async def test_old_events_leave_the_map_without_a_refresh(tmp_path, monkeypatch):
+    async with async_test_hass(tmp_path) as hass:
+        await er.async_load(hass)
+        # Off the rolling window boundaries, which notify on their own
+        max_age = 2 * 3600
+        monkeypatch.setattr(coordinator_module, "GEO_ENTITY_MAX_AGE", max_age)
+        monkeypatch.setattr(geo_location, "GEO_ENTITY_MAX_AGE", max_age)
+        coordinator = make_coordinator(hass, make_entry("one"))
+        coordinator.hub.data = [make_event("usgs_a", age=max_age - 30)]
+        coordinator.async_handle_hub_update()
+        (entity,) = await _setup(hass, coordinator)
+        removed = []
+
+        async def remove():
+            removed.append(entity.event.id)
+
+        monkeypatch.setattr(entity, "async_remove_event", remove)
+
+        coordinator.async_expire()
+        assert removed == []
+
+        later = time.time() + 60
+        monkeypatch.setattr(
+            coordinator_module,
+            "time",
+            SimpleNamespace(time=lambda: later, monotonic=time.monotonic),
+        )
+        monkeypatch.setattr(
+            geo_location, "time", SimpleNamespace(time=lambda: later)
+        )
+        coordinator.async_expire()
+        await hass.async_block_till_done()
+        assert removed == ["usgs_a"]
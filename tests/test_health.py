@@ -0,0 +1,109 @@
+"""Per-source circuit breaker."""
+import time
+from types import SimpleNamespace
+
+from custom_components.quakehub import hub as hub_module
+from custom_components.quakehub.const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_OPEN_BASE,
+    BREAKER_OPEN_MAX,
+)
+from custom_components.quakehub.health import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    SourceHealth,
+)
+from custom_components.quakehub.sensor import LatestEarthquakeSensor
+
+from .common import async_test_hass, make_coordinator, make_entry, make_event
+
+
+def _trip(health, now):
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        health.record_failure(now)
+
+
+def test_opens_after_consecutive_failures():
+    health = SourceHealth()
+    for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+        health.record_failure(0.0)
+        assert health.state(0.0) == STATE_CLOSED
+    health.record_failure(0.0)
+    assert health.state(0.0) == STATE_OPEN
+    assert not health.allow(BREAKER_OPEN_BASE - 1)
+    assert health.state(BREAKER_OPEN_BASE) == STATE_HALF_OPEN
+    assert health.allow(BREAKER_OPEN_BASE)
+
+
+def test_failed_trial_doubles_open_period_up_to_limit():
+    health = SourceHealth()
+    _trip(health, 0.0)
+    health.record_failure(100.0)
+    assert health.open_until == 100 + 2 * BREAKER_OPEN_BASE
+    for _ in range(20):
+        health.record_failure(1000.0)
+    assert health.open_until == 1000 + BREAKER_OPEN_MAX
+
+
+def test_success_closes_circuit():
+    health = SourceHealth()
+    _trip(health, 0.0)
+    health.record_success(BREAKER_OPEN_BASE, latency=0.5)
+    assert health.state(BREAKER_OPEN_BASE) == STATE_CLOSED
+    assert health.last_success == BREAKER_OPEN_BASE
+    # The next trip starts from the base open period again
+    _trip(health, 500.0)
+    assert health.open_until == 500 + BREAKER_OPEN_BASE
+
+
+async def test_latest_sensor_state_does_not_tick_with_source_age(
+    tmp_path, monkeypatch
+):
+    async with async_test_hass(tmp_path) as hass:
+        coordinator = make_coordinator(hass, make_entry())
+        hub = coordinator.hub
+        hub.data = [make_event("usgs_a")]
+        coordinator.async_handle_hub_update()
+        hub.health["usgs"].last_success = time.monotonic()
+        hub.health["emsc"].failures = 1
+        sensor = LatestEarthquakeSensor(coordinator, coordinator.entry)
+        attrs, fingerprint = sensor.extra_state_attributes, sensor._fingerprint()
+        assert attrs["stale_sources"] == ["emsc"]
+
+        later = time.monotonic() + 600
+        monkeypatch.setattr(
+            hub_module,
+            "time",
+            SimpleNamespace(time=time.time, monotonic=lambda: later),
+        )
+        assert hub.source_age("usgs") >= 600
+        assert sensor.extra_state_attributes == attrs
+        assert sensor._fingerprint() == fingerprint
+
+
+async def test_latest_sensor_reports_when_each_source_last_succeeded(
+    tmp_path, monkeypatch
+):
+    async with async_test_hass(tmp_path) as hass:
+        coordinator = make_coordinator(hass, make_entry(sources=["usgs", "emsc"]))
+        hub = coordinator.hub
+
+        async def fetch_usgs(session, timeout, cache, stats):
+            return [make_event("usgs_a")]
+
+        async def fetch_emsc(session, timeout, cache, stats):
+            raise ConnectionError
+
+        hub._fetchers = {"usgs": fetch_usgs, "emsc": fetch_emsc}
+        clock = SimpleNamespace(time=lambda: 1_700_000_000.0, monotonic=time.monotonic)
+        monkeypatch.setattr(hub_module, "time", clock)
+        await hub.async_refresh()
+        coordinator.async_handle_hub_update()
+        sensor = LatestEarthquakeSensor(coordinator, coordinator.entry)
+        attrs, fingerprint = sensor.extra_state_attributes, sensor._fingerprint()
+        assert attrs["source_updated"] == {"usgs": "2023-11-14T22:13:20+00:00"}
+
+        clock.time = lambda: 1_700_000_600.0
+        assert sensor.extra_state_attributes == attrs
+        assert sensor._fingerprint() == fingerprint
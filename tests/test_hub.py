@@ -0,0 +1,113 @@
+"""Shared hub refreshes."""
+import asyncio
+import time
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from custom_components.quakehub import hub as hub_module
+from custom_components.quakehub.const import REFRESH_DEADLINE, SOURCE_TIMEOUTS
+
+from .common import async_test_hass, make_coordinator, make_entry, make_event
+
+
+def test_no_source_budget_exceeds_the_deadline():
+    assert max(SOURCE_TIMEOUTS.values()) <= REFRESH_DEADLINE
+    assert len(set(SOURCE_TIMEOUTS.values())) > 1
+
+
+async def test_source_over_its_own_budget_fails_before_the_deadline(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(hub_module, "SOURCE_TIMEOUTS", {"usgs": 0.1, "emsc": 5})
+    monkeypatch.setattr(hub_module, "REFRESH_DEADLINE", 5)
+    async with async_test_hass(tmp_path) as hass:
+        hub = make_coordinator(hass, make_entry(sources=["usgs", "emsc"])).hub
+        budgets = {}
+
+        def fetcher(source, delay):
+            async def fetch(session, timeout, cache, stats):
+                budgets[source] = timeout
+                async with asyncio.timeout(timeout):
+                    await asyncio.sleep(delay)
+                return [make_event(f"{source}_a", source=source)]
+
+            return fetch
+
+        hub._fetchers = {"usgs": fetcher("usgs", 1), "emsc": fetcher("emsc", 0.3)}
+        start = time.monotonic()
+        await hub.async_refresh()
+
+        assert budgets == {"usgs": 0.1, "emsc": 5}
+        assert time.monotonic() - start < 1
+        assert hub.late_sources == []
+        assert hub.metrics.sources["usgs"].error == "TimeoutError"
+        assert [e.id for e in hub.data] == ["emsc_a"]
+
+
+async def test_slow_source_is_cut_off_at_deadline(tmp_path, monkeypatch):
+    monkeypatch.setattr(hub_module, "REFRESH_DEADLINE", 0.2)
+    async with async_test_hass(tmp_path) as hass:
+        hub = make_coordinator(hass, make_entry(sources=["usgs", "emsc"])).hub
+        fast_events = [make_event("emsc_a", source="emsc")]
+
+        async def slow(session, timeout, cache, stats):
+            await asyncio.sleep(timeout)
+            return [make_event("usgs_a")]
+
+        async def fast(session, timeout, cache, stats):
+            return fast_events
+
+        hub._fetchers = {"usgs": slow, "emsc": fast}
+        start = time.monotonic()
+        await hub.async_refresh()
+
+        assert time.monotonic() - start < 2
+        assert hub.late_sources == ["usgs"]
+        assert [e.id for e in hub.data] == ["emsc_a"]
+        assert hub.health["usgs"].failures == 1
+        assert hub.health["emsc"].failures == 0
+
+
+async def test_boost_only_for_events_new_after_start(tmp_path, monkeypatch):
+    async with async_test_hass(tmp_path) as hass:
+        coordinator = make_coordinator(hass, make_entry())
+        boosts = []
+        monkeypatch.setattr(coordinator.hub, "async_boost", boosts.append)
+
+        coordinator.hub.data = [make_event("usgs_old", magnitude=6.0)]
+        coordinator.async_handle_hub_update()
+        coordinator.async_handle_hub_update()
+        assert boosts == []
+
+        coordinator.hub.data = [
+            make_event("usgs_new", magnitude=5.0, age=10),
+            *coordinator.hub.data,
+        ]
+        coordinator.async_handle_hub_update()
+        assert len(boosts) == 1
+
+
+async def test_fetch_errors_do_not_record_the_request_url(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        hub = make_coordinator(hass, make_entry(sources=["usgs", "emsc"])).hub
+        url = "https://example.org/query?latitude=45.123&longitude=10.456"
+
+        async def refused(session, timeout, cache, stats):
+            raise aiohttp.ClientConnectionError(f"Cannot connect to {url}")
+
+        async def throttled(session, timeout, cache, stats):
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(URL(url), "GET", CIMultiDictProxy(CIMultiDict())),
+                (),
+                status=429,
+                message=f"Too Many Requests for {url}",
+            )
+
+        hub._fetchers = {"usgs": refused, "emsc": throttled}
+        await hub.async_refresh()
+
+        errors = {s: hub.metrics.sources[s].error for s in ("usgs", "emsc")}
+        assert errors == {"usgs": "ClientConnectionError", "emsc": "HTTP 429"}
+        assert "45.123" not in str(hub.metrics.as_dict())
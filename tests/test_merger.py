@@ -0,0 +1,152 @@
+"""Merge index and incremental catalog."""
+import random
+
+from custom_components.quakehub.merger import (
+    MERGE_MAX_KM,
+    MergedCatalog,
+    MergeIndex,
+    is_duplicate,
+    merge_events,
+)
+
+from .common import make_event
+
+
+def _random_events(rng, count, now=1_700_000_000.0):
+    """Events in clusters close enough to merge, including at the poles and ±180°."""
+    centres = [(rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(20)]
+    centres += [(89.95, 0.0), (-89.95, 90.0), (10.0, 179.99), (-10.0, -179.99)]
+    events = []
+    for i in range(count):
+        lat, lon = rng.choice(centres)
+        lat = max(min(lat + rng.uniform(-0.15, 0.15), 90.0), -90.0)
+        lon = (lon + rng.uniform(-0.15, 0.15) + 180) % 360 - 180
+        events.append(
+            make_event(
+                f"e{i}",
+                source=rng.choice(["usgs", "emsc", "geofon"]),
+                timestamp=now + rng.uniform(0, 600),
+                latitude=lat,
+                longitude=lon,
+                magnitude=round(rng.uniform(2, 3), 1),
+            )
+        )
+    return events
+
+
+def test_find_duplicate_matches_linear_scan():
+    rng = random.Random(1)
+    for _ in range(20):
+        index = MergeIndex()
+        inserted = []
+        for event in _random_events(rng, 300):
+            expected = next((e for e in inserted if is_duplicate(event, e)), None)
+            found = index.find_duplicate(event)
+            assert (found and found[1]) is expected
+            if found is None:
+                index.add(event)
+                inserted.append(event)
+
+
+def test_remove_drops_event_from_lookups():
+    index = MergeIndex()
+    event = make_event("usgs_a")
+    seq = index.add(event)
+    assert index.find_duplicate(make_event("emsc_a", source="emsc"))[0] == seq
+    index.remove(seq)
+    assert len(index) == 0
+    assert index.find_duplicate(make_event("emsc_a", source="emsc")) is None
+
+
+def test_cluster_represented_by_highest_priority_source():
+    usgs = make_event("usgs_a", source="usgs", magnitude=4.0)
+    geofon = make_event("geofon_a", source="geofon", magnitude=4.1, latitude=45.01)
+    emsc = make_event("emsc_a", source="emsc", magnitude=4.2, longitude=10.01)
+    far = make_event("usgs_b", latitude=46.0)
+
+    merged = merge_events([usgs, geofon, emsc, far])
+
+    assert [e.id for e in merged] == ["emsc_a", "usgs_b"]
+    assert merged[0].sources == ["usgs", "geofon"]
+    assert merged[1].sources is None
+
+
+def test_update_skips_unchanged_events():
+    catalog = MergedCatalog()
+    events = [make_event("usgs_a"), make_event("usgs_b", latitude=50.0)]
+    assert catalog.update(events)
+    assert not catalog.update(events)
+    assert not catalog.update([make_event("usgs_a", timestamp=events[0].timestamp)])
+    assert len(catalog) == 2
+
+
+def test_revised_event_leaves_cluster_it_no_longer_matches():
+    catalog = MergedCatalog()
+    usgs = make_event("usgs_a", source="usgs")
+    emsc = make_event("emsc_a", source="emsc", timestamp=usgs.timestamp)
+    catalog.update([usgs, emsc])
+    assert [e.id for e in catalog] == ["emsc_a"]
+
+    moved = make_event(
+        "emsc_a",
+        source="emsc",
+        timestamp=usgs.timestamp,
+        latitude=usgs.latitude + 5 * MERGE_MAX_KM / 111,
+    )
+    assert catalog.update([moved])
+
+    assert sorted(e.id for e in catalog) == ["emsc_a", "usgs_a"]
+    assert all(e.sources is None for e in catalog)
+    assert catalog.duplicates == 0
+
+
+def test_discard_returns_all_members():
+    catalog = MergedCatalog()
+    usgs = make_event("usgs_a", source="usgs")
+    emsc = make_event("emsc_a", source="emsc", timestamp=usgs.timestamp)
+    catalog.update([usgs, emsc])
+
+    members = catalog.discard("usgs_a")
+
+    assert {e.id for e in members} == {"usgs_a", "emsc_a"}
+    assert len(catalog) == 0
+    assert catalog.discard("usgs_a") == []
+    # Once discarded, the same events are merged in again from scratch
+    assert catalog.update([usgs])
+
+
+def test_order_and_change_log_follow_updates_and_discards():
+    rng = random.Random(3)
+    events = _random_events(rng, 400)
+    catalog = MergedCatalog()
+    live = {}
+    for step in range(20):
+        batch = rng.sample(events, 60)
+        # Revisions of earlier events, some moving in time
+        batch += [
+            make_event(
+                e.id,
+                source=e.source,
+                timestamp=e.timestamp + rng.choice([0, 30]),
+                latitude=e.latitude,
+                longitude=e.longitude,
+                magnitude=round(rng.uniform(2, 3), 1),
+            )
+            for e in rng.sample(events, 10)
+        ]
+        catalog.update(batch)
+        for e in rng.sample(list(catalog), min(5, len(catalog))):
+            catalog.discard(e.id)
+
+        for event, added in catalog.drain():
+            if added:
+                assert event.id not in live
+                live[event.id] = event
+            else:
+                assert live.pop(event.id) is event
+        assert catalog.drain() == []
+
+        expected = sorted(catalog, key=lambda e: e.timestamp, reverse=True)
+        assert catalog.newest_first() == expected
+        assert catalog.oldest_first() == expected[::-1]
+        assert live == {e.id: e for e in catalog}
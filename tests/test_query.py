@@ -0,0 +1,177 @@
+"""Indexed catalog queries and the quakehub.query service."""
+import random
+from types import SimpleNamespace
+
+import pytest
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.quakehub.const import DATA_HUB, DOMAIN, SERVICE_QUERY
+from custom_components.quakehub.merger import haversine_km
+from custom_components.quakehub.query import (
+    ORDER_DISTANCE,
+    ORDER_MAGNITUDE,
+    ORDER_TIME,
+    EventIndex,
+    EventQuery,
+    IndexCache,
+    async_setup_services,
+)
+
+from .common import HOME, async_test_hass, make_event
+
+NOW = 1_700_000_000.0
+
+
+def _catalog(rng, count):
+    return [
+        make_event(
+            f"{source}_{i}",
+            source=source,
+            timestamp=NOW - rng.uniform(0, 7 * 86400),
+            latitude=rng.uniform(-60, 60),
+            longitude=rng.uniform(-180, 180),
+            depth=rng.choice([None, rng.uniform(0, 300)]),
+            magnitude=rng.choice([None, round(rng.uniform(1, 8), 1)]),
+            sources=rng.choice([None, ["geofon"]]),
+        )
+        for i, source in ((i, rng.choice(["usgs", "emsc"])) for i in range(count))
+    ]
+
+
+def _brute_force(events, q):
+    matches = []
+    for e in events:
+        if q.start is not None and e.timestamp < q.start:
+            continue
+        if q.end is not None and e.timestamp > q.end:
+            continue
+        mag = e.magnitude
+        if q.min_magnitude is not None and (mag is None or mag < q.min_magnitude):
+            continue
+        if q.max_magnitude is not None and (mag is None or mag > q.max_magnitude):
+            continue
+        if q.min_depth is not None and (e.depth is None or e.depth < q.min_depth):
+            continue
+        if q.min_longitude is not None and q.max_longitude is not None:
+            if q.min_longitude <= q.max_longitude:
+                if not q.min_longitude <= e.longitude <= q.max_longitude:
+                    continue
+            elif q.max_longitude < e.longitude < q.min_longitude:
+                continue
+        if q.sources is not None and not (
+            e.source in q.sources or any(s in q.sources for s in e.sources or ())
+        ):
+            continue
+        distance = None
+        if q.latitude is not None:
+            distance = haversine_km(q.latitude, q.longitude, e.latitude, e.longitude)
+            if q.max_distance is not None and distance > q.max_distance:
+                continue
+        matches.append((e, distance))
+
+    if q.order_by == ORDER_DISTANCE and q.latitude is not None:
+        matches.sort(key=lambda m: m[1])
+    elif q.order_by == ORDER_MAGNITUDE:
+        matches.sort(
+            key=lambda m: -m[0].magnitude if m[0].magnitude is not None else 1e9
+        )
+    else:
+        matches.sort(key=lambda m: -m[0].timestamp)
+    return matches[: q.limit]
+
+
+def _random_query(rng):
+    q = EventQuery(order_by=rng.choice([ORDER_TIME, ORDER_MAGNITUDE, ORDER_DISTANCE]))
+    q.limit = rng.choice([1, 5, 50, 1000])
+    if rng.random() < 0.5:
+        q.start = NOW - rng.uniform(0, 7 * 86400)
+    if rng.random() < 0.3:
+        q.end = NOW - rng.uniform(0, 3 * 86400)
+    if rng.random() < 0.5:
+        q.min_magnitude = rng.uniform(1, 7)
+    if rng.random() < 0.3:
+        q.max_magnitude = rng.uniform(3, 8)
+    if rng.random() < 0.2:
+        q.min_depth = rng.uniform(0, 100)
+    if rng.random() < 0.3:
+        q.min_longitude = rng.uniform(-180, 180)
+        q.max_longitude = rng.uniform(-180, 180)
+    if rng.random() < 0.2:
+        q.sources = frozenset(rng.sample(["usgs", "emsc", "geofon"], 1))
+    if rng.random() < 0.7:
+        q.latitude, q.longitude = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        if rng.random() < 0.6:
+            q.max_distance = rng.uniform(100, 8000)
+    return q
+
+
+def _key(matches, order_by):
+    """Comparable form of a result; ties may come back in any order."""
+    if order_by == ORDER_MAGNITUDE:
+        return [m[0].magnitude for m in matches]
+    if order_by == ORDER_DISTANCE and matches and matches[0][1] is not None:
+        return [round(m[1], 6) for m in matches]
+    return [m[0].timestamp for m in matches]
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(7)
+    events = _catalog(rng, 2000)
+    index = EventIndex(events)
+    for _ in range(500):
+        q = _random_query(rng)
+        result = index.query(q)
+        expected = _brute_force(events, q)
+        assert _key(result, q.order_by) == _key(expected, q.order_by), q
+        assert {m[0].id for m in result} <= {e.id for e in events}
+        if len(expected) < q.limit:
+            assert {m[0].id for m in result} == {m[0].id for m in expected}, q
+
+
+def test_index_cache_rebuilds_for_new_catalog_only():
+    cache = IndexCache()
+    events = [make_event("usgs_a")]
+    index = cache.get(events)
+    assert cache.get(events) is index
+    assert cache.get(list(events)) is not index
+
+
+async def test_query_service(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        events = [
+            make_event("usgs_near", age=60, magnitude=3.0),
+            make_event("usgs_far", age=120, latitude=HOME[0] + 20, magnitude=6.0),
+            make_event("emsc_old", source="emsc", age=7200, magnitude=5.0),
+        ]
+        hass.data[DATA_HUB] = SimpleNamespace(data=events, event_index=IndexCache())
+        hass.data[DOMAIN] = {}
+        async_setup_services(hass)
+
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_QUERY,
+            {"max_age": {"hours": 1}, "order_by": "magnitude"},
+            blocking=True,
+            return_response=True,
+        )
+        assert [e["id"] for e in response["events"]] == ["usgs_far", "usgs_near"]
+        assert response["count"] == 2
+        assert response["events"][1]["distance_km"] == 0.0
+
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_QUERY,
+            {"max_distance": 1000, "sources": "emsc"},
+            blocking=True,
+            return_response=True,
+        )
+        assert [e["id"] for e in response["events"]] == ["emsc_old"]
+
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                DOMAIN,
+                SERVICE_QUERY,
+                {"entry_id": "missing"},
+                blocking=True,
+                return_response=True,
+            )
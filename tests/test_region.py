@@ -0,0 +1,145 @@
+"""Polygon and named regions."""
+import json
+import math
+import random
+import time
+
+import pytest
+
+from custom_components.quakehub.merger import MergedCatalog
+from custom_components.quakehub.region import (
+    NamedRegion,
+    PreparedPolygon,
+    _crossings,
+    parse_region,
+)
+
+from .common import async_test_hass, make_coordinator, make_entry, make_event
+
+
+def _edges(rings):
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+            yield x1, y1, x2, y2
+
+
+def _star(rng, cx, cy, size, count):
+    # Vertices snapped to a coarse grid so many edges come out horizontal
+    ring = []
+    for i in range(count):
+        angle = 2 * math.pi * i / count
+        r = size * rng.uniform(0.3, 1.0)
+        ring.append(
+            (
+                round((cx + r * math.cos(angle)) * 2) / 2,
+                round((cy + r * math.sin(angle)) * 2) / 2,
+            )
+        )
+    return ring
+
+
+def test_grid_matches_plain_ray_casting():
+    rng = random.Random(7)
+    for _ in range(40):
+        rings = [_star(rng, 0, 0, 10, rng.randint(4, 24))]
+        if rng.random() < 0.5:
+            rings.append(_star(rng, 0, 0, 2, rng.randint(3, 8)))
+        polygon = PreparedPolygon(rings)
+        edges = list(_edges(rings))
+        ys = sorted({y for ring in rings for _, y in ring})
+        for _ in range(500):
+            x = rng.uniform(-11, 11)
+            # Half the points hug a vertex latitude, next to horizontal edges
+            if rng.random() < 0.5:
+                y = rng.choice(ys) + rng.uniform(-0.05, 0.05)
+            else:
+                y = rng.uniform(-11, 11)
+            assert polygon.contains(x, y) == _crossings(x, y, edges), (rings, x, y)
+
+
+def test_horizontal_edge_splits_its_cells():
+    shape = [(0, 0), (10, 0), (10, 5.1), (4, 5.1), (4, 10), (0, 10)]
+    polygon = PreparedPolygon([shape])
+
+    assert not polygon.contains(8, 5.14)
+    assert polygon.contains(8, 5.06)
+    assert polygon.contains(2, 5.14)
+
+
+def test_flat_polygon_is_rejected():
+    with pytest.raises(ValueError):
+        PreparedPolygon([[(0, 1), (5, 1), (9, 1)]])
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "[1, 2]",
+        '{"type": "Polygon", "coordinates": 5}',
+        '{"type": "Polygon", "coordinates": [[1, 2]]}',
+        '{"type": "Polygon", "coordinates": [[[1, 2], [3], [4, 5]]]}',
+        '{"type": "Polygon", "coordinates": [[[1, 2], ["a", 3], [4, 5]]]}',
+        '{"type": "Polygon", "coordinates": [[[0, 0], [1, NaN], [1, 1]]]}',
+        '{"type": "Polygon", "coordinates": null}',
+        '{"type": "MultiPolygon", "coordinates": {"a": 1}}',
+        '{"type": "Feature", "geometry": "x"}',
+        '{"type": "FeatureCollection", "features": {"type": "Feature"}}',
+        '{"type": "GeometryCollection", "geometries": [5]}',
+    ],
+)
+def test_malformed_geojson_raises_value_error(value):
+    with pytest.raises(ValueError):
+        parse_region(value)
+
+
+@pytest.mark.parametrize("east", [-170, 190])
+def test_polygon_across_the_antimeridian(east):
+    outer = [[170, -10], [east, -10], [east, 10], [170, 10], [170, -10]]
+    hole = [[175, -2], [-175, -2], [-175, 2], [175, 2], [175, -2]]
+    region = parse_region(json.dumps({"type": "Polygon", "coordinates": [outer, hole]}))
+
+    def inside(lon, lat):
+        return region.contains(make_event("usgs_a", latitude=lat, longitude=lon))
+
+    assert inside(175, 5) and inside(-175, -5) and inside(-179.9, 9)
+    assert not inside(179.9, 0) and not inside(-177, 1)
+    assert not inside(0, 0) and not inside(160, 0) and not inside(-160, 0)
+    lat, lon, _ = region.bounding_circle
+    assert -180 <= lon <= 180
+
+
+def test_named_region_matches_any_merged_report():
+    now = time.time()
+    usgs = make_event("usgs_a", timestamp=now, place="5 km N of Norcia, Italy")
+    geofon = make_event(
+        "geofon_a", source="geofon", timestamp=now, place="Central Italy"
+    )
+    catalog = MergedCatalog()
+    catalog.update([usgs, geofon])
+    (merged,) = catalog
+    region = NamedRegion(["CENTRAL ITALY"])
+
+    assert merged.id == "usgs_a"
+    assert region.filter([merged]) == []
+    assert region.filter([merged], catalog.member_places) == [merged]
+
+
+async def test_coordinator_matches_region_of_merged_reports(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        entry = make_entry(region_mode="region", region="CENTRAL ITALY")
+        coordinator = make_coordinator(hass, entry)
+        hub = coordinator.hub
+        now = time.time()
+        hub._apply(
+            [
+                make_event("usgs_a", timestamp=now, place="Norcia, Italy"),
+                make_event(
+                    "geofon_a", source="geofon", timestamp=now, place="Central Italy"
+                ),
+                make_event("usgs_b", latitude=40, place="Greece"),
+            ]
+        )
+        hub.data = hub._snapshot()
+        coordinator.async_handle_hub_update()
+
+        assert [e.id for e in coordinator.data] == ["usgs_a"]
@@ -0,0 +1,182 @@
+"""Catalog retention by age, count and memory."""
+import random
+import time
+
+from custom_components.quakehub.const import RETENTION_OLDEST, RETENTION_WEAKEST
+from custom_components.quakehub.hub import QuakeHub
+from custom_components.quakehub.retention import (
+    REASON_AGE,
+    REASON_BYTES,
+    REASON_COUNT,
+    Retention,
+    RetentionPolicy,
+    combine_policies,
+    event_size,
+)
+
+from .common import async_test_hass, make_coordinator, make_entry, make_event
+
+DAY = 86400
+
+
+def _spread(count, **kwargs):
+    """Events a degree apart, newest first, one minute apart."""
+    return [
+        make_event(f"usgs_{i}", age=60.0 * (i + 1), latitude=i % 80, **kwargs)
+        for i in range(count)
+    ]
+
+
+def test_combined_policy_keeps_what_any_entry_asks_for():
+    policy = combine_policies(
+        [
+            RetentionPolicy(max_age=DAY, max_events=100, evict=RETENTION_WEAKEST),
+            RetentionPolicy(max_events=500, keep_magnitude=5.0),
+        ]
+    )
+    assert policy.max_events == 500
+    assert policy.keep_magnitude == 5.0
+    assert policy.evict == RETENTION_OLDEST
+    assert combine_policies([]) == RetentionPolicy()
+
+
+def test_admit_drops_events_older_than_max_age():
+    retention = Retention(RetentionPolicy(max_age=DAY))
+    now = time.time()
+    old = make_event("usgs_old", timestamp=now - 2 * DAY)
+    new = make_event("usgs_new", timestamp=now - 60)
+    assert retention.admit([old, new], now) == [new]
+
+
+async def test_evicts_oldest_beyond_max_events(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        hub = QuakeHub(hass)
+        hub.retention.policy = RetentionPolicy(max_events=5)
+        events = _spread(8)
+        hub._apply(events)
+
+        kept = hub._snapshot()
+
+        assert [e.id for e in kept] == [e.id for e in events[:5]]
+        assert hub.retention.evicted[REASON_COUNT] == 3
+        # Evicted events still in a feed are not merged back in
+        assert not hub._apply(events)
+        assert len(hub._catalog) == 5
+
+
+async def test_never_evicts_protected_events_for_count(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        hub = QuakeHub(hass)
+        hub.retention.policy = RetentionPolicy(max_events=2, keep_magnitude=6.0)
+        events = _spread(4)
+        events[3] = make_event("usgs_big", age=3600, latitude=70, magnitude=7.0)
+        hub._apply(events)
+
+        kept = hub._snapshot()
+
+        assert [e.id for e in kept] == ["usgs_0", "usgs_big"]
+
+
+async def test_weakest_first_prefers_strong_and_near_events(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        # Distances count from the 500 km area of the entry
+        hub = make_coordinator(hass, make_entry()).hub
+        hub.retention.policy = RetentionPolicy(
+            max_events=2, evict=RETENTION_WEAKEST, keep_magnitude=9.0
+        )
+        hub._apply(
+            [
+                make_event("usgs_near", age=60, magnitude=3.0),
+                make_event("usgs_far", age=120, latitude=-40, magnitude=3.0),
+                make_event("usgs_strong", age=180, latitude=-40, magnitude=5.0),
+            ]
+        )
+
+        kept = hub._snapshot()
+
+        assert {e.id for e in kept} == {"usgs_near", "usgs_strong"}
+
+
+async def test_age_and_memory_limits(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        hub = QuakeHub(hass)
+        events = _spread(10)
+        budget = sum(event_size(e) for e in events[:4])
+        hub.retention.policy = RetentionPolicy(max_bytes=budget)
+        hub._apply(events)
+
+        kept = hub._snapshot()
+
+        assert len(kept) == 4
+        assert hub.retention.bytes <= budget
+        assert hub.retention.evicted[REASON_BYTES] == 6
+
+        hub.retention.policy = RetentionPolicy(max_age=150)
+        assert hub.retention.exceeded(kept[-1], time.time())
+        kept = hub._snapshot()
+        assert [e.id for e in kept] == ["usgs_0", "usgs_1"]
+        assert hub.retention.evicted[REASON_AGE] == 2
+
+
+async def test_upgraded_event_is_let_back_in(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        hub = QuakeHub(hass)
+        hub.retention.policy = RetentionPolicy(max_events=1, keep_magnitude=6.0)
+        events = _spread(2)
+        hub._apply(events)
+        hub._snapshot()
+        assert not hub._apply([events[1]])
+
+        upgraded = make_event(
+            "usgs_1", timestamp=events[1].timestamp, latitude=1, magnitude=6.5
+        )
+        assert hub._apply([upgraded])
+        assert [e.id for e in hub._snapshot()] == ["usgs_1"]
+
+
+async def test_tracked_totals_match_the_catalog(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        hub = QuakeHub(hass)
+        hub.retention.policy = RetentionPolicy(
+            max_events=30, max_bytes=40 * 1500, keep_magnitude=5.0
+        )
+        rng = random.Random(5)
+        for step in range(15):
+            hub._apply(
+                make_event(
+                    f"usgs_{rng.randrange(60)}",
+                    age=rng.uniform(60, 3600),
+                    latitude=rng.uniform(-60, 60),
+                    magnitude=round(rng.uniform(2, 6), 1),
+                )
+                for _ in range(10)
+            )
+            if step == 8:
+                hub.retention.policy = RetentionPolicy(max_events=20)
+            kept = hub._snapshot()
+
+            retention = hub.retention
+            protected = [e for e in kept if retention._protected(e)]
+            assert retention.size == len(kept) == len(hub._catalog)
+            assert retention.bytes == sum(event_size(e) for e in kept)
+            assert retention._protected_count == len(protected)
+            assert retention._protected_bytes == sum(map(event_size, protected))
+            assert not retention.exceeded(kept[-1], time.time())
+
+
+async def test_unchanged_snapshot_is_not_saved_again(tmp_path, monkeypatch):
+    async with async_test_hass(tmp_path) as hass:
+        hub = QuakeHub(hass)
+        saved = []
+        monkeypatch.setattr(hub.store, "async_schedule_save", saved.append)
+        hub.retention.policy = RetentionPolicy(max_events=3)
+        hub._apply(_spread(4))
+
+        kept = hub._snapshot()
+        assert [len(events) for events in saved] == [3]
+        assert hub._snapshot() == kept
+        assert len(saved) == 1
+
+        hub._apply([make_event("usgs_new", age=1)])
+        hub._snapshot()
+        assert [len(events) for events in saved] == [3, 3]
@@ -0,0 +1,93 @@
+"""Adaptive per-source poll schedule."""
+import pytest
+
+from custom_components.quakehub.const import (
+    BOOST_INTERVAL,
+    ERROR_MAX_INTERVAL,
+    MIN_POLL_INTERVAL,
+    UNCHANGED_BACKOFF,
+    UNCHANGED_MAX_FACTOR,
+)
+from custom_components.quakehub.scheduler import SourceScheduler
+
+
+def _scheduler(base=300.0):
+    scheduler = SourceScheduler()
+    scheduler.configure(["usgs", "emsc"], base)
+    return scheduler
+
+
+def test_new_sources_are_due_at_once():
+    assert sorted(_scheduler().due(0.0)) == ["emsc", "usgs"]
+
+
+def test_unchanged_feed_backs_off_up_to_limit():
+    schedule = _scheduler()["usgs"]
+    schedule.record_success(0.0, signature=1)
+    assert schedule.interval == 300
+    assert schedule.next_due == 300
+
+    schedule.record_success(300.0, signature=1)
+    assert schedule.interval == pytest.approx(300 * UNCHANGED_BACKOFF)
+    for _ in range(20):
+        schedule.record_success(1000.0, signature=1)
+    assert schedule.interval == 300 * UNCHANGED_MAX_FACTOR
+
+    schedule.record_success(2000.0, signature=2)
+    assert schedule.interval == 300
+
+
+def test_errors_double_interval_and_honour_retry_after():
+    schedule = _scheduler()["usgs"]
+    schedule.record_error(0.0)
+    assert schedule.interval == 600
+    schedule.record_error(0.0, retry_after=5000)
+    assert schedule.interval == 1200
+    assert schedule.next_due == 5000
+    for _ in range(10):
+        schedule.record_error(0.0)
+    assert schedule.interval == ERROR_MAX_INTERVAL
+
+    schedule.record_success(10.0, signature=1)
+    assert schedule.errors == 0
+    assert schedule.interval == 300
+
+
+def test_boost_polls_faster_until_it_ends(monkeypatch):
+    scheduler = _scheduler()
+    for source in ("usgs", "emsc"):
+        scheduler[source].record_success(0.0, signature=1)
+    scheduler["emsc"].record_error(0.0)
+    monkeypatch.setattr(
+        "custom_components.quakehub.scheduler.time.monotonic", lambda: 10.0
+    )
+
+    scheduler.boost(600)
+
+    usgs = scheduler["usgs"]
+    assert usgs.interval == BOOST_INTERVAL
+    assert usgs.next_due == 10 + BOOST_INTERVAL
+    # A failing source keeps its error backoff
+    assert scheduler["emsc"].interval == 600
+
+    usgs.record_success(100.0, signature=1)
+    assert usgs.interval == BOOST_INTERVAL
+    usgs.record_success(700.0, signature=1)
+    assert usgs.interval == pytest.approx(BOOST_INTERVAL * UNCHANGED_BACKOFF)
+
+
+def test_configure_applies_new_base_and_drops_sources():
+    scheduler = _scheduler()
+    scheduler["usgs"].record_success(0.0, signature=1)
+    scheduler.configure(["usgs"], 120.0)
+    assert "emsc" not in scheduler
+    assert scheduler["usgs"].interval == 120
+    assert scheduler["usgs"].next_due <= 300
+
+
+def test_wakes_up_no_sooner_than_minimum_interval():
+    scheduler = _scheduler()
+    assert scheduler.seconds_until_due(0.0) == MIN_POLL_INTERVAL
+    for source in ("usgs", "emsc"):
+        scheduler[source].record_success(0.0, signature=1)
+    assert scheduler.seconds_until_due(100.0) == 200
@@ -0,0 +1,50 @@
+"""Sensors only write their state when it changes."""
+import time
+from types import SimpleNamespace
+
+from custom_components.quakehub import coordinator as coordinator_module
+from custom_components.quakehub import hub as hub_module
+from custom_components.quakehub import sensor
+from custom_components.quakehub.const import DOMAIN
+
+from .common import async_test_hass, make_coordinator, make_entry, make_event
+
+
+async def test_unchanged_catalog_writes_no_state(tmp_path, monkeypatch):
+    async with async_test_hass(tmp_path) as hass:
+        entry = make_entry(region_mode="watchlist", watchlist="Home: 45, 10, 300")
+        coordinator = make_coordinator(hass, entry)
+        hub = coordinator.hub
+        hub.health["usgs"].last_success = time.monotonic()
+        hub.data = [
+            make_event("usgs_a", age=600, magnitude=4.2),
+            make_event("usgs_b", age=7200, latitude=44, magnitude=2.5),
+        ]
+        hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+        added = []
+        await sensor.async_setup_entry(hass, entry, added.extend)
+        entities = [e for e in added if isinstance(e, sensor.BaseQuakeSensor)]
+        writes = []
+        for entity in entities:
+            monkeypatch.setattr(
+                entity, "async_write_ha_state", lambda e=entity: writes.append(e)
+            )
+            coordinator.async_add_listener(entity._handle_coordinator_update)
+
+        coordinator.async_handle_hub_update()
+        assert len(writes) == len(entities)
+
+        # The same catalog keeps arriving while the clock moves on
+        for step in range(1, 4):
+            now, mono = time.time() + 30 * step, time.monotonic() + 30 * step
+            clock = SimpleNamespace(time=lambda: now, monotonic=lambda: mono)
+            monkeypatch.setattr(coordinator_module, "time", clock)
+            monkeypatch.setattr(hub_module, "time", clock)
+            coordinator.async_handle_hub_update()
+
+        assert len(writes) == len(entities)
+        assert coordinator.state_writes["skipped"] == 3 * len(entities)
+
+        hub.data = [make_event("usgs_c", age=1, magnitude=3.1), *hub.data]
+        coordinator.async_handle_hub_update()
+        assert len(writes) > len(entities)
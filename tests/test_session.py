@@ -0,0 +1,31 @@
+"""Pooled HTTP session lifecycle."""
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+
+from custom_components.quakehub.session import async_close_session, async_get_session
+
+from .common import async_test_hass
+
+
+async def test_reloads_do_not_pile_up_close_listeners(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+
+        def listeners():
+            return hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_CLOSE, 0)
+
+        before = listeners()
+        for _ in range(5):
+            session = async_get_session(hass)
+            assert async_get_session(hass) is session
+            assert listeners() == before + 1
+            await async_close_session(hass)
+            assert session.closed
+            assert listeners() == before
+
+
+async def test_replacing_a_closed_session_keeps_one_listener(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        before = hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_CLOSE, 0)
+        await async_get_session(hass).close()
+        session = async_get_session(hass)
+        assert hass.bus.async_listeners()[EVENT_HOMEASSISTANT_CLOSE] == before + 1
+    assert session.closed
@@ -0,0 +1,51 @@
+"""Event store persistence."""
+import os
+
+from custom_components.quakehub import async_remove_entry
+from custom_components.quakehub.const import DOMAIN
+from custom_components.quakehub.hub import QuakeHub
+from custom_components.quakehub.store import EventStore
+
+from .common import async_test_hass, make_entry, make_event
+
+
+async def test_round_trip(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        events = [make_event("usgs_a", sources=["emsc"]), make_event("usgs_b")]
+        store = EventStore(hass)
+        store.async_schedule_save(events)
+        await store.async_flush()
+        assert await EventStore(hass).async_load() == events
+
+
+async def test_shutdown_writes_pending_save(tmp_path):
+    async with async_test_hass(tmp_path) as hass:
+        hub = QuakeHub(hass)
+        events = [make_event("usgs_a")]
+        hub.store.async_schedule_save(events)
+
+        await hub.async_shutdown()
+
+        assert hub.store._store._unsub_delay_listener is None
+        assert await EventStore(hass).async_load() == events
+
+
+async def test_removing_last_entry_deletes_shared_store(tmp_path, monkeypatch):
+    async with async_test_hass(tmp_path) as hass:
+        store = EventStore(hass)
+        store.async_schedule_save([make_event("usgs_a")])
+        await store.async_flush()
+        path = hass.config.path(".storage", f"{DOMAIN}.events")
+        one, two = make_entry("one"), make_entry("two")
+        # Home Assistant still lists an entry while removing it
+        listed = [one, two]
+        monkeypatch.setattr(
+            hass.config_entries, "async_entries", lambda domain=None: list(listed)
+        )
+
+        await async_remove_entry(hass, one)
+        assert os.path.exists(path)
+
+        listed.remove(one)
+        await async_remove_entry(hass, two)
+        assert not os.path.exists(path)
@@ -0,0 +1,98 @@
+"""EMSC WebSocket client against a local stand-in server."""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+from custom_components.quakehub import stream_emsc
+from custom_components.quakehub.stream_emsc import EmscStream, parse_emsc_message
+
+from .common import async_test_hass
+
+
+def _message(event_id, magnitude=4.2, action="create"):
+    return json.dumps(
+        {
+            "action": action,
+            "data": {
+                "type": "Feature",
+                "id": event_id,
+                "geometry": {"type": "Point", "coordinates": [13.2, 42.5, 10.0]},
+                "properties": {
+                    "time": "2024-05-01T10:00:00.0Z",
+                    "mag": magnitude,
+                    "flynn_region": "CENTRAL ITALY",
+                },
+            },
+        }
+    )
+
+
+@asynccontextmanager
+async def _ws_server(handler):
+    app = web.Application()
+    app.router.add_get("/ws", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}/ws"
+    finally:
+        await runner.cleanup()
+
+
+async def _wait_for(predicate, timeout=5.0):
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+def test_parse_message():
+    (event,) = parse_emsc_message(_message("20240501_0001"))
+    assert event.id == "emsc_20240501_0001"
+    assert (event.latitude, event.longitude, event.magnitude) == (42.5, 13.2, 4.2)
+    assert event.place == "CENTRAL ITALY"
+    assert parse_emsc_message(json.dumps({"action": "ping"})) == []
+
+
+async def test_receives_and_reconnects_after_drops(tmp_path, monkeypatch):
+    monkeypatch.setattr(stream_emsc, "STREAM_BACKOFF_MIN", 0.01)
+    connections = []
+    release = asyncio.Event()
+
+    async def handler(request):
+        connections.append(request)
+        if len(connections) == 2:
+            # The reconnect fails once before the server is back
+            return web.Response(status=503)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        if len(connections) == 1:
+            await ws.send_str("not json")
+            await ws.send_str(_message("first"))
+            await ws.close()
+        else:
+            await ws.send_str(_message("second", magnitude=5.0))
+            await release.wait()
+        return ws
+
+    async with async_test_hass(tmp_path) as hass, _ws_server(handler) as url:
+        received = []
+        stream = EmscStream(hass, received.append, url=url)
+        stream.start()
+
+        await _wait_for(lambda: len(received) == 2)
+        assert [[e.id for e in events] for events in received] == [
+            ["emsc_first"],
+            ["emsc_second"],
+        ]
+        assert received[1][0].magnitude == 5.0
+        assert len(connections) == 3
+        assert stream.connected
+
+        await stream.async_stop()
+        assert not stream.connected
+        release.set()